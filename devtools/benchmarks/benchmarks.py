@@ -0,0 +1,299 @@
+"""
+Benchmarks of the hot paths of OpenPathSampling
+
+All benchmarks use the toy engine, so they run anywhere. Each benchmark is
+a subclass of :class:`Benchmark`; only :meth:`Benchmark.run` is timed.
+Use `run_benchmarks.py` to run them and to compare to a baseline.
+"""
+from __future__ import absolute_import
+from builtins import range
+from builtins import object
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import openpathsampling as paths
+import openpathsampling.engines.toy as toys
+from openpathsampling.analysis.path_histogram import PathHistogram
+from openpathsampling.analysis.replica_network import ReplicaNetwork
+
+
+class Benchmark(object):
+    """
+    A timed piece of code
+
+    For each repetition, the runner calls :meth:`setup`, then times
+    :meth:`run` and finally calls :meth:`teardown`.
+
+    Attributes
+    ----------
+    name : str
+        unique name of the benchmark, used to compare to a baseline
+    """
+    name = None
+
+    def setup(self):
+        pass
+
+    def run(self):
+        raise NotImplementedError()
+
+    def teardown(self):
+        pass
+
+
+def toy_engine(n_steps_per_frame=10):
+    """1D motion on a flat potential; the position is linear in time"""
+    pes = toys.LinearSlope(m=[0.0], c=[0.0])
+    topology = toys.Topology(n_spatial=1, masses=[1.0], pes=pes)
+    integrator = toys.LeapfrogVerletIntegrator(0.01)
+    options = {
+        'integ': integrator,
+        'n_frames_max': 100000,
+        'n_steps_per_frame': n_steps_per_frame
+    }
+    return toys.Engine(options=options, topology=topology)
+
+
+def toy_trajectory(coordinates, engine):
+    """Trajectory of 1D toy snapshots at the given positions"""
+    return paths.Trajectory([
+        toys.Snapshot(coordinates=np.array([[x]]),
+                      velocities=np.array([[1.0]]),
+                      engine=engine)
+        for x in coordinates
+    ])
+
+
+def toy_tis_network():
+    """States, interfaces and network of a MISTIS A->B transition in 1D"""
+    cv = paths.FunctionCV("x", lambda snap: snap.coordinates[0][0])
+    state_a = paths.CVDefinedVolume(cv, float("-inf"), 0.0)
+    state_b = paths.CVDefinedVolume(cv, 1.0, float("inf"))
+    interfaces = paths.VolumeInterfaceSet(cv, float("-inf"),
+                                          [0.0, 0.2, 0.4, 0.6, 0.8])
+    network = paths.MISTISNetwork([(state_a, interfaces, state_b)])
+    return cv, state_a, state_b, network
+
+
+class ToyEngineGenerate(Benchmark):
+    """Generate a trajectory of 1000 frames with the toy engine"""
+    name = 'toy_engine_generate'
+
+    def setup(self):
+        self.engine = toy_engine()
+        self.snapshot = toys.Snapshot(coordinates=np.array([[0.0]]),
+                                      velocities=np.array([[1.0]]),
+                                      engine=self.engine)
+        self.ensemble = paths.LengthEnsemble(1000)
+
+    def run(self):
+        self.engine.generate(self.snapshot,
+                             running=[self.ensemble.can_append])
+
+
+class SequentialEnsembleCanAppend(Benchmark):
+    """Check `can_append` of a TIS ensemble for a growing trajectory"""
+    name = 'sequential_ensemble_can_append'
+
+    def setup(self):
+        cv, state_a, state_b, network = toy_tis_network()
+        engine = toy_engine()
+        # leave A, move around the interface for a long time, reach B
+        coordinates = np.concatenate([
+            [-0.1], 0.5 + 0.4 * np.sin(np.linspace(0.0, 100.0, 5000)), [1.1]
+        ])
+        self.trajectory = toy_trajectory(coordinates, engine)
+        self.ensemble = paths.TISEnsemble(state_a, state_b,
+                                          network.sampling_ensembles[-1]
+                                          .interface)
+
+    def run(self):
+        # one growing trajectory, like the one `iter_generate` checks
+        trajectory = paths.Trajectory()
+        for snapshot in self.trajectory[:-1]:
+            trajectory.append(snapshot)
+            self.ensemble.can_append(trajectory, trusted=True)
+
+
+class _StorageBenchmark(Benchmark):
+    """Base for benchmarks that use a fresh storage file"""
+    n_trajectories = 20
+    n_frames = 100
+
+    def setup(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tempdir, 'benchmark.nc')
+        engine = toy_engine()
+        self.trajectories = [
+            toy_trajectory(np.linspace(0.0, 1.0, self.n_frames) + i, engine)
+            for i in range(self.n_trajectories)
+        ]
+
+    def teardown(self):
+        shutil.rmtree(self.tempdir)
+
+
+class ObjectStoreSave(_StorageBenchmark):
+    """Save trajectories to a new storage"""
+    name = 'object_store_save'
+
+    def run(self):
+        storage = paths.Storage(self.filename, 'w')
+        for trajectory in self.trajectories:
+            storage.save(trajectory)
+
+        storage.close()
+
+
+class ObjectStoreLoad(_StorageBenchmark):
+    """Load all stored trajectories and their coordinates"""
+    name = 'object_store_load'
+
+    def setup(self):
+        super(ObjectStoreLoad, self).setup()
+        storage = paths.Storage(self.filename, 'w')
+        for trajectory in self.trajectories:
+            storage.save(trajectory)
+
+        storage.close()
+
+    def run(self):
+        storage = paths.Storage(self.filename, 'r')
+        for trajectory in storage.trajectories:
+            trajectory.coordinates
+
+        storage.close()
+
+
+class SnapshotStoreCompleteCV(_StorageBenchmark):
+    """Compute and store the values of a CV for all stored snapshots"""
+    name = 'snapshot_store_complete_cv'
+
+    def setup(self):
+        super(SnapshotStoreCompleteCV, self).setup()
+        self.storage = paths.Storage(self.filename, 'w')
+        for trajectory in self.trajectories:
+            self.storage.save(trajectory)
+
+        self.cv = paths.FunctionCV(
+            'x', lambda snap: snap.coordinates[0][0]
+        ).with_diskcache(allow_incomplete=True)
+        self.storage.save(self.cv)
+
+    def run(self):
+        self.storage.snapshots.complete_cv(self.cv)
+
+    def teardown(self):
+        self.storage.close()
+        super(SnapshotStoreCompleteCV, self).teardown()
+
+
+class WHAMGenerateLnZ(Benchmark):
+    """50 WHAM solutions for 10 overlapping crossing probabilities"""
+    name = 'wham_generate_lnZ'
+    # a single solution takes a few ms, which is close to the timer noise
+    n_repeats = 50
+
+    def setup(self):
+        n_hists = 10
+        lambdas = np.linspace(0.0, 1.0, 501)
+        interfaces = np.linspace(0.0, 0.9, n_hists)
+        data = np.array([
+            [np.exp(-5.0 * (x - iface)) if x >= iface else 1.0
+             for x in lambdas]
+            for iface in interfaces
+        ]).T
+        input_df = pd.DataFrame(data=data, index=lambdas,
+                                columns=[str(i) for i in interfaces])
+
+        self.wham = paths.numerics.WHAM(cutoff=0.05)
+        cleaned = self.wham.prep_reverse_cumulative(input_df)
+        self.guess = self.wham.guess_lnZ_crossing_probability(cleaned)
+        self.sum_k_Hk_Q = self.wham.sum_k_Hk_Q(cleaned)
+        n_entries = self.wham.n_entries(cleaned)
+        self.unweighting = self.wham.unweighting_tis(cleaned)
+        self.weighted_counts = self.wham.weighted_counts_tis(
+            self.unweighting, n_entries
+        )
+
+    def run(self):
+        for _ in range(self.n_repeats):
+            self.wham.generate_lnZ(self.guess, self.unweighting,
+                                   self.weighted_counts, self.sum_k_Hk_Q)
+
+
+class PathHistogramAddTrajectory(Benchmark):
+    """Add 2D trajectories to an interpolating path histogram"""
+    name = 'path_histogram_add_trajectory'
+
+    def setup(self):
+        random = np.random.RandomState(42)
+        steps = random.normal(scale=0.1, size=(20, 500, 2))
+        self.trajectories = [list(map(tuple, np.cumsum(traj, axis=0)))
+                             for traj in steps]
+
+    def run(self):
+        hist = PathHistogram(left_bin_edges=(0.0, 0.0),
+                             bin_widths=(0.05, 0.05),
+                             interpolate=True, per_traj=True)
+        for trajectory in self.trajectories:
+            hist.add_trajectory(trajectory)
+
+
+class ReplicaNetworkAnalyzeExchanges(Benchmark):
+    """Count the accepted replica exchanges of 2000 MC steps"""
+    name = 'replica_network_analyze_exchanges'
+    n_steps = 2000
+
+    def setup(self):
+        cv, state_a, state_b, network = toy_tis_network()
+        engine = toy_engine()
+        ensembles = network.sampling_ensembles
+        movers = [paths.PathReversalMover(ens) for ens in ensembles]
+        movers += [paths.ReplicaExchangeMover(ens1, ens2)
+                   for (ens1, ens2) in zip(ensembles[:-1], ensembles[1:])]
+        root = paths.RandomChoiceMover(movers)
+        scheme = paths.LockedMoveScheme(root, network=network)
+
+        # trajectory i crosses all interfaces up to the one of ensemble i
+        sample_set = paths.SampleSet([
+            paths.Sample(
+                replica=i,
+                trajectory=toy_trajectory([-0.1, 0.1 + 0.2 * i, -0.1],
+                                          engine),
+                ensemble=ens
+            )
+            for (i, ens) in enumerate(ensembles)
+        ])
+        initial_change = paths.AcceptedSampleMoveChange(sample_set.samples)
+        self.steps = [paths.MCStep(mccycle=0, active=sample_set,
+                                   change=initial_change)]
+        for step in range(1, self.n_steps + 1):
+            change = root.move(sample_set)
+            new_sample_set = sample_set.apply_samples(change.results)
+            self.steps.append(paths.MCStep(mccycle=step,
+                                           previous=sample_set,
+                                           active=new_sample_set,
+                                           change=change))
+            sample_set = new_sample_set
+
+        self.repx = ReplicaNetwork(scheme, self.steps)
+
+    def run(self):
+        self.repx.analyze_exchanges(self.steps, force=True)
+
+
+all_benchmarks = [
+    ToyEngineGenerate,
+    SequentialEnsembleCanAppend,
+    ObjectStoreSave,
+    ObjectStoreLoad,
+    SnapshotStoreCompleteCV,
+    WHAMGenerateLnZ,
+    PathHistogramAddTrajectory,
+    ReplicaNetworkAnalyzeExchanges,
+]
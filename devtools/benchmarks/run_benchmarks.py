@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+"""
+Run the OpenPathSampling benchmarks and compare them to a baseline
+
+Examples
+--------
+Save a baseline on the master branch, then compare a feature branch:
+
+    python devtools/benchmarks/run_benchmarks.py --output baseline.json
+    python devtools/benchmarks/run_benchmarks.py --baseline baseline.json
+
+The exit code is 1 if any benchmark is slower than its baseline by more
+than the tolerance (or fails), so this can be used in CI.
+"""
+from __future__ import print_function
+import argparse
+import json
+import platform
+import sys
+import time
+import traceback
+
+import numpy as np
+
+import openpathsampling as paths
+
+from benchmarks import all_benchmarks
+
+
+def time_benchmark(benchmark_class, repeat):
+    """
+    Time the `run` of a benchmark
+
+    Parameters
+    ----------
+    benchmark_class : type
+        subclass of :class:`benchmarks.Benchmark`
+    repeat : int
+        number of timed runs, each with a fresh setup
+
+    Returns
+    -------
+    dict
+        the `times` of all runs and their `min` and `median` in seconds; or
+        the traceback as `error` if the benchmark failed
+    """
+    times = []
+    for _ in range(repeat):
+        benchmark = benchmark_class()
+        try:
+            benchmark.setup()
+            try:
+                start = time.time()
+                benchmark.run()
+                times.append(time.time() - start)
+            finally:
+                benchmark.teardown()
+        except Exception:
+            return {'error': traceback.format_exc()}
+
+    return {'times': times,
+            'min': min(times),
+            'median': float(np.median(times))}
+
+
+def run_benchmarks(names=None, repeat=3, output_stream=sys.stdout):
+    """
+    Run benchmarks
+
+    Parameters
+    ----------
+    names : list of str or None
+        names of the benchmarks to run; if None (default) all are run
+    repeat : int
+        number of timed runs per benchmark
+    output_stream : file
+        progress is written to this stream
+
+    Returns
+    -------
+    dict
+        the `metadata` of this run and the `results` by benchmark name
+    """
+    benchmarks = [b for b in all_benchmarks
+                  if names is None or b.name in names]
+    results = {}
+    for benchmark_class in benchmarks:
+        output_stream.write("Running " + benchmark_class.name + " ... ")
+        output_stream.flush()
+        result = time_benchmark(benchmark_class, repeat)
+        if 'error' in result:
+            output_stream.write("ERROR\n")
+        else:
+            output_stream.write("{:.4f} s\n".format(result['min']))
+        results[benchmark_class.name] = result
+
+    metadata = {
+        'version': paths.version.full_version,
+        # installed versions and source checkouts name this differently
+        'git_revision': getattr(paths.version, 'git_revision',
+                                getattr(paths.version, 'git_version', None)),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'repeat': repeat
+    }
+    return {'metadata': metadata, 'results': results}
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results to a baseline
+
+    The fastest of the repeated runs is compared, since it is least
+    affected by other load on the machine.
+
+    Parameters
+    ----------
+    results : dict
+        results of :func:`run_benchmarks`
+    baseline : dict
+        earlier results of :func:`run_benchmarks`
+    tolerance : float
+        relative slowdown that still counts as no regression
+
+    Returns
+    -------
+    list of tuple
+        for each benchmark the name, baseline time, current time, ratio and
+        status, which is one of `ok`, `faster`, `REGRESSION`, `ERROR` or
+        `new`
+    """
+    rows = []
+    for (name, result) in sorted(results['results'].items()):
+        old = baseline['results'].get(name)
+        if 'error' in result:
+            rows.append((name, None, None, None, 'ERROR'))
+        elif old is None or 'error' in old:
+            rows.append((name, None, result['min'], None, 'new'))
+        else:
+            ratio = result['min'] / old['min']
+            if ratio > 1.0 + tolerance:
+                status = 'REGRESSION'
+            elif ratio < 1.0 / (1.0 + tolerance):
+                status = 'faster'
+            else:
+                status = 'ok'
+            rows.append((name, old['min'], result['min'], ratio, status))
+
+    return rows
+
+
+def format_comparison(rows):
+    """Table of the rows of :func:`compare`"""
+    def fmt(value, fmt_str):
+        return "-" if value is None else fmt_str.format(value)
+
+    lines = ["{:<36} {:>10} {:>10} {:>7}  {}".format(
+        "benchmark", "baseline", "current", "ratio", "status")]
+    for (name, old, new, ratio, status) in rows:
+        lines.append("{:<36} {:>10} {:>10} {:>7}  {}".format(
+            name, fmt(old, "{:.4f}"), fmt(new, "{:.4f}"),
+            fmt(ratio, "{:.2f}"), status
+        ))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument('names', nargs='*',
+                        help="benchmarks to run (default: all)")
+    parser.add_argument('-o', '--output',
+                        help="save the results as JSON to this file")
+    parser.add_argument('-b', '--baseline',
+                        help="compare to the results in this JSON file")
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help="timed runs per benchmark (default: 3)")
+    parser.add_argument('-t', '--tolerance', type=float, default=0.2,
+                        help="relative slowdown that is accepted "
+                             "(default: 0.2)")
+    parser.add_argument('-l', '--list', action='store_true',
+                        help="list all benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for benchmark_class in all_benchmarks:
+            print(benchmark_class.name)
+        return 0
+
+    known = [b.name for b in all_benchmarks]
+    unknown = [name for name in args.names if name not in known]
+    if unknown:
+        parser.error("unknown benchmarks: " + ", ".join(unknown))
+
+    results = run_benchmarks(names=args.names or None, repeat=args.repeat)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    failed = False
+    for (name, result) in sorted(results['results'].items()):
+        if 'error' in result:
+            print("\n" + name + " failed:\n" + result['error'])
+            failed = True
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        rows = compare(results, baseline, args.tolerance)
+        print("")
+        print(format_comparison(rows))
+        failed |= any(row[4] in ['REGRESSION', 'ERROR'] for row in rows)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -131,6 +131,8 @@ from .pathsimulator import (
     CommittorSimulation, DirectSimulation, ShootFromSnapshotsSimulation
 )
 
+from .profiling import MCProfiler
+
 from .sample import Sample, SampleSet
 
 from .shooting import ShootingPointSelector, UniformSelector, \
@@ -22,7 +22,9 @@ class PathHistogram(SparseHistogram):
     interpolate : bool or string
         whether to interpolate missing bin visits. String value determines
         interpolation type (currently only "subdivide" allowed). Default
-        True gives "subdivide" method, False gives no interpolation.
+        True gives "subdivide" method, False gives no interpolation. Whole
+        trajectories are interpolated at once with
+        :meth:`.traversed_bins`, which gives the same bins.
     per_traj : bool
         whether to normalize per trajectory (instead of per-snapshot)
     """
@@ -163,6 +165,26 @@ class PathHistogram(SparseHistogram):
         collections.Counter
             histogram counter for this trajectory
         """
+        cv_traj = np.asarray(trajectory, dtype=float)
+        cv_traj = cv_traj.reshape(len(trajectory), -1)
+        if not np.all(np.isfinite(cv_traj)):
+            return self._single_trajectory_counter_loop(trajectory)
+
+        float_bins = self.map_to_float_bins(cv_traj)
+        bins = np.floor(float_bins)
+        if self.interpolate and len(bins) > 1:
+            visits = self.traversed_bins(float_bins, bins)
+        else:
+            visits = bins
+
+        counts = self._bin_counts(visits, np.ones(len(visits)))
+        if self.per_traj:
+            # keys only exist once, so the counter gives 1 if key present
+            return Counter(counts.keys())
+        return Counter({k: int(v) for (k, v) in counts.items()})
+
+    def _single_trajectory_counter_loop(self, trajectory):
+        """Frame by frame version of :meth:`.single_trajectory_counter`"""
         # make a list of every bin visited, possibly interpolating gaps
         bin_list = [self.map_to_bins(trajectory[0])]
         for fnum in range(len(trajectory)-1):
@@ -178,6 +200,84 @@ class PathHistogram(SparseHistogram):
             local_hist = Counter(local_hist.keys())
         return local_hist
 
+    @staticmethod
+    def traversed_bins(float_bins, bins=None, atol=1e-6):
+        """Bins visited by the straight lines between consecutive frames
+
+        This traverses all segments of the trajectory at once: for each
+        segment, it finds where the line crosses bin boundaries and steps
+        from bin to bin in the order of the crossings (as in a DDA line
+        traversal). If a line crosses several boundaries at the same point
+        (within `atol`, as fraction of the segment), it passes through the
+        corner and only touches the bins on either side.
+
+        Parameters
+        ----------
+        float_bins : np.array
+            the trajectory in units of bins, shape (n_frames, n_dims); see
+            :meth:`.map_to_float_bins`
+        bins : np.array or None
+            `np.floor(float_bins)`, if already calculated
+        atol : float
+            tolerance for simultaneous crossings
+
+        Returns
+        -------
+        np.array
+            the bin of the first frame and, for each segment, the bins
+            entered along the segment (or the end bin again, if the segment
+            stays in one bin); shape (n_visits, n_dims)
+        """
+        if bins is None:
+            bins = np.floor(float_bins)
+        start = float_bins[:-1]
+        delta = float_bins[1:] - start
+        start_bins = bins[:-1].astype(np.int64)
+        end_bins = bins[1:].astype(np.int64)
+        n_segments, n_dims = start_bins.shape
+        n_crossings = np.abs(end_bins - start_bins)
+
+        segment, dim, t, sign = [], [], [], []
+        for d in range(n_dims):
+            n = n_crossings[:, d]
+            seg = np.repeat(np.arange(n_segments), n)
+            # number of the crossing within its segment
+            j = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+            step = np.sign(end_bins[seg, d] - start_bins[seg, d])
+            boundary = np.where(step > 0, start_bins[seg, d] + 1 + j,
+                                start_bins[seg, d] - j)
+            segment.append(seg)
+            dim.append(np.full(len(seg), d, dtype=np.int64))
+            t.append((boundary - start[seg, d]) / delta[seg, d])
+            sign.append(step)
+
+        segment = np.concatenate(segment)
+        dim = np.concatenate(dim)
+        t = np.concatenate(t)
+        sign = np.concatenate(sign)
+        order = np.lexsort((t, segment))
+        (segment, dim, t, sign) = (segment[order], dim[order], t[order],
+                                   sign[order])
+
+        # bin after each crossing: start bin plus all steps so far in the
+        # segment
+        steps = np.zeros((len(segment), n_dims), dtype=np.int64)
+        steps[np.arange(len(segment)), dim] = sign
+        total_steps = np.vstack([np.zeros((1, n_dims), dtype=np.int64),
+                                 np.cumsum(steps, axis=0)])
+        first = np.searchsorted(segment, segment, side='left')
+        entered = (start_bins[segment] + total_steps[1:]
+                   - total_steps[first])
+
+        # simultaneous crossings: only the bin after the last one is entered
+        same_point = np.zeros(len(segment), dtype=bool)
+        same_point[:-1] = ((segment[1:] == segment[:-1])
+                           & (t[1:] - t[:-1] < atol))
+
+        stays = n_crossings.sum(axis=1) == 0
+        return np.vstack([bins[:1], entered[~same_point],
+                          end_bins[stays]]).astype(float)
+
     def add_data_to_histogram(self, trajectories, weights=None):
         """Adds data to the internal histogram counter.
 
@@ -270,7 +370,7 @@ class PathDensityHistogram(PathHistogram):
         # TODO: add something so that we don't recalc the same traj twice
         for (traj, w) in zip(trajectories, weights):
             cv_traj = [cv(traj) for cv in self.cvs]
-            self.add_trajectory(list(zip(*cv_traj)), w)
+            self.add_trajectory(np.array(cv_traj, dtype=float).T, w)
 
         return self._histogram.copy()
 
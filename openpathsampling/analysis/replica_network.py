@@ -1,4 +1,6 @@
 import openpathsampling as paths
+from array import array
+import numpy as np
 import pandas as pd
 import scipy.sparse
 from scipy.sparse.csgraph import reverse_cuthill_mckee
@@ -10,15 +12,33 @@ logger = logging.getLogger(__name__)
 class ReplicaNetwork(object):
     """
     Analysis tool for networks of replica exchanges.
+
+    The steps are read exactly once, so they can come from a generator
+    (e.g., iterating over `storage.steps`). More steps can be added later
+    with :meth:`.update`. Only the occupancy of the ensembles by the
+    replicas is kept, as run-length encoded integer arrays.
+
+    Parameters
+    ----------
+    scheme : :class:`.MoveScheme`
+        the move scheme of the simulation
+    steps : iterable of :class:`.MCStep` or None
+        the steps to analyze, in order. If None, add steps with
+        :meth:`.update`.
+    replicas : list or None
+        the replicas used for :meth:`.flow` and :meth:`.trips`. Defaults to
+        the replicas of the first step.
     """
-    def __init__(self, scheme, steps, replicas=None):
+    def __init__(self, scheme, steps=None, replicas=None):
         if replicas is None:
-            replicas = steps[0].active.replica_list()
-        try:
-            self.n_replicas = len(replicas)
-        except TypeError:
-            replicas = [replicas]
-            self.n_replicas = 1
+            # set by the first step
+            self.n_replicas = 0
+        else:
+            try:
+                self.n_replicas = len(replicas)
+            except TypeError:
+                replicas = [replicas]
+                self.n_replicas = 1
         self.replicas = replicas
         self.scheme = scheme
         self.ensembles = scheme.network.all_ensembles
@@ -30,9 +50,115 @@ class ReplicaNetwork(object):
         self.transitions = { }
 
         self.initial_order()
-        self.analyze_traces(steps)
-        self.analyze_exchanges(steps)
+        self._reset()
+        if steps is not None:
+            self.update(steps)
+
+    def _reset(self):
+        """Forget all analyzed steps"""
+        self.n_steps = 0
+        self.analysis = {}
+        self.traces = {}
+        # the numbering of ensembles and replicas in the arrays is fixed by
+        # the first step, independent of `ensemble_to_number`
+        self._ensembles = list(self.ensembles)
+        self._ensemble_index = {ens: i for (i, ens)
+                                in enumerate(self._ensembles)}
+        self._traced_replicas = []
+        self._replica_index = {}
+        self._traced_ensembles = []
+        self._traced_ensemble_numbers = None
+        self._replica_runs = None
+        self._ensemble_runs = None
+        self._n_trials = 0
+        self._n_accepted = None
+
+    def _start(self, step):
+        """Set up the arrays from the first step"""
+        for sample in step.active:
+            if sample.ensemble not in self._ensemble_index:
+                self._ensemble_index[sample.ensemble] = len(self._ensembles)
+                self._ensembles.append(sample.ensemble)
+
+        self._traced_replicas = [s.replica for s in step.active]
+        self._replica_index = {rep: i for (i, rep)
+                               in enumerate(self._traced_replicas)}
+        self._traced_ensembles = [s.ensemble for s in step.active]
+        self._traced_ensemble_numbers = np.array(
+            [self._ensemble_index[ens] for ens in self._traced_ensembles],
+            dtype=int
+        )
+        if self.replicas is None:
+            self.replicas = list(step.active.replica_list())
+            self.n_replicas = len(self.replicas)
+
+        n_ensembles = len(self._ensembles)
+        self._n_accepted = np.zeros((n_ensembles, n_ensembles), dtype=int)
+
+        occupancy = self._occupancy(step.active)
+        self._replica_runs = _RunLengthTraces(occupancy)
+        self._ensemble_runs = _RunLengthTraces(
+            self._ensemble_occupants(occupancy)
+        )
 
+    def _occupancy(self, sample_set):
+        """Array with the number of the ensemble of each traced replica"""
+        occupancy = np.full(len(self._traced_replicas), -1, dtype=int)
+        for sample in sample_set:
+            replica = self._replica_index.get(sample.replica)
+            if replica is not None:
+                occupancy[replica] = self._ensemble_index[sample.ensemble]
+        return occupancy
+
+    def _ensemble_occupants(self, occupancy):
+        """Array with the replica of each traced ensemble (-1 if none)"""
+        occupants = np.full(len(self._ensembles), -1, dtype=int)
+        present = occupancy >= 0
+        occupants[occupancy[present]] = np.flatnonzero(present)
+        return occupants[self._traced_ensemble_numbers]
+
+    def update(self, steps):
+        """
+        Add steps to the analysis
+
+        Parameters
+        ----------
+        steps : iterable of :class:`.MCStep`
+            steps following the steps analyzed so far; they are read once
+        """
+        for step in steps:
+            if self.n_steps == 0:
+                self._start(step)
+            else:
+                self._add_step(step)
+            self.n_steps += 1
+
+        # results are rebuilt from the arrays when needed
+        self.analysis = {}
+        self.traces = {}
+
+    def _add_step(self, step):
+        occupancy = self._occupancy(step.active)
+        previous = self._replica_runs.current
+        mover = step.change.canonical.mover
+        if mover is not None and mover.is_ensemble_change_mover:
+            self._n_trials += 1
+            moved = ((occupancy != previous) & (occupancy >= 0)
+                     & (previous >= 0))
+            # each hop is (old ensemble, new ensemble) of a replica
+            np.add.at(self._n_accepted,
+                      (previous[moved], occupancy[moved]), 1)
+
+        self._replica_runs.append(occupancy)
+        self._ensemble_runs.append(self._ensemble_occupants(occupancy))
+
+    def _analyze(self, steps, force):
+        """Analyze `steps` from scratch, if they are given and needed"""
+        if steps is not None and (force or self.n_steps == 0):
+            self._reset()
+            self.update(steps)
+        if self.n_steps == 0:
+            raise RuntimeError("No steps given to analyze!")
 
     def set_labels(self, ens2str=None):
         """
@@ -90,56 +216,58 @@ class ReplicaNetwork(object):
         return ensemble_to_number
 
     def analyze_exchanges(self, steps=None, force=False):
-        if force == False and self.analysis != { }:
-            return (self.analysis['n_trials'], self.analysis['n_accepted'])
-        if steps is None:
-            raise RuntimeError("No steps given to analyze!")
-        n_trials = 0
-        self.analysis['n_trials'] = {}
-        self.analysis['n_accepted'] = {}
-        prev = None
-        for step in steps:
-            pmc = step.change
-
-            if pmc.canonical.mover is not None and pmc.canonical.mover.is_ensemble_change_mover:
-                n_trials += 1
-                hops = []
-                for old in prev.active:
-                    new = step.active
-                    if old.replica != new[old.ensemble].replica:
-                        # i.e., the prev and step have diff rep in same ens
-                        hops.append((old.ensemble, new[old.replica].ensemble))
-                for hop in hops:
-                    try:
-                        self.analysis['n_accepted'][hop] += 1
-                    except KeyError:
-                        self.analysis['n_accepted'][hop] = 1
-
-            prev = step
-
-        # TODO: n_trials no longer needs to be a dict, but other functions
-        # expect that in output, so we return it
-        for key in self.analysis['n_accepted'].keys():
-            self.analysis['n_trials'][key] = n_trials
+        """
+        Count the trials and accepted hops of ensemble change moves.
+
+        Parameters
+        ----------
+        steps : iterable of :class:`.MCStep` or None
+            if given and nothing is analyzed yet (or `force`), analyze these
+            steps instead of the steps analyzed so far
+        force : bool (False)
+            if True, recalculate from `steps`
+
+        Returns
+        -------
+        n_trials : dict
+            number of trials for each (from, to) ensemble pair with hops
+        n_accepted : dict
+            number of accepted hops for each (from, to) ensemble pair
+        """
+        self._analyze(steps, force)
+        if self.analysis == { }:
+            n_accepted = {}
+            for (i, j) in zip(*np.nonzero(self._n_accepted)):
+                hop = (self._ensembles[i], self._ensembles[j])
+                n_accepted[hop] = int(self._n_accepted[i, j])
+            # TODO: n_trials no longer needs to be a dict, but other
+            # functions expect that in output, so we return it
+            self.analysis['n_trials'] = {key: self._n_trials
+                                         for key in n_accepted.keys()}
+            self.analysis['n_accepted'] = n_accepted
         return (self.analysis['n_trials'], self.analysis['n_accepted'])
 
 
-    def analyze_traces(self, steps, force=False):
+    def analyze_traces(self, steps=None, force=False):
         """
         Calculates all the traces (fixed replica or fixed ensemble).
 
-        Populates the dictionary at self.traces.
+        Populates the dictionary at self.traces. Each trace is a list of
+        2-tuples (ensemble or replica, number of consecutive steps), as
+        given by :func:`.condense_repeats`.
         """
-        if force == False and self.traces != { }:
-            return self.traces
-        for ensemble in [s.ensemble for s in steps[0].active]:
-            self.traces[ensemble] = condense_repeats(
-                trace_replicas_for_ensemble(ensemble, steps)
-            )
-        for replica in [s.replica for s in steps[0].active]:
-            self.traces[replica] = condense_repeats(
-                trace_ensembles_for_replica(replica, steps)
-            )
+        self._analyze(steps, force)
+        if self.traces == { }:
+            replica_labels = self._traced_replicas + [None]
+            ensemble_labels = self._ensembles + [None]
+            for (i, ensemble) in enumerate(self._traced_ensembles):
+                self.traces[ensemble] = self._ensemble_runs.trace(
+                    i, replica_labels
+                )
+            for (i, replica) in enumerate(self._traced_replicas):
+                self.traces[replica] = self._replica_runs.trace(
+                    i, ensemble_labels
+                )
         return self.traces
 
 
@@ -299,7 +427,7 @@ class ReplicaNetwork(object):
         """
         traces = self.analyze_traces(steps, force)
         transitions = {}
-        for replica in [s.replica for s in steps[0].active]:
+        for replica in self._traced_replicas:
             trace = traces[replica]
             hops = [(trace[i][0], trace[i+1][0]) for i in range(len(trace)-1)]
 
@@ -342,7 +470,7 @@ class ReplicaNetwork(object):
         n_up = { ens : 0 for ens in self.ensembles }
         n_visit = { ens : 0 for ens in self.ensembles } 
         for replica in self.replicas:
-            trace = self.traces[replica]
+            trace = traces[replica]
             direction = 0
             for (loc, count) in trace:
                 if loc == top:
@@ -507,6 +635,39 @@ class ReplicaNetworkGraph(object):
         nx.draw_networkx_edges(self.graph, pos, width=self.weights)
 
 
+class _RunLengthTraces(object):
+    """
+    Run-length encoded traces of integer labels, e.g., ensemble numbers
+
+    Parameters
+    ----------
+    initial : numpy.ndarray of int
+        the first label of each trace
+    """
+    def __init__(self, initial):
+        self.current = np.array(initial, dtype=int)
+        self.length = np.ones(len(self.current), dtype=int)
+        self.labels = [array('l') for _ in self.current]
+        self.counts = [array('l') for _ in self.current]
+
+    def append(self, labels):
+        """Add the next label of each trace"""
+        changed = np.flatnonzero(labels != self.current)
+        for i in changed:
+            self.labels[i].append(self.current[i])
+            self.counts[i].append(self.length[i])
+        self.length += 1
+        self.length[changed] = 1
+        self.current = np.array(labels, dtype=int)
+
+    def trace(self, idx, objects):
+        """Condensed trace `idx` in terms of `objects[label]`"""
+        trace = [(objects[label], count) for (label, count)
+                 in zip(self.labels[idx], self.counts[idx])]
+        trace.append((objects[self.current[idx]], int(self.length[idx])))
+        return trace
+
+
 # TODO: convert these into functions that do the trace for all
 # replicas/ensembles in one loop
 def trace_ensembles_for_replica(replica, steps):
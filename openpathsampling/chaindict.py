@@ -2,6 +2,7 @@ import collections
 import numpy as np
 
 from openpathsampling.netcdfplus import LoaderProxy
+from openpathsampling import profiling
 
 __author__ = 'Jan-Hendrik Prinz'
 
@@ -69,17 +70,37 @@ class ChainDict(object):
             if len(nones) == 0:
                 return results
             else:
-                rep = list(self._post[nones])
-                self._set_list(nones, rep)
-
-                it = iter(rep)
-                return [next(it) if p[1] is None else p[1]
+                # all misses are passed on in a single call and keys that
+                # are requested more than once are only evaluated once
+                unique = self._unique(nones)
+                rep = list(self._post[unique])
+                self._set_list(unique, rep)
+
+                if len(unique) == len(nones):
+                    it = iter(rep)
+                    return [next(it) if p[1] is None else p[1]
+                            for p in zip(items, results)]
+
+                values = dict(zip(unique, rep))
+                return [values[p[0]] if p[1] is None else p[1]
                         for p in zip(items, results)]
 
         return results
 
     __call__ = __getitem__
 
+    @staticmethod
+    def _unique(items):
+        """
+        Return the list of keys without duplicates keeping the order
+
+        Keys that cannot be hashed are never considered duplicates
+        """
+        try:
+            return list(collections.OrderedDict.fromkeys(items))
+        except TypeError:
+            return items
+
     def __setitem__(self, key, value):
         if isinstance(key, collections.Iterable):
             self._set_list(key, value)
@@ -318,11 +339,12 @@ class Function(ChainDict):
         if self._eval is None:
             return None
 
-        if self.requires_lists:
-            result = self._eval([item])[0]
+        with profiling.timer('cv'):
+            if self.requires_lists:
+                result = self._eval([item])[0]
 
-        else:
-            result = self._eval(item)
+            else:
+                result = self._eval(item)
 
         if self.scalarize_numpy_singletons and result.shape[-1] == 1:
             return result.reshape(result.shape[:-1])
@@ -333,16 +355,22 @@ class Function(ChainDict):
         if self._eval is None:
             return [None] * len(items)
 
-        if self.requires_lists:
-            results = self._eval(items)
+        if len(items) == 0:
+            return []
 
+        with profiling.timer('cv'):
+            if self.requires_lists:
+                results = self._eval(items)
+            else:
+                results = [self._eval(obj) for obj in items]
+
+        if self.requires_lists:
             if self.scalarize_numpy_singletons and results.shape[-1] == 1:
                 results = results.reshape(results.shape[:-1])
 
         else:
-            results = [self._eval(obj) for obj in items]
             if self.scalarize_numpy_singletons and results[0].shape[-1] == 1:
-                results = map(lambda x: x.reshape(x.shape[:-1]), results)
+                results = [x.reshape(x.shape[:-1]) for x in results]
 
         return results
 
@@ -417,6 +445,54 @@ class ReversibleCacheChainDict(CacheChainDict):
                 return None
 
 
+class UUIDCacheChainDict(CacheChainDict):
+    """
+    Return Values from a cache keyed by the UUIDs of the given objects
+
+    Objects and their proxies share a UUID, so cached values survive the
+    garbage collection of loaded objects. Objects without a UUID are not
+    cached.
+    """
+    def __init__(self, cache, reversible=False):
+        """
+        Parameters
+        ----------
+        cache : :class:`openpathsampling.netcdfplus.cache.Cache` or dict
+            the cache to be used to store the data
+        reversible : bool
+            if `True` a snapshot and its reversed copy share a value. Both
+            are then cached under the UUID with the reversal bit cleared
+        """
+        super(UUIDCacheChainDict, self).__init__(cache)
+        self.reversible = reversible
+
+    def _key(self, item):
+        uuid = getattr(item, '__uuid__', None)
+        if uuid is not None and self.reversible:
+            uuid &= ~1
+
+        return uuid
+
+    def _contains(self, item):
+        key = self._key(item)
+        return key is not None and key in self.cache
+
+    def _get(self, item):
+        key = self._key(item)
+        if key is None:
+            return None
+
+        try:
+            return self.cache[key]
+        except KeyError:
+            return None
+
+    def _set(self, item, value):
+        key = self._key(item)
+        if key is not None and value is not None:
+            self.cache[key] = value
+
+
 class StoredDict(ChainDict):
     """
     ChainDict that has a store attached and returns existing store values
@@ -1,5 +1,5 @@
 from . import chaindict as cd
-from openpathsampling.netcdfplus import StorableNamedObject, WeakKeyCache, \
+from openpathsampling.netcdfplus import StorableNamedObject, MemoryCache, \
     ObjectJSON, create_to_dict, ObjectStore
 
 import openpathsampling.engines as peng
@@ -40,10 +40,16 @@ class CollectiveVariable(cd.Wrap, StorableNamedObject):
         an iterable. In the case of a single object. It will be wrapped in a
         list and later only the single element will be returned
     _cache_dict : :class:`openpathsampling.chaindict.ChainDict`
-        The ChainDict that will cache calculated values for fast access
+        The ChainDict that will cache calculated values for fast access. The
+        values are kept by snapshot UUID in a
+        :class:`openpathsampling.netcdfplus.MemoryCache`
 
     """
 
+    # the default memory budget of the value cache of each CV in bytes
+    default_cache_max_bytes = 64 * 1024 ** 2
+    default_cache_policy = 'lru'
+
     # do not store the settings for the disk cache. These are independent
     # and stored in the cache itself
     _excluded_attr = [
@@ -73,8 +79,11 @@ class CollectiveVariable(cd.Wrap, StorableNamedObject):
 
         self.diskcache_chunksize = ObjectStore.default_store_chunk_size
         self._single_dict = cd.ExpandSingle()
-        self._cache_dict = cd.ReversibleCacheChainDict(
-            WeakKeyCache(),
+        self._cache_dict = cd.UUIDCacheChainDict(
+            MemoryCache(
+                max_bytes=self.default_cache_max_bytes,
+                policy=self.default_cache_policy
+            ),
             reversible=cv_time_reversible
         )
         self._store_dict = None
@@ -84,6 +93,45 @@ class CollectiveVariable(cd.Wrap, StorableNamedObject):
         super(CollectiveVariable, self).__init__(
             post=self._single_dict > self._cache_dict)
 
+    def with_cache(self, max_bytes=None, policy=None):
+        """
+        Set the memory budget and eviction policy of the value cache
+
+        Parameters
+        ----------
+        max_bytes : int or None
+            the memory budget in bytes. If `None` the budget is not changed
+        policy : str or None
+            the eviction policy, either `'lru'` or `'lfu'`. If `None` the
+            policy is not changed
+
+        Returns
+        -------
+        :obj:`CollectiveVariable`
+            this CV
+        """
+        cache = self._cache_dict.cache
+        if policy is not None and policy != cache.policy:
+            new_cache = MemoryCache(cache.max_bytes, policy)
+            for key, value in cache.items():
+                new_cache[key] = value
+
+            cache = new_cache
+            self._cache_dict.cache = cache
+
+        if max_bytes is not None:
+            cache.max_bytes = max_bytes
+
+        return self
+
+    @property
+    def cache_stats(self):
+        """
+        dict : the hits, misses and evictions of the value cache, the number
+        of cached values and their estimated size in bytes
+        """
+        return self._cache_dict.cache.stats
+
     def enable_diskcache(self):
         self.diskcache_enabled = True
         return self
@@ -1,5 +1,5 @@
 from .snapshot import BaseSnapshot, SnapshotFactory, SnapshotDescriptor
-from .trajectory import Trajectory
+from .trajectory import Trajectory, PrependingTrajectory
 
 from .topology import Topology
 
@@ -11,9 +11,10 @@ import sys
 import simtk.unit as u
 
 from openpathsampling.netcdfplus import StorableNamedObject
+from openpathsampling import profiling
 
 from .snapshot import BaseSnapshot
-from .trajectory import Trajectory
+from .trajectory import Trajectory, PrependingTrajectory
 
 from .delayedinterrupt import DelayedInterrupt
 
@@ -359,12 +360,13 @@ class DynamicsEngine(StorableNamedObject):
         """
         stop = False
         if continue_conditions is not None:
-            if isinstance(continue_conditions, list):
-                for condition in continue_conditions:
-                    can_continue = condition(trajectory, trusted)
-                    stop = stop or not can_continue
-            else:
-                stop = not continue_conditions(trajectory, trusted)
+            with profiling.timer('ensemble'):
+                if isinstance(continue_conditions, list):
+                    for condition in continue_conditions:
+                        can_continue = condition(trajectory, trusted)
+                        stop = stop or not can_continue
+                else:
+                    stop = not continue_conditions(trajectory, trusted)
 
         return stop
 
@@ -503,12 +505,21 @@ class DynamicsEngine(StorableNamedObject):
                 # backward simulation needs reversed snapshots
                 self.current_snapshot = trajectory[0].reversed
 
+            # backward frames are kept in the order they are generated, so
+            # adding one does not shift the others. The continue conditions
+            # see the frames in time order without a copy; a normal
+            # trajectory is only made when one is returned.
+            if direction > 0:
+                frames = Trajectory(trajectory)
+            else:
+                frames = PrependingTrajectory(trajectory)
+
             logger.info("Starting trajectory")
             self.start()
 
             frame = 0
             # maybe we should stop before we even begin?
-            stop = self.stop_conditions(trajectory=trajectory,
+            stop = self.stop_conditions(trajectory=frames,
                                         continue_conditions=running,
                                         trusted=False)
 
@@ -520,7 +531,7 @@ class DynamicsEngine(StorableNamedObject):
                 if intervals > 0 and frame % intervals == 0:
                     # return the current status
                     logger.info("Through frame: %d", frame)
-                    yield trajectory
+                    yield self._as_trajectory(frames)
 
                 elif frame % log_rate == 0:
                     logger.info("Through frame: %d", frame)
@@ -530,7 +541,7 @@ class DynamicsEngine(StorableNamedObject):
                 snapshot = None
 
                 try:
-                    with DelayedInterrupt():
+                    with DelayedInterrupt(), profiling.timer('engine'):
                         snapshot = self.generate_next_frame()
 
                         # if self.on_nan != 'ignore' and \
@@ -559,18 +570,23 @@ class DynamicsEngine(StorableNamedObject):
                         break
 
                 frame += 1
+                profiling.count_frames()
 
                 # Store snapshot and add it to the trajectory.
                 # Stores also final frame the last time
                 if direction > 0:
-                    trajectory.append(snapshot)
+                    frames.append(snapshot)
                 elif direction < 0:
-                    trajectory.insert(0, snapshot.reversed)
+                    frames.prepend(snapshot.reversed)
 
-                if 0 < max_length < len(trajectory):
-                    # hit the max length criterion
+                if 0 < max_length < len(frames):
+                    # hit the max length criterion: drop the newest frame
                     on = self.on_max_length
-                    del trajectory[-1]
+                    if direction > 0:
+                        del frames[-1]
+                    else:
+                        del frames[0]
+                    trajectory = self._as_trajectory(frames)
 
                     if on == 'fail':
                         final_error = EngineMaxLengthError(
@@ -596,8 +612,10 @@ class DynamicsEngine(StorableNamedObject):
 
                 if stop is False:
                     # Check if we should stop. If not, continue simulation
-                    stop = self.stop_conditions(trajectory=trajectory,
-                                            continue_conditions=running)
+                    stop = self.stop_conditions(trajectory=frames,
+                                                continue_conditions=running)
+
+            trajectory = self._as_trajectory(frames)
 
             if has_nan:
                 on = self.on_nan
@@ -669,6 +687,20 @@ class DynamicsEngine(StorableNamedObject):
         self.stop(traj)
         return traj
 
+    @staticmethod
+    def _as_trajectory(frames):
+        """
+        The frames of `iter_generate` as a normal :class:`Trajectory`
+
+        Forward frames already are one and are returned as they are;
+        backward frames are copied once out of the
+        :class:`PrependingTrajectory` they are collected in.
+        """
+        if type(frames) is Trajectory:
+            return frames
+
+        return Trajectory(frames)
+
     @staticmethod
     def is_valid_snapshot(snapshot):
         """
@@ -6,6 +6,17 @@ from simtk import unit as u
 from openpathsampling.netcdfplus import StorableObject, ObjectStore, WeakLRUCache
 
 
+def _freeze(value):
+    """
+    Mark the numpy array of a value (or of a simtk quantity) as read-only
+    """
+    array = value._value if type(value) is u.Quantity else value
+    if isinstance(array, np.ndarray):
+        array.flags.writeable = False
+
+    return value
+
+
 # =============================================================================
 # SIMULATION CONFIGURATION
 # =============================================================================
@@ -59,6 +70,38 @@ class StaticContainer(StorableObject):
 
         return
 
+    @classmethod
+    def adopt(cls, coordinates, box_vectors, readonly=False):
+        """
+        Create a configuration that takes ownership of the given arrays
+
+        In contrast to the constructor the arrays are not copied, so they
+        must not be used or changed elsewhere afterwards. This is meant for
+        engines and stores that allocate new arrays for each snapshot.
+
+        Parameters
+        ----------
+        coordinates
+        box_vectors
+        readonly : bool
+            if `True` the arrays are made read-only, so that they cannot
+            be changed through any other reference either
+
+        Returns
+        -------
+        :class:`StaticContainer`
+        """
+        this = cls.__new__(cls)
+        StorableObject.__init__(this)
+        this.coordinates = coordinates
+        this.box_vectors = box_vectors
+
+        if readonly:
+            _freeze(coordinates)
+            _freeze(box_vectors)
+
+        return this
+
     # =========================================================================
     # Comparison functions
     # =========================================================================
@@ -119,7 +162,9 @@ class StaticContainerStore(ObjectStore):
         coordinates = self.vars["coordinates"][idx]
         box_vectors = self.vars["box_vectors"][idx]
 
-        configuration = StaticContainer(coordinates=coordinates, box_vectors=box_vectors)
+        # the arrays are newly read from the file, no need to copy them
+        configuration = StaticContainer.adopt(
+            coordinates=coordinates, box_vectors=box_vectors)
 
         return configuration
 
@@ -155,13 +200,18 @@ class StaticContainerStore(ObjectStore):
     def initialize(self):
         super(StaticContainerStore, self).initialize()
 
+        # the storage can ask for quantized and compressed coordinates
+        precision = getattr(self.storage, 'coordinate_precision', None)
+
         self.create_variable(
             'coordinates', 'numpy.float32',
             dimensions=('n_atoms', 'n_spatial'),
             description="coordinate of atom '{ix[1]}' in dimension " +
                         "'{ix[2]}' of configuration '{ix[0]}'.",
             chunksizes=('n_atoms', 'n_spatial'),
-            simtk_unit=u.nanometers)
+            simtk_unit=u.nanometers,
+            zlib=precision is not None,
+            least_significant_digit=precision)
 
         self.create_variable(
             'box_vectors', 'numpy.float32',
@@ -200,6 +250,35 @@ class KineticContainer(StorableObject):
 
         self.velocities = copy.deepcopy(velocities)
 
+    @classmethod
+    def adopt(cls, velocities, readonly=False):
+        """
+        Create a momentum that takes ownership of the given array
+
+        In contrast to the constructor the array is not copied, so it must
+        not be used or changed elsewhere afterwards. This is meant for
+        engines and stores that allocate new arrays for each snapshot.
+
+        Parameters
+        ----------
+        velocities
+        readonly : bool
+            if `True` the array is made read-only, so that it cannot be
+            changed through any other reference either
+
+        Returns
+        -------
+        :class:`KineticContainer`
+        """
+        this = cls.__new__(cls)
+        StorableObject.__init__(this)
+        this.velocities = velocities
+
+        if readonly:
+            _freeze(velocities)
+
+        return this
+
     # =========================================================================
     # Utility functions
     # =========================================================================
@@ -242,7 +321,8 @@ class KineticContainerStore(ObjectStore):
     def _load(self, idx):
         velocities = self.vars['velocities'][idx]
 
-        momentum = KineticContainer(velocities=velocities)
+        # the array is newly read from the file, no need to copy it
+        momentum = KineticContainer.adopt(velocities=velocities)
         return momentum
 
     def velocities_as_numpy(self, frame_indices=None, atom_indices=None):
@@ -57,6 +57,7 @@ class OpenMMEngine(DynamicsEngine):
     _default_options = {
         'n_steps_per_frame': 10,
         'n_frames_max': 5000,
+        'single_precision': False,
     }
 
     base_snapshot_type = Snapshot
@@ -94,6 +95,12 @@ class OpenMMEngine(DynamicsEngine):
                     the openmm specification for the platform to be used,
                     also 'fastest' is allowed   which will pick the currently
                     fastest one available
+                'single_precision' : bool, default: False
+                    if `True` the coordinates, velocities and box vectors of
+                    new snapshots are kept as float32 arrays, the precision
+                    they are stored with. Saves memory and the conversion
+                    when saving, but snapshots that are set back into the
+                    context are rounded to single precision
 
         Notes
         -----
@@ -162,6 +169,8 @@ class OpenMMEngine(DynamicsEngine):
                     the openmm specification for the platform to be used,
                     also 'fastest' is allowed which will pick the currently
                     fastest one available
+                'single_precision' : bool, default: False
+                    if `True` the arrays of new snapshots are float32
 
         Notes
         -----
@@ -365,18 +374,36 @@ class OpenMMEngine(DynamicsEngine):
             # return item
 
 
-    def _build_current_snapshot(self):
-        # TODO: Add caching for this and mark if changed
+    @staticmethod
+    def _as_single(quantity):
+        """Same quantity with the values as a float32 array"""
+        return u.Quantity(
+            np.asarray(quantity._value, dtype=np.float32), quantity.unit)
 
+    def _build_current_snapshot(self):
+        # positions, velocities and box vectors come from a single state.
+        # The energies are not part of a snapshot, so they are not
+        # requested; features that need them get their own state
         state = self.simulation.context.getState(getPositions=True,
-                                                 getVelocities=True,
-                                                 getEnergy=True)
+                                                 getVelocities=True)
+
+        coordinates = state.getPositions(asNumpy=True)
+        box_vectors = state.getPeriodicBoxVectors(asNumpy=True)
+        velocities = state.getVelocities(asNumpy=True)
+
+        if self.single_precision:
+            coordinates = self._as_single(coordinates)
+            box_vectors = self._as_single(box_vectors)
+            velocities = self._as_single(velocities)
 
+        # OpenMM returns new arrays for each state, so the snapshot can
+        # adopt them without another copy
         snapshot = Snapshot.construct(
-            coordinates=state.getPositions(asNumpy=True),
-            box_vectors=state.getPeriodicBoxVectors(asNumpy=True),
-            velocities=state.getVelocities(asNumpy=True),
-            engine=self
+            coordinates=coordinates,
+            box_vectors=box_vectors,
+            velocities=velocities,
+            engine=self,
+            copy=False
         )
 
         return snapshot
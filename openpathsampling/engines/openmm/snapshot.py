@@ -56,7 +56,9 @@ class Snapshot(BaseSnapshot):
             velocities=None,
             statics=None,
             kinetics=None,
-            engine=None):
+            engine=None,
+            copy=True,
+            readonly=False):
         """
         Construct a new snapshot from numpy arrays
 
@@ -83,6 +85,13 @@ class Snapshot(BaseSnapshot):
         engine : :obj:`openpathsampling.engines.DynamicsEngine`
             the engine that should be referenced as the one used to
             generate the object
+        copy : bool
+            if `True` (default) the arrays are copied. Engines that hand
+            over newly allocated arrays use `False` to let the containers
+            adopt them
+        readonly : bool
+            if `True` adopted arrays are made read-only. Only used with
+            `copy=False`
 
         Returns
         -------
@@ -90,12 +99,23 @@ class Snapshot(BaseSnapshot):
             the created `Snapshot` object
         """
         if statics is None:
-            statics = Snapshot.StaticContainer(
-                coordinates=coordinates,
-                box_vectors=box_vectors)
+            if copy:
+                statics = Snapshot.StaticContainer(
+                    coordinates=coordinates,
+                    box_vectors=box_vectors)
+            else:
+                statics = Snapshot.StaticContainer.adopt(
+                    coordinates=coordinates,
+                    box_vectors=box_vectors,
+                    readonly=readonly)
 
         if kinetics is None:
-            kinetics = Snapshot.KineticContainer(velocities=velocities)
+            if copy:
+                kinetics = Snapshot.KineticContainer(velocities=velocities)
+            else:
+                kinetics = Snapshot.KineticContainer.adopt(
+                    velocities=velocities,
+                    readonly=readonly)
 
         return Snapshot(
             engine=engine,
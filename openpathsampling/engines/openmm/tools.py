@@ -196,7 +196,7 @@ def trajectory_from_mdtraj(mdtrajectory, simple_topology=False):
     """
 
     trajectory = Trajectory()
-    empty_kinetics = Snapshot.KineticContainer(
+    empty_kinetics = Snapshot.KineticContainer.adopt(
         velocities=u.Quantity(
             np.zeros(mdtrajectory.xyz[0].shape), u.nanometer / u.picosecond)
     )
@@ -1,8 +1,49 @@
+import logging
+
 import numpy as np
 
-from openpathsampling.engines import DynamicsEngine, SnapshotDescriptor
+from openpathsampling.engines import (
+    DynamicsEngine, SnapshotDescriptor, Trajectory
+)
+from openpathsampling.engines.dynamics_engine import EngineMaxLengthError
 from .snapshot import ToySnapshot as Snapshot
 
+logger = logging.getLogger(__name__)
+
+
+class ToyBatchSystem(object):
+    """State of several independent walkers sharing one toy engine.
+
+    This exposes the same attributes as :class:`.ToyEngine` that the
+    potential energy surfaces and integrators use, but ``positions`` and
+    ``velocities`` have shape ``(n_walkers, n_dofs)``, so that one call to
+    the integrator advances all walkers at once.
+
+    Parameters
+    ----------
+    engine : :class:`.ToyEngine`
+        engine that provides the PES and the masses
+    positions : np.ndarray
+        positions of the walkers, shape ``(n_walkers, n_dofs)``
+    velocities : np.ndarray
+        velocities of the walkers, shape ``(n_walkers, n_dofs)``
+    """
+    def __init__(self, engine, positions, velocities):
+        self.pes = engine.pes
+        self.mass = engine.mass
+        self._minv = engine._minv
+        self.positions = positions
+        self.velocities = velocities
+
+    @property
+    def n_walkers(self):
+        return len(self.positions)
+
+    def select(self, mask):
+        """Keep only the walkers where ``mask`` is True"""
+        self.positions = self.positions[mask]
+        self.velocities = self.velocities[mask]
+
 
 class ToyEngine(DynamicsEngine):
     """Engine for toy models. Mostly used for 2D examples.
@@ -134,3 +175,120 @@ class ToyEngine(DynamicsEngine):
         for i in range(self.n_steps_per_frame):
             self.integ.step(sys=self)
         return self.current_snapshot
+
+    def generate_batch(self, snapshots, running=None, direction=+1):
+        """Generate one trajectory from each of several initial snapshots.
+
+        All walkers are propagated together as a single
+        ``(n_walkers, n_dofs)`` array, so each integration step evaluates
+        the PES once for the whole batch. Each walker stops independently
+        as soon as its own trajectory fails one of the ``running``
+        conditions; stopped walkers are dropped from the batch.
+
+        Parameters
+        ----------
+        snapshots : list of :class:`.ToySnapshot`
+            initial snapshots, one per walker
+        running : (list of) function(:class:`.Trajectory`)
+            callable function of a 'Trajectory' that returns True or False.
+            If one of these returns False the walker is stopped.
+        direction : -1 or +1 (DynamicsEngine.FORWARD or DynamicsEngine.BACKWARD)
+            If +1 then this will integrate forward, if -1 it will reverse
+            the momenta of the given snapshots and prepend the generated
+            snapshots with reversed momenta, as in :meth:`.generate`
+
+        Returns
+        -------
+        list of :class:`.Trajectory`
+            the generated trajectories, in the order of ``snapshots``
+
+        Notes
+        -----
+        Hitting ``n_frames_max`` stops the walker if ``on_max_length`` is
+        ``'stop'``; any other setting raises an
+        :class:`.EngineMaxLengthError`, since retries are not supported for
+        batches.
+        """
+        if direction == 0:
+            raise RuntimeError(
+                'direction must be positive (FORWARD) or negative (BACKWARD).')
+
+        try:
+            iter(running)
+        except TypeError:
+            running = [running]
+
+        if direction > 0:
+            starts = list(snapshots)
+        else:
+            starts = [snap.reversed for snap in snapshots]
+
+        for snap in starts:
+            self.check_snapshot_type(snap)
+
+        trajectories = [Trajectory([snap]) for snap in snapshots]
+        walkers = np.array([
+            not self.stop_conditions(trajectory=traj,
+                                     continue_conditions=running,
+                                     trusted=False)
+            for traj in trajectories
+        ], dtype=bool)
+        walkers = np.flatnonzero(walkers)
+
+        batch = ToyBatchSystem(
+            engine=self,
+            positions=np.array([snap.coordinates[0] for snap in starts])[
+                walkers],
+            velocities=np.array([snap.velocities[0] for snap in starts])[
+                walkers]
+        )
+
+        max_length = self.options['n_frames_max']
+        frame = 0
+        while len(walkers) > 0:
+            for i in range(self.n_steps_per_frame):
+                self.integ.step(sys=batch)
+
+            frame += 1
+            if frame % 10 == 0:
+                logger.info("Through frame: %d, %d walkers running",
+                            frame, len(walkers))
+
+            keep = np.ones(len(walkers), dtype=bool)
+            for (k, walker) in enumerate(walkers):
+                snapshot = Snapshot(
+                    coordinates=np.array([batch.positions[k]]),
+                    velocities=np.array([batch.velocities[k]]),
+                    engine=self
+                )
+                trajectory = trajectories[walker]
+                if direction > 0:
+                    trajectory.append(snapshot)
+                else:
+                    trajectory.insert(0, snapshot.reversed)
+
+                if 0 < max_length < len(trajectory):
+                    if direction > 0:
+                        del trajectory[-1]
+                    else:
+                        del trajectory[0]
+                    if self.on_max_length == 'stop':
+                        keep[k] = False
+                        continue
+                    else:
+                        raise EngineMaxLengthError(
+                            'Hit maximal length of %d frames.' % max_length,
+                            trajectory
+                        )
+
+                keep[k] = not self.stop_conditions(
+                    trajectory=trajectory,
+                    continue_conditions=running
+                )
+
+            if not keep.all():
+                walkers = walkers[keep]
+                batch.select(keep)
+
+        logger.info("Finished batch of %d trajectories", len(trajectories))
+        return trajectories
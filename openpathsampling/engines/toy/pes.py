@@ -8,6 +8,11 @@ from openpathsampling.netcdfplus import StorableObject
 
 class PES(StorableObject):
     """Abstract base class for toy potential energy surfaces.
+
+    Energies and derivatives are computed from ``sys.positions``, which is
+    either a single configuration of shape ``(n_dofs,)`` or a batch of
+    walkers with shape ``(n_walkers, n_dofs)``. Implementations should
+    broadcast over the leading axis so both cases work.
     """
     # For now, we only support additive combinations; maybe someday that can
     # include multiplication, too
@@ -31,7 +36,7 @@ class PES(StorableObject):
         """
         v = sys.velocities
         m = sys.mass
-        return 0.5*np.dot(m, np.multiply(v,v))
+        return 0.5*np.dot(np.multiply(v, v), m)
 
 class PES_Combination(PES):
     """Mathematical combination of two potential energy surfaces.
@@ -154,7 +159,7 @@ class HarmonicOscillator(PES):
         """
         dx = sys.positions - self.x0
         k = self.omega*self.omega*sys.mass
-        return 0.5*np.dot(self.A * k, dx * dx)
+        return 0.5*np.dot(dx * dx, self.A * k)
 
     def dVdx(self, sys):
         """Derivative of potential energy (-force)
@@ -190,7 +195,6 @@ class Gaussian(PES):
         self.A = A
         self.alpha = np.array(alpha)
         self.x0 = np.array(x0)
-        self._local_dVdx = np.zeros(self.x0.size)
 
     def V(self, sys):
         """Potential energy
@@ -206,7 +210,7 @@ class Gaussian(PES):
             the potential energy
         """
         dx = sys.positions - self.x0
-        return self.A*np.exp(-np.dot(self.alpha, np.multiply(dx, dx)))
+        return self.A*np.exp(-np.dot(np.multiply(dx, dx), self.alpha))
 
     def dVdx(self, sys):
         """Derivative of potential energy (-force)
@@ -222,10 +226,8 @@ class Gaussian(PES):
             the derivatives of the potential at this point
         """
         dx = sys.positions - self.x0
-        exp_part = self.A*np.exp(-np.dot(self.alpha, np.multiply(dx, dx)))
-        for i in range(len(dx)):
-            self._local_dVdx[i] = -2*self.alpha[i]*dx[i]*exp_part
-        return self._local_dVdx
+        exp_part = self.A*np.exp(-np.dot(np.multiply(dx, dx), self.alpha))
+        return -2*self.alpha*dx*np.expand_dims(exp_part, -1)
 
 class OuterWalls(PES):
     """Creates an x**6 barrier around the system.
@@ -243,7 +245,6 @@ class OuterWalls(PES):
         super(OuterWalls, self).__init__()
         self.sigma = np.array(sigma)
         self.x0 = np.array(x0)
-        self._local_dVdx = np.zeros(self.x0.size)
 
     def V(self, sys):
         """Potential energy
@@ -259,10 +260,7 @@ class OuterWalls(PES):
             the potential energy
         """
         dx = sys.positions - self.x0
-        myV = 0.0
-        for i in range(len(dx)):
-            myV += self.sigma[i]*dx[i]**6
-        return myV
+        return np.dot(dx**6, self.sigma)
 
     def dVdx(self, sys):
         """Derivative of potential energy (-force)
@@ -278,9 +276,7 @@ class OuterWalls(PES):
             the derivatives of the potential at this point
         """
         dx = sys.positions - self.x0
-        for i in range(len(dx)):
-            self._local_dVdx[i] = 6.0*self.sigma[i]*dx[i]**5
-        return self._local_dVdx
+        return 6.0*self.sigma*dx**5
 
 class LinearSlope(PES):
     """Linear potential energy surface.  V(x) = \sum_i m_i * x_i + c
@@ -312,7 +308,7 @@ class LinearSlope(PES):
         float
             the potential energy
         """
-        return np.dot(self.m, sys.positions) + self.c
+        return np.dot(sys.positions, self.m) + self.c
 
     def dVdx(self, sys):
         """Derivative of potential energy (-force)
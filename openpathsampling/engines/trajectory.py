@@ -7,7 +7,7 @@ import numpy as np
 import mdtraj as md
 import simtk.unit as u
 
-from openpathsampling.netcdfplus import StorableObject
+from openpathsampling.netcdfplus import StorableObject, LoaderProxy
 import openpathsampling as paths
 
 # ==============================================================================
@@ -38,13 +38,13 @@ class Trajectory(list, StorableObject):
         StorableObject.__init__(self)
 
         if trajectory is not None:
-            if type(trajectory) is Trajectory:
+            if isinstance(trajectory, Trajectory):
                 self.extend(trajectory.iter_proxies())
             else:
                 self.extend(trajectory)
 
     def extend(self, iterable):
-        if type(iterable) is Trajectory:
+        if isinstance(iterable, Trajectory):
             list.extend(self, iterable.iter_proxies())
         else:
             list.extend(self, iterable)
@@ -78,7 +78,7 @@ class Trajectory(list, StorableObject):
 
         if allow_fast:
             try:
-                return [fnc(frame) for frame in list.__iter__(self)]
+                return [fnc(frame) for frame in self.iter_proxies()]
             except:
                 pass
 
@@ -133,37 +133,44 @@ class Trajectory(list, StorableObject):
                 first = getattr(self[0], item)
                 if type(first) is u.Quantity:
                     inner = first._value
-                    if type(inner) is np.ndarray:
+                    if isinstance(inner, np.ndarray):
                         dtype = inner.dtype
+                        stored = self._stored_feature(item)
+                        if stored is not None:
+                            # a writable copy like the one built below
+                            return stored.astype(dtype) * first.unit
 
                         out = np.empty(tuple([len(self)] +
                                              list(inner.shape)), dtype=dtype)
 
-                        for idx, s in enumerate(list.__iter__(self)):
+                        for idx, s in enumerate(self.iter_proxies()):
                             np.copyto(out[idx], getattr(s, item)._value)
 
                         return out * first.unit
                     else:
                         out = [None] * len(self)
 
-                        for idx, s in enumerate(list.__iter__(self)):
+                        for idx, s in enumerate(self.iter_proxies()):
                             out[idx] = getattr(s, item)
 
                         return out
-                elif type(first) is np.ndarray:
+                elif isinstance(first, np.ndarray):
                     dtype = first.dtype
+                    stored = self._stored_feature(item)
+                    if stored is not None:
+                        return stored.astype(dtype)
 
                     out = np.empty(tuple([len(self)] +
                                          list(first.shape)), dtype=dtype)
 
-                    for idx, s in enumerate(list.__iter__(self)):
+                    for idx, s in enumerate(self.iter_proxies()):
                         np.copyto(out[idx], getattr(s, item))
 
                     return out
                 else:
                     out = [None] * len(self)
 
-                    for idx, s in enumerate(list.__iter__(self)):
+                    for idx, s in enumerate(self.iter_proxies()):
                         out[idx] = getattr(s, item)
 
                     return out
@@ -183,6 +190,46 @@ class Trajectory(list, StorableObject):
         else:
             return []
 
+    def _stored_feature(self, item):
+        """
+        Read a numpy feature of all frames directly from the storage
+
+        Returns
+        -------
+        numpy.ndarray or None
+            read-only array without units. `None` if not all frames are
+            proxies into the same snapshot store, if all of them are already
+            loaded (then the values are taken from memory) or if the store
+            cannot read the feature in bulk.
+        """
+        frames = self.as_proxies()
+        if type(frames[0]) is not LoaderProxy:
+            return None
+
+        store = frames[0]._store
+        if not hasattr(store, 'feature_as_numpy'):
+            return None
+
+        if all(type(frame) is LoaderProxy and frame._subject is not None
+               and frame._subject() is not None for frame in frames):
+            return None
+
+        # the index can grow while a StorageWriter saves in the background
+        with store.storage.lock:
+            indices = []
+            for frame in frames:
+                if type(frame) is not LoaderProxy or \
+                        frame._store is not store:
+                    return None
+
+                idx = store.index.get(frame.__uuid__)
+                if idx is None or idx < 0:
+                    return None
+
+                indices.append(idx)
+
+            return store.feature_as_numpy(item, indices)
+
     # ==========================================================================
     # LIST INHERITANCE FUNCTIONS
     # ==========================================================================
@@ -356,32 +403,29 @@ class Trajectory(list, StorableObject):
         list of tuple
             format is (label, number_of_frames)
         """
-        last_vol = None
-        count = 0
+        if len(self) == 0:
+            return [(None, 0)]
+
+        labels = list(label_dict.keys())
+        # one pass over the trajectory per volume instead of per frame
+        in_state = np.array(
+            [label_dict[label].mask(self) for label in labels], dtype=bool
+        ).reshape(len(labels), len(self))
+        if np.any(in_state.sum(axis=0) > 1):
+            raise RuntimeError(
+                "Volumes given to summarize_by_volumes not disjoint")
+
+        state_idx = np.where(in_state.any(axis=0), in_state.argmax(axis=0), -1)
+        changes = np.flatnonzero(state_idx[1:] != state_idx[:-1]) + 1
+        starts = [0] + changes.tolist()
+        ends = changes.tolist() + [len(self)]
+
         segment_labels = []
-        # list.__iter__ for speed
-        for frame in list.__iter__(self):
-            in_state = []
-            for key in label_dict.keys():
-                vol = label_dict[key]
-                if vol(frame):
-                    in_state.append(key)
-            if len(in_state) > 1:
-                raise RuntimeError(
-                    "Volumes given to summarize_by_volumes not disjoint")
-            if len(in_state) == 0:
-                current_vol = None
-            else:
-                current_vol = in_state[0]
+        for start, end in zip(starts, ends):
+            idx = state_idx[start]
+            current_vol = labels[idx] if idx >= 0 else None
+            segment_labels.append((current_vol, end - start))
 
-            if last_vol == current_vol:
-                count += 1
-            else:
-                if count > 0:
-                    segment_labels.append( (last_vol, count) )
-                last_vol = current_vol
-                count = 1
-        segment_labels.append( (last_vol, count) )
         return segment_labels
 
     def summarize_by_volumes_str(self, label_dict, delimiter="-"):
@@ -531,7 +575,11 @@ class Trajectory(list, StorableObject):
         if topology is None:
             topology = self.topology.mdtraj
 
-        output = self.xyz
+        # read the coordinates, which can be done in bulk for stored
+        # trajectories, instead of the derived `xyz`
+        output = self.coordinates
+        if type(output) is u.Quantity:
+            output = output._value
 
         traj = md.Trajectory(output, topology)
         traj.unitcell_vectors = self.box_vectors
@@ -578,3 +626,167 @@ class Trajectory(list, StorableObject):
             return paths.Trajectory([trajectories])
 
         return trajectories
+
+
+class PrependingTrajectory(Trajectory):
+    """
+    Trajectory that can grow at the front in constant time per frame
+
+    The frames are kept in reversed time order in the underlying list, so
+    that :meth:`prepend` is a list append. Indexing, iteration, comparison
+    and the list methods all work in time order like for a
+    :class:`Trajectory`; slices are returned as normal trajectories.
+
+    Useful for code that builds a trajectory backward in time and needs the
+    time-ordered trajectory after every new frame. Convert it with
+    `Trajectory(traj)` before it is stored.
+    """
+
+    def __init__(self, trajectory=None):
+        list.__init__(self)
+        StorableObject.__init__(self)
+
+        if trajectory is not None:
+            if isinstance(trajectory, Trajectory):
+                trajectory = trajectory.as_proxies()
+            else:
+                trajectory = list(trajectory)
+
+            list.extend(self, reversed(trajectory))
+
+    def __repr__(self):
+        return 'PrependingTrajectory[' + str(len(self)) + ']'
+
+    def _list_index(self, index):
+        # position of the frame `index` in the underlying list
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError('trajectory index out of range')
+
+        return length - 1 - index
+
+    def prepend(self, snapshot):
+        """
+        Add a frame before the first frame
+
+        Parameters
+        ----------
+        snapshot : :class:`openpathsampling.engines.BaseSnapshot`
+        """
+        list.append(self, snapshot)
+
+    def append(self, snapshot):
+        list.insert(self, 0, snapshot)
+
+    def extend(self, iterable):
+        if isinstance(iterable, Trajectory):
+            iterable = iterable.as_proxies()
+        else:
+            iterable = list(iterable)
+
+        list.__setitem__(self, slice(0, 0), reversed(iterable))
+
+    def insert(self, index, snapshot):
+        length = len(self)
+        if index < 0:
+            index = max(index + length, 0)
+        index = min(index, length)
+        list.insert(self, length - index, snapshot)
+
+    def pop(self, index=-1):
+        return list.pop(self, self._list_index(index))
+
+    def remove(self, value):
+        del self[self.index(value)]
+
+    def index(self, value, start=0, stop=None):
+        for idx in range(*slice(start, stop).indices(len(self))):
+            if self.get_as_proxy(idx) == value:
+                return idx
+
+        raise ValueError('%r is not in trajectory' % value)
+
+    def reverse(self):
+        list.reverse(self)
+
+    def sort(self, *args, **kwargs):
+        raise TypeError('PrependingTrajectory cannot be sorted')
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Trajectory([
+                self.get_as_proxy(i)
+                for i in range(*index.indices(len(self)))
+            ])
+        elif hasattr(index, '__iter__'):
+            return Trajectory([self.get_as_proxy(i) for i in index])
+
+        ret = self.get_as_proxy(index)
+        if hasattr(ret, '_idx'):
+            ret = ret.__subject__
+
+        return ret
+
+    def __getslice__(self, i, j):
+        return self.__getitem__(slice(i, j))
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            frames = self.as_proxies()
+            frames[index] = value
+            list.__setitem__(self, slice(None), reversed(frames))
+        else:
+            list.__setitem__(self, self._list_index(index), value)
+
+    def __setslice__(self, i, j, value):
+        self.__setitem__(slice(i, j), value)
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            frames = self.as_proxies()
+            del frames[index]
+            list.__setitem__(self, slice(None), reversed(frames))
+        else:
+            list.__delitem__(self, self._list_index(index))
+
+    def __delslice__(self, i, j):
+        self.__delitem__(slice(i, j))
+
+    def get_as_proxy(self, item):
+        return list.__getitem__(self, self._list_index(item))
+
+    def iter_proxies(self):
+        return list.__reversed__(self)
+
+    def __eq__(self, other):
+        if isinstance(other, Trajectory):
+            other = other.as_proxies()
+        if not isinstance(other, list):
+            return NotImplemented
+
+        return self.as_proxies() == other
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+
+        return not result
+
+    def __hash__(self):
+        if len(self) == 0:
+            return hash(tuple())
+        else:
+            return hash(
+                (self.get_as_proxy(0), len(self), self.get_as_proxy(-1)))
+
+    def __add__(self, other):
+        t = Trajectory(self)
+        t.extend(other)
+        return t
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
@@ -7,6 +7,7 @@ Created on 03.09.2014
 import abc
 import logging
 import itertools
+import numpy as np
 
 from openpathsampling.netcdfplus import StorableNamedObject
 import openpathsampling as paths
@@ -58,6 +59,8 @@ class EnsembleCache(object):
     ----------
         start_frame : :class:`openpathsampling.snapshot.Snapshot`
         prev_last_frame : :class:`openpathsampling.snapshot.Snapshot`
+        prev_last_index : int
+            index of `prev_last_frame` in the last checked trajectory
         direction : +1 or -1
         contents : dictionary
     """
@@ -65,6 +68,7 @@ class EnsembleCache(object):
     def __init__(self, direction=None):
         self.start_frame = None
         self.prev_last_frame = None
+        self.prev_last_index = None
         self.last_length = None
         self.direction = direction
         self.contents = {}
@@ -174,8 +178,10 @@ class EnsembleCache(object):
         # other things as well
         if self.direction > 0:
             self.prev_last_frame = trajectory.get_as_proxy(-1)
+            self.prev_last_index = len(trajectory) - 1
         elif self.direction < 0:
             self.prev_last_frame = trajectory.get_as_proxy(0)
+            self.prev_last_index = 0
         else:
             self.bad_direction_error()
 
@@ -1524,6 +1530,53 @@ class SequentialEnsemble(Ensemble):
                 slice(subtraj_first, subtraj_final)
         logger.debug("Cache assignments: " + str(cache.contents['assignments']))
 
+    @staticmethod
+    def cached_subtraj(cache, ens_num, subtraj_from):
+        """Subtrajectory of a segment, kept in the given cache.
+
+        The subtrajectory is extended in place by `_find_subtraj_final` or
+        `_find_subtraj_first`, so that a segment which grows by one frame
+        per call does not have to be sliced again from the trajectory. The
+        cache keeps the two most recently used segments: the current one,
+        and the next one that is tried before a premature promotion.
+
+        Parameters
+        ----------
+        cache : `EnsembleCache`
+            the cache that keeps the subtrajectory
+        ens_num : integer
+            ensemble the segment is assigned to
+        subtraj_from : integer
+            the "start" frame of the segment, see `update_cache`. For
+            reverse-direction caches, this is counted from the end of the
+            trajectory.
+
+        Returns
+        -------
+        :class:`.Trajectory`
+            the subtrajectory last used with the same `ens_num` and
+            `subtraj_from`, or a new, empty trajectory (a
+            :class:`.PrependingTrajectory` for reverse-direction caches).
+            The cache contents are reset whenever the trajectory is not
+            trusted, so the frames in it are always from the current
+            trajectory.
+        """
+        key = (ens_num, subtraj_from)
+        subtrajs = cache.contents.setdefault('subtrajs', [])
+        for (idx, (subtraj_key, subtraj)) in enumerate(subtrajs):
+            if subtraj_key == key:
+                del subtrajs[idx]
+                break
+        else:
+            if cache.direction < 0:
+                subtraj = paths.engines.PrependingTrajectory()
+            else:
+                subtraj = paths.Trajectory()
+
+        subtrajs.append((key, subtraj))
+        del subtrajs[:-2]
+        return subtraj
+
     def transition_frames(self, trajectory, trusted=None):
         # it is easiest to understand this decision tree as a simplified
         # version of the can_append decision tree; see that for detailed
@@ -1592,11 +1645,20 @@ class SequentialEnsemble(Ensemble):
         return True
 
     def _find_subtraj_final(self, traj, subtraj_first, ens_num,
-                            last_checked=None):
+                            last_checked=None, subtraj=None):
         """
         Find the longest subtrajectory of trajectory which starts at
         subtraj_first and satifies self.ensembles[ens_num].can_append
 
+        Parameters
+        ----------
+        subtraj : :class:`.Trajectory` or None
+            trajectory that holds the first frames of the subtrajectory
+            starting at subtraj_first, e.g. as left by a previous call. It
+            is trimmed and extended in place, so that a growing segment is
+            not sliced again for every new frame. If None, a new trajectory
+            is used.
+
         Returns
         -------
         int
@@ -1609,7 +1671,14 @@ class SequentialEnsemble(Ensemble):
             subtraj_final = max(last_checked, subtraj_first)
         traj_final = len(traj)
         ens = self.ensembles[ens_num]
-        subtraj = traj[slice(subtraj_first, subtraj_final + 1)]
+        if subtraj is None:
+            subtraj = paths.Trajectory()
+        subtraj_stop = min(subtraj_final + 1, traj_final)
+        del subtraj[max(subtraj_stop - subtraj_first, 0):]
+        subtraj.extend(
+            traj.get_as_proxy(idx)
+            for idx in range(subtraj_first + len(subtraj), subtraj_stop)
+        )
         # if we're in the ensemble or could eventually be in the ensemble,
         # we keep building the subtrajectory
 
@@ -1625,21 +1694,47 @@ class SequentialEnsemble(Ensemble):
                 ens(subtraj, trusted=True)
                ) and subtraj_final < traj_final):
             subtraj_final += 1
-            # TODO: replace with append; probably faster
-            subtraj = traj[slice(subtraj_first, subtraj_final + 1)]
+            if subtraj_final < traj_final:
+                subtraj.append(traj.get_as_proxy(subtraj_final))
             logger.debug(" Traj slice " + str(subtraj_first) + " " +
                          str(subtraj_final + 1) + " / " + str(traj_final))
         return subtraj_final
 
     def _find_subtraj_first(self, traj, subtraj_final, ens_num,
-                            last_checked=None):
+                            last_checked=None, subtraj=None):
+        """
+        Find the longest subtrajectory of trajectory which ends before
+        subtraj_final and satifies self.ensembles[ens_num].can_prepend
+
+        Parameters
+        ----------
+        subtraj : :class:`.PrependingTrajectory` or None
+            trajectory that holds the last frames of the subtrajectory
+            ending before subtraj_final, e.g. as left by a previous call. It
+            is trimmed and extended at the front in place. If None, a new
+            trajectory is used.
+
+        Returns
+        -------
+        int
+            Frame of traj which is the first frame for a subtraj ending
+            before subtraj_final and satisfying
+            self.ensembles.can_prepend[ens_num]
+        """
         if last_checked is None:
             subtraj_first = subtraj_final - 1
         else:
             subtraj_first = min(last_checked, subtraj_final - 1)
         traj_first = 0
         ens = self.ensembles[ens_num]
-        subtraj = traj[slice(subtraj_first, subtraj_final)]
+        if subtraj is None:
+            subtraj = paths.engines.PrependingTrajectory()
+        subtraj_start = max(subtraj_first, traj_first)
+        while len(subtraj) > max(subtraj_final - subtraj_start, 0):
+            subtraj.pop(0)
+        for idx in range(subtraj_final - len(subtraj) - 1,
+                         subtraj_start - 1, -1):
+            subtraj.prepend(traj.get_as_proxy(idx))
         logger.debug("*Traj slice " + str(subtraj_first) + " " +
                      str(subtraj_final) + " / " + str(len(traj)))
         # logger.debug("Ensemble " + str(ens.__class__.__name__))# + str(ens))
@@ -1649,7 +1744,8 @@ class SequentialEnsemble(Ensemble):
                 ens.check_reverse(subtraj, trusted=True)
                ) and subtraj_first >= traj_first):
             subtraj_first -= 1
-            subtraj = traj[slice(subtraj_first, subtraj_final)]
+            if subtraj_first >= traj_first:
+                subtraj.prepend(traj.get_as_proxy(subtraj_first))
             logger.debug(" Traj slice " + str(subtraj_first + 1) + " " +
                          str(subtraj_final) + " / " + str(len(traj)))
         return subtraj_first + 1
@@ -1703,7 +1799,7 @@ class SequentialEnsemble(Ensemble):
         if cache.trusted:
             logger.debug("Cache contents: " + str(cache.contents))
             logger.debug("cache.prev_last_frame: " +
-                         str(trajectory.index(cache.prev_last_frame)))
+                         str(cache.prev_last_index))
         for i in range(len(self.ensembles)):
             ens = self.ensembles[i]
             logger.debug("Ensemble " + str(i) + " : " + ens.__class__.__name__)
@@ -1714,12 +1810,16 @@ class SequentialEnsemble(Ensemble):
                 offset = 0
                 # if cache.last_length == len(trajectory):
                 # offset += 1
-                last_checked = trajectory.index(cache.prev_last_frame) - offset
+                last_checked = cache.prev_last_index - offset
             else:
                 last_checked = None
             logger.debug("last_checked = " + str(last_checked))
+            if self._use_cache:
+                subtraj = self.cached_subtraj(cache, ens_num, subtraj_first)
+            else:
+                subtraj = None
             subtraj_final = self._find_subtraj_final(
-                trajectory, subtraj_first, ens_num, last_checked
+                trajectory, subtraj_first, ens_num, last_checked, subtraj
             )
             cache.last_length = subtraj_final
             logger.debug(
@@ -1727,7 +1827,9 @@ class SequentialEnsemble(Ensemble):
                 "(" + str(subtraj_first) + "," + str(subtraj_final) + ")"
             )
             if subtraj_final - subtraj_first > 0:
-                subtraj = trajectory[slice(subtraj_first, subtraj_final)]
+                if (subtraj is None or
+                        len(subtraj) != subtraj_final - subtraj_first):
+                    subtraj = trajectory[slice(subtraj_first, subtraj_final)]
                 if ens_num == final_ens:
                     if subtraj_final == traj_final:
                         # we're in the last ensemble and the whole
@@ -1868,7 +1970,7 @@ class SequentialEnsemble(Ensemble):
         if cache.trusted:
             logger.debug("Cache contents: " + str(cache.contents))
             logger.debug("cache.prev_start_frame: " +
-                         str(trajectory.index(cache.start_frame)))
+                         str(len(trajectory) - 1))
         for i in range(len(self.ensembles)):
             logger.debug(
                 "Ensemble " + str(i) +
@@ -1879,11 +1981,16 @@ class SequentialEnsemble(Ensemble):
             if self._use_cache and cache.trusted:
                 # offset = 1
                 offset = 0
-                last_checked = trajectory.index(cache.prev_last_frame) + offset
+                last_checked = cache.prev_last_index + offset
             else:
                 last_checked = None
+            if self._use_cache:
+                subtraj = self.cached_subtraj(
+                    cache, ens_num, subtraj_final - len(trajectory))
+            else:
+                subtraj = None
             subtraj_first = self._find_subtraj_first(
-                trajectory, subtraj_final, ens_num, last_checked)
+                trajectory, subtraj_final, ens_num, last_checked, subtraj)
             cache.last_length = len(trajectory) - subtraj_first
 
             assign_final = subtraj_final - len(trajectory)
@@ -1894,7 +2001,9 @@ class SequentialEnsemble(Ensemble):
                 "(" + str(subtraj_first) + "," + str(subtraj_final) + ")"
             )
             if subtraj_final - subtraj_first > 0:
-                subtraj = trajectory[slice(subtraj_first, subtraj_final)]
+                if (subtraj is None or
+                        len(subtraj) != subtraj_final - subtraj_first):
+                    subtraj = trajectory[slice(subtraj_first, subtraj_final)]
                 if ens_num == first_ens:
                     if subtraj_first == traj_first:
                         logger.debug("Returning can_prepend")
@@ -2170,10 +2279,7 @@ class AllInXEnsemble(VolumeEnsemble):
         else:
             logger.debug("Untrusted VolumeEnsemble " + repr(self))
             # logger.debug("Trajectory " + repr(trajectory))
-            for frame in trajectory.as_proxies():
-                if not self._volume(frame):
-                    return False
-            return True
+            return bool(self._volume.mask(trajectory).all())
 
     def check_reverse(self, trajectory, trusted=False):
         # order in this one only matters if it is trusted
@@ -2226,10 +2332,7 @@ class PartInXEnsemble(VolumeEnsemble):
         trajectory : :class:`openpathsampling.trajectory.Trajectory`
             The trajectory to be checked
         """
-        for frame in trajectory.as_proxies():
-            if self._volume(frame):
-                return True
-        return False
+        return bool(self._volume.mask(trajectory).any())
 
     def __invert__(self):
         return AllOutXEnsemble(self.volume, self.trusted)
@@ -2251,12 +2354,6 @@ class PartOutXEnsemble(PartInXEnsemble):
     def __invert__(self):
         return AllInXEnsemble(self.volume, self.trusted)
 
-    def __call__(self, trajectory, trusted=None, candidate=False):
-        for frame in trajectory.as_proxies():
-            if self._volume(frame):
-                return True
-        return False
-
 
 class ExitsXEnsemble(VolumeEnsemble):
     """
@@ -2275,14 +2372,8 @@ class ExitsXEnsemble(VolumeEnsemble):
         return domain + result
 
     def __call__(self, trajectory, trusted=None, candidate=False):
-        subtraj = trajectory
-        for i in range(len(subtraj) - 1):
-            frame_i = subtraj.get_as_proxy(i)
-            if self._volume(frame_i):
-                frame_iplus = subtraj.get_as_proxy(i + 1)
-                if not self._volume(frame_iplus):
-                    return True
-        return False
+        in_volume = self._volume.mask(trajectory)
+        return bool(np.any(in_volume[:-1] & ~in_volume[1:]))
 
 
 class EntersXEnsemble(ExitsXEnsemble):
@@ -2298,14 +2389,8 @@ class EntersXEnsemble(ExitsXEnsemble):
         return domain + result
 
     def __call__(self, trajectory, trusted=None, candidate=False):
-        subtraj = trajectory
-        for i in range(len(subtraj) - 1):
-            frame_i = subtraj.get_as_proxy(i)
-            if not self._volume(frame_i):
-                frame_iplus = subtraj.get_as_proxy(i + 1)
-                if self._volume(frame_iplus):
-                    return True
-        return False
+        in_volume = self._volume.mask(trajectory)
+        return bool(np.any(~in_volume[:-1] & in_volume[1:]))
 
 
 class WrappedEnsemble(Ensemble):
@@ -6,6 +6,7 @@ import pandas as pd
 
 import openpathsampling as paths
 from openpathsampling.netcdfplus import StorableNamedObject
+from openpathsampling.high_level.transition import all_transitions_statistics
 
 from functools import reduce  # not built-in for py3
 
@@ -359,6 +360,26 @@ class TISNetwork(TransitionNetwork):
 
         return None
 
+    def _shared_statistics(self, transitions, steps, force=False):
+        """
+        Run the statistics of several transitions in one pass over `steps`
+
+        Only transitions without statistics are included, unless `force`.
+        The `hist_args` of this network are used where the transitions do
+        not set their own.
+        """
+        for trans in transitions:
+            # set up the hist_args if necessary
+            for histname in self.hist_args.keys():
+                trans_hist = trans.ensemble_histogram_info[histname]
+                if trans_hist.hist_args == {}:
+                    trans_hist.hist_args = self.hist_args[histname]
+
+        run_transitions = [trans for trans in transitions
+                           if force or trans._missing_statistics()]
+        if run_transitions:
+            all_transitions_statistics(run_transitions, steps, force=True)
+
 
 #def msouter_state_switching(mstis, steps):
 
@@ -551,16 +572,11 @@ class MSTISNetwork(TISNetwork):
         # 1. Calculate the flux and the TCP
         names = [s.name for s in self.states]
         self._rate_matrix = pd.DataFrame(columns=names, index=names)
+        self._shared_statistics(list(self.from_state.values()), steps,
+                                force)
         for stateA in self.from_state.keys():
             transition = self.from_state[stateA]
-            # set up the hist_args if necessary
-            for histname in self.hist_args.keys():
-                trans_hist = transition.ensemble_histogram_info[histname]
-                if trans_hist.hist_args == {}:
-                    trans_hist.hist_args = self.hist_args[histname]
-
-            transition.total_crossing_probability(steps=steps,
-                                                  force=force)
+            transition.total_crossing_probability(steps=steps)
             transition.minus_move_flux(steps=steps, force=force)
             for stateB in self.from_state.keys():
                 if stateA != stateB:
@@ -811,14 +827,10 @@ class MISTISNetwork(TISNetwork):
         final_names = [s.name for s in self.final_states]
         self._rate_matrix = pd.DataFrame(columns=final_names,
                                          index=initial_names)
+        self._shared_statistics(list(self.transitions.values()), steps,
+                                force)
         for trans in self.transitions.values():
-            # set up the hist_args if necessary
-            for histname in self.hist_args.keys():
-                trans_hist = trans.ensemble_histogram_info[histname]
-                if trans_hist.hist_args == {}:
-                    trans_hist.hist_args = self.hist_args[histname]
-            tcp = trans.total_crossing_probability(steps=steps,
-                                                   force=force)
+            tcp = trans.total_crossing_probability(steps=steps)
             if trans._flux is None:
                 logger.warning("No flux for transition " + str(trans.name)
                                + ": Rate will be NaN")
@@ -236,6 +236,13 @@ class TISTransition(Transition):
         ensemble: Ensemble
         samples : iterator over samples
         """
+        statistics = _TransitionStatistics(self, [ensemble], force)
+        for sample in samples:
+            statistics.add_sample(sample)
+        statistics.histogram(weights)
+
+    def _histograms_to_run(self, ensembles, force):
+        """Set up new histograms for `ensembles`; return their names"""
         # figure out which histograms need to updated for this ensemble
         run_it = []
         if not force:
@@ -251,45 +258,25 @@ class TISTransition(Transition):
 
             if hist not in self.histograms.keys():
                 self.histograms[hist] = {}
-            self.histograms[hist][ensemble] = Histogram(**(hist_info.hist_args))
-
-        in_ens_samples = (s for s in samples if s.ensemble is ensemble)
-        hist_data = {}
-        buflen = -1
-        sample_buf = []
-        prev_sample = {h: None for h in run_it}
-        prev_result = {h: None for h in run_it}
-        for sample in in_ens_samples:
-            for hist in run_it:
-                if sample is prev_sample[hist]:
-                    hist_data_sample = prev_result[hist]
-                else:
-                    hist_info = self.ensemble_histogram_info[hist]
-                    hist_data_sample = hist_info.f(sample,
-                                                   **hist_info.f_args)
-                prev_result[hist] = hist_data_sample
-                prev_sample[hist] = sample
-                try:
-                    hist_data[hist].append(hist_data_sample)
-                except KeyError:
-                    hist_data[hist] = [hist_data_sample]
-
+            for ensemble in ensembles:
+                self.histograms[hist][ensemble] = Histogram(
+                    **(hist_info.hist_args)
+                )
 
-        for hist in run_it:
-            self.histograms[hist][ensemble].histogram(hist_data[hist], weights)
-            self.histograms[hist][ensemble].name = (hist + " " + self.name
-                                                    + " " + ensemble.name)
+        return run_it
 
+    def _missing_statistics(self):
+        """True if the statistics of any ensemble have not been run"""
+        max_lambda = self.histograms.get('max_lambda', {})
+        return any(ens not in max_lambda for ens in self.ensembles)
 
     def all_statistics(self, steps, weights=None, force=False):
         """
         Run all statistics for all ensembles.
+
+        All samples are read in a single pass over the steps.
         """
-        # TODO: speed this up by just running over all samples once and
-        # dealing them out to the appropriate histograms
-        for ens in self.ensembles:
-            samples = sampleset_sample_generator(steps)
-            self.ensemble_statistics(ens, samples, weights, force)
+        all_transitions_statistics([self], steps, weights, force)
 
     def pathlength_histogram(self, ensemble):
         """
@@ -323,13 +310,7 @@ class TISTransition(Transition):
         """
 
         if method == "wham":
-            run_ensembles = False
-            for ens in self.ensembles:
-                try:
-                    hist = self.histograms['max_lambda'][ens]
-                except KeyError:
-                    run_ensembles = True
-            if run_ensembles or force:
+            if self._missing_statistics() or force:
                 if steps is None:
                     raise RuntimeError("Unable to build histograms without steps source")
                 self.all_statistics(steps, force=True)
@@ -535,3 +516,100 @@ class TISTransition(Transition):
         flux = 1.0 / (t_in_avg + t_out_avg) / engine_dt
         self._flux = flux
         return self._flux
+
+
+class _TransitionStatistics(object):
+    """
+    Collect the histogram data of some ensembles of a transition
+
+    Samples are dealt out to the ensembles with :meth:`.add_sample`;
+    :meth:`.histogram` fills the histograms of the transition.
+
+    Parameters
+    ----------
+    transition : :class:`.TISTransition`
+    ensembles : list of :class:`.Ensemble`
+        the ensembles of `transition` to collect data for
+    force : bool
+        if True, the histograms are recalculated
+    """
+    def __init__(self, transition, ensembles, force):
+        self.transition = transition
+        self.ensembles = {ens: ens for ens in ensembles}
+        self.run_it = transition._histograms_to_run(ensembles, force)
+        self.hist_data = {hist: {} for hist in self.run_it}
+        # samples repeat in consecutive steps; reuse their results
+        self._prev_sample = {}
+        self._prev_result = {}
+
+    def add_sample(self, sample):
+        """Add the data of a sample, if it is in one of the ensembles"""
+        ensemble = self.ensembles.get(sample.ensemble)
+        if ensemble is None or ensemble is not sample.ensemble:
+            return
+
+        for hist in self.run_it:
+            key = (hist, ensemble)
+            if sample is self._prev_sample.get(key):
+                hist_data_sample = self._prev_result[key]
+            else:
+                hist_info = self.transition.ensemble_histogram_info[hist]
+                hist_data_sample = hist_info.f(sample, **hist_info.f_args)
+            self._prev_result[key] = hist_data_sample
+            self._prev_sample[key] = sample
+            try:
+                self.hist_data[hist][ensemble].append(hist_data_sample)
+            except KeyError:
+                self.hist_data[hist][ensemble] = [hist_data_sample]
+
+    def histogram(self, weights=None):
+        """Fill the histograms of the transition with the collected data"""
+        transition = self.transition
+        for hist in self.run_it:
+            for ensemble in self.ensembles:
+                histogram = transition.histograms[hist][ensemble]
+                data = self.hist_data[hist].get(ensemble, [])
+                if not data and histogram.left_bin_edges is None:
+                    # without a bin range, the bins are set from the data
+                    logger.warning(
+                        "No samples in ensemble %s; skipping its %s "
+                        "histogram", ensemble.name, hist
+                    )
+                    del transition.histograms[hist][ensemble]
+                    continue
+
+                # with a bin range, ensembles without samples get empty
+                # histograms
+                histogram.histogram(data, weights)
+                histogram.name = (
+                    hist + " " + transition.name + " " + ensemble.name
+                )
+
+
+def all_transitions_statistics(transitions, steps, weights=None,
+                               force=False):
+    """
+    Run all statistics for all ensembles of several TIS transitions
+
+    All samples are read in a single pass over the steps and dealt out to
+    the histograms of the ensembles of all transitions.
+
+    Parameters
+    ----------
+    transitions : list of :class:`.TISTransition`
+    steps : iterable of :class:`.MCStep`
+        steps to be analyzed
+    weights : list of float or None
+        weights for the histograms
+    force : bool (False)
+        if True, the histograms are recalculated
+    """
+    all_statistics = [_TransitionStatistics(transition,
+                                            transition.ensembles, force)
+                      for transition in transitions]
+    for sample in sampleset_sample_generator(steps):
+        for statistics in all_statistics:
+            statistics.add_sample(sample)
+
+    for statistics in all_statistics:
+        statistics.histogram(weights)
@@ -60,6 +60,27 @@ class MoveChange(TreeMixin, StorableObject):
 
         self.details = details
 
+    def to_dict(self):
+        return {
+            'mover': self.mover,
+            'samples': self.samples,
+            'input_samples': self.input_samples,
+            'subchanges': self.subchanges,
+            'details': self.details
+        }
+
+    @classmethod
+    def from_dict(cls, dct):
+        # same as `MoveChangeStore._load`: subclasses differ in their
+        # __init__ signatures, but the stored content is always the same
+        obj = cls.__new__(cls)
+        MoveChange.__init__(obj, mover=dct['mover'])
+        obj.samples = dct['samples']
+        obj.input_samples = dct['input_samples']
+        obj.subchanges = dct['subchanges']
+        obj.details = dct['details']
+        return obj
+
     def __getattr__(self, item):
         # try to get attributes from details dict
         try:
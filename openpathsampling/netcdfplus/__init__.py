@@ -1,6 +1,6 @@
 from .base import StorableNamedObject, StorableObject, create_to_dict
 from .cache import WeakKeyCache, WeakLRUCache, WeakValueCache, MaxCache, \
-    NoCache, Cache, LRUCache, LRUChunkLoadingCache
+    NoCache, Cache, LRUCache, LRUChunkLoadingCache, MemoryCache
 from .dictify import ObjectJSON, StorableObjectJSON, UUIDObjectJSON
 from .netcdfplus import NetCDFPlus
 
@@ -11,4 +11,4 @@ from .stores import DictStore, ImmutableDictStore
 from .stores import NamedObjectStore, UniqueNamedObjectStore
 
 from .proxy import DelayedLoader, lazy_loading_attributes, LoaderProxy
-from .util import with_timing_logging
+from .util import with_timing_logging, synchronized
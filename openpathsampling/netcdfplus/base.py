@@ -38,6 +38,23 @@ class StorableObject(object):
         StorableObject.ACTIVE_LONG += 2
         return StorableObject.ACTIVE_LONG
 
+    @staticmethod
+    def renew_instance_uuid():
+        """
+        Start a new range of UUIDs for objects created from now on
+
+        A forked process inherits the UUID counter of its parent, so both
+        would create objects with the same UUIDs. Calling this in the child
+        process avoids these collisions.
+        """
+        StorableObject.INSTANCE_UUID = list(uuid.uuid1().fields[:-1])
+        StorableObject.ACTIVE_LONG = int(uuid.UUID(
+            fields=tuple(
+                StorableObject.INSTANCE_UUID +
+                [StorableObject.CREATION_COUNT]
+            )
+        ))
+
     def reverse_uuid(self):
         return self.__uuid__ ^ 1
 
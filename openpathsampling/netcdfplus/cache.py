@@ -1,4 +1,8 @@
 from collections import OrderedDict
+import heapq
+import itertools
+import sys
+import threading
 import weakref
 
 __author__ = 'Jan-Hendrik Prinz'
@@ -207,6 +211,255 @@ class LRUCache(Cache):
         return len(self._cache)
 
 
+class MemoryCache(Cache):
+    """
+    A cache with a memory budget in bytes and statistics of its use
+
+    If adding a value exceeds the budget, values are evicted either least
+    recently used (`'lru'`) or least frequently used (`'lfu'`) first. Ties
+    in `'lfu'` mode are broken by evicting the least recently used one.
+
+    Each lookup by `cache[key]` is counted as a hit or a miss. Lookups using
+    `in`, `get_silent` or iteration are not counted.
+
+    The cache can be used from several threads, e.g. by a simulation and a
+    `StorageWriter` that saves its results. Iteration runs over a copy of
+    the keys.
+
+    Attributes
+    ----------
+    hits : int
+        the number of successful lookups
+    misses : int
+        the number of failed lookups
+    evictions : int
+        the number of values removed to stay within the budget
+    nbytes : int
+        the estimated memory used by the cached values
+    """
+
+    policies = ['lru', 'lfu']
+
+    def __init__(self, max_bytes=None, policy='lru', sizeof=None):
+        """
+        Parameters
+        ----------
+        max_bytes : int or None
+            the memory budget in bytes. `None` (default) means unbounded
+        policy : str
+            the eviction policy, either `'lru'` (default) or `'lfu'`
+        sizeof : callable or None
+            a function that returns the size in bytes of a value. If `None`
+            (default) the size is estimated using :meth:`estimate_size`
+        """
+        super(MemoryCache, self).__init__()
+        if policy not in self.policies:
+            raise ValueError(
+                "policy must be one of %s" % ', '.join(self.policies))
+
+        self._max_bytes = max_bytes
+        self.policy = policy
+        self.sizeof = sizeof if sizeof is not None else self.estimate_size
+
+        # key -> (value, size) in order of last use
+        self._cache = OrderedDict()
+        # lfu only: key -> use count and a heap of (count, tick, key)
+        # entries; entries with an outdated count are skipped when popped
+        self._uses = {}
+        self._heap = []
+        self._tick = itertools.count()
+
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # a lookup reorders the entries, so even reads have to be exclusive
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def estimate_size(value):
+        """
+        Estimate the memory used by a value in bytes
+
+        Numpy arrays are counted by their data buffer, simtk quantities by
+        their value and lists and tuples by their elements.
+
+        Parameters
+        ----------
+        value : object
+
+        Returns
+        -------
+        int
+        """
+        if hasattr(value, 'nbytes'):
+            return int(value.nbytes) + sys.getsizeof(None)
+
+        if hasattr(value, 'unit') and hasattr(value, '_value'):
+            return MemoryCache.estimate_size(value._value)
+
+        size = sys.getsizeof(value)
+        if type(value) in (list, tuple):
+            size += sum(map(MemoryCache.estimate_size, value))
+
+        return size
+
+    @property
+    def count(self):
+        return len(self._cache), 0
+
+    @property
+    def size(self):
+        return -1, 0
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, new_max):
+        with self._lock:
+            self._max_bytes = new_max
+            self._check_size_limit()
+
+    @property
+    def stats(self):
+        """
+        dict : the numbers of hits, misses and evictions, the number of
+        cached values and their size in bytes
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'count': len(self._cache),
+            'nbytes': self.nbytes,
+            'max_bytes': self._max_bytes
+        }
+
+    def reset_stats(self):
+        """
+        Set the counters of hits, misses and evictions to zero
+        """
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _use(self, key):
+        if self.policy == 'lfu':
+            uses = self._uses[key] + 1
+            self._uses[key] = uses
+            heapq.heappush(self._heap, (uses, next(self._tick), key))
+            if len(self._heap) > 2 * len(self._uses) + 64:
+                self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        # keys are in the order of last use, so the ticks keep lru ties
+        self._heap = [
+            (self._uses[key], next(self._tick), key) for key in self._cache]
+        heapq.heapify(self._heap)
+
+    def __getitem__(self, item):
+        with self._lock:
+            try:
+                entry = self._cache.pop(item)
+            except KeyError:
+                self.misses += 1
+                raise
+
+            self._cache[item] = entry
+            self._use(item)
+            self.hits += 1
+            return entry[0]
+
+    def get_silent(self, item):
+        with self._lock:
+            try:
+                return self._cache[item][0]
+            except KeyError:
+                return None
+
+    def __setitem__(self, key, value, **kwargs):
+        size = self.sizeof(value)
+        with self._lock:
+            if self._max_bytes is not None and size > self._max_bytes:
+                # would evict everything and still not fit
+                self._remove(key)
+                return
+
+            if key in self._cache:
+                self.nbytes -= self._cache.pop(key)[1]
+            else:
+                self._uses[key] = 0
+
+            self._cache[key] = (value, size)
+            self.nbytes += size
+            self._use(key)
+            self._check_size_limit()
+
+    def _remove(self, key):
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[1]
+            self._uses.pop(key, None)
+
+    def _pop_victim(self):
+        if self.policy == 'lru':
+            return next(iter(self._cache))
+
+        while True:
+            uses, tick, key = heapq.heappop(self._heap)
+            if self._uses.get(key) == uses:
+                return key
+
+    def _check_size_limit(self):
+        if self._max_bytes is None:
+            return
+
+        while self.nbytes > self._max_bytes and self._cache:
+            self._remove(self._pop_victim())
+            self.evictions += 1
+
+    def __delitem__(self, key):
+        with self._lock:
+            if key not in self._cache:
+                raise KeyError(key)
+
+            self._remove(key)
+
+    def __contains__(self, item):
+        return item in self._cache
+
+    def keys(self):
+        with self._lock:
+            return list(self._cache.keys())
+
+    def values(self):
+        with self._lock:
+            return [entry[0] for entry in self._cache.values()]
+
+    def items(self):
+        with self._lock:
+            return [(key, entry[0]) for key, entry in self._cache.items()]
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._uses.clear()
+            self._heap = []
+            self.nbytes = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __reversed__(self):
+        return reversed(self.keys())
+
+
 class WeakLRUCache(Cache):
     """
     Implements a cache that keeps weak references to all elements
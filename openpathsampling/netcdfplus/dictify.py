@@ -223,7 +223,7 @@ class ObjectJSON(object):
 
             elif '_numpy' in obj:
                 return np.frombuffer(
-                    base64.decodestring(obj['_data']),
+                    base64.b64decode(obj['_data']),
                     dtype=np.dtype(obj['_dtype'])).reshape(
                         self.build(obj['_numpy'])
                 )
@@ -637,6 +637,10 @@ class CachedUUIDObjectJSON(ObjectJSON):
             if hasattr(obj, 'to_dict') and hasattr(obj, '__uuid__'):
                 # the object knows how to dismantle itself into a json string
                 if obj.__uuid__ not in self.uuid_cache:
+                    if hasattr(obj, '_idx'):
+                        # a proxy to a stored object; send the object itself
+                        obj = obj.__subject__
+
                     self.uuid_cache[obj.__uuid__] = obj
 
                     return {
@@ -652,7 +656,7 @@ class CachedUUIDObjectJSON(ObjectJSON):
     def build(self, jsn):
         if type(jsn) is dict:
             if '_obj_uuid' in jsn:
-                uuid = UUID(jsn['_obj_uuid'])
+                uuid = int(UUID(jsn['_obj_uuid']))
                 if uuid in self.uuid_cache:
                     return self.uuid_cache[uuid]
                 elif '_cls' in jsn and '_dict' in jsn:
@@ -675,8 +679,9 @@ class CachedUUIDObjectJSON(ObjectJSON):
                     return obj
                 else:
                     # this should not happen!
-                    raise ('What happend here. JSN `%s`' % jsn)
-                    pass
+                    raise RuntimeError(
+                        'Referenced object `%s` is not known.' %
+                        jsn['_obj_uuid'])
 
         return super(CachedUUIDObjectJSON, self).build(jsn)
 
@@ -686,6 +691,40 @@ class CachedUUIDObjectJSON(ObjectJSON):
         self.uuid_cache.clear()
         return super(CachedUUIDObjectJSON, self).to_json(obj, base_type)
 
+    def to_json_cached(self, obj, base_type=''):
+        """
+        Convert to json, but only reference objects that are already cached
+
+        Use this if the other end is known to have the cached objects, e.g.
+        after a call to `reset_cache` with objects both sides share.
+        """
+        return super(CachedUUIDObjectJSON, self).to_json(obj, base_type)
+
+    def reset_cache(self, known=None):
+        """
+        Clear the cache, but keep a set of known objects
+
+        Parameters
+        ----------
+        known : dict of int : :class:`StorableObject` or None
+            objects (by uuid) that the other end also knows, usually the
+            result of a previous call to `known_objects`
+        """
+        self.uuid_cache.clear()
+        if known is not None:
+            self.uuid_cache.update(known)
+
+    def known_objects(self):
+        """
+        Return all objects currently in the cache
+
+        Returns
+        -------
+        dict of int : :class:`StorableObject`
+            a dict keeping (strong) references to all cached objects
+        """
+        return dict(self.uuid_cache)
+
     # def from_json(self, json_string):
     #     # here we keep the cache. It could happen that an object is sent in
     #     # full, but we still have it and so we do not have to rebuild it which
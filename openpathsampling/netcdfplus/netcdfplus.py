@@ -5,6 +5,7 @@ author
 import abc
 import logging
 import os.path
+import threading
 from collections import OrderedDict
 from uuid import UUID
 
@@ -403,6 +404,10 @@ class NetCDFPlus(netCDF4.Dataset):
         self.vars = dict()
         self.units = dict()
 
+        # serializes the access to the file and the caches of the stores
+        # if several threads use the storage, e.g. a `StorageWriter`
+        self.lock = threading.RLock()
+
     def create_store(self, name, store, register_attr=True):
         """
         Create a special variable type `obj.name` that can hold storable objects
@@ -1008,7 +1013,9 @@ class NetCDFPlus(netCDF4.Dataset):
                         description=None,
                         chunksizes=None,
                         simtk_unit=None,
-                        maskable=False):
+                        maskable=False,
+                        zlib=False,
+                        least_significant_digit=None):
         """
         Create a new variable in the netCDF storage.
 
@@ -1052,6 +1059,14 @@ class NetCDFPlus(netCDF4.Dataset):
             exist and if they have not yet been written they are filled with
             a fill_value which is treated as a non-set variable. The created
             variable will interpret this values as `None` when returned
+        zlib : bool, default: False
+            if `True` the data is compressed with zlib. Not supported for
+            variable length variables
+        least_significant_digit : int or None
+            if not `None` the data is quantized before it is stored, so that
+            it is precise to `10**-least_significant_digit`. This makes the
+            data compress much better. Only for float variables in
+            combination with `zlib`
         """
 
         ncfile = self
@@ -1110,6 +1125,7 @@ class NetCDFPlus(netCDF4.Dataset):
         else:
             ncvar = ncfile.createVariable(
                 var_name, nc_type, dimensions, chunksizes=chunksizes,
+                zlib=zlib, least_significant_digit=least_significant_digit
             )
 
         setattr(ncvar, 'var_type', var_type)
@@ -1,4 +1,5 @@
 from .named import NamedObjectStore
+from openpathsampling.netcdfplus.util import synchronized
 
 from future.utils import iterkeys
 
@@ -18,6 +19,7 @@ class DictStore(NamedObjectStore):
     def to_dict(self):
         return {}
 
+    @synchronized
     def load(self, idx):
         """
         Returns an object from the storage.
@@ -99,6 +101,7 @@ class DictStore(NamedObjectStore):
     def restore(self):
         self.update_name_cache()
 
+    @synchronized
     def save(self, obj, idx=None):
         """
         Saves an object to the storage.
@@ -160,6 +163,7 @@ class DictStore(NamedObjectStore):
         for name in self:
             yield name, self[name]
 
+    @synchronized
     def get(self, idx, default=None):
         try:
             return self.load(idx)
@@ -169,6 +173,7 @@ class DictStore(NamedObjectStore):
 
 class ImmutableDictStore(DictStore):
 
+    @synchronized
     def save(self, obj, idx=None):
         """
         Saves an object to the storage.
@@ -1,4 +1,5 @@
 from .object import ObjectStore
+from openpathsampling.netcdfplus.util import synchronized
 
 import logging
 
@@ -18,6 +19,7 @@ class IndexedObjectStore(ObjectStore):
     # LOAD/SAVE DECORATORS FOR CACHE HANDLING
     # ==========================================================================
 
+    @synchronized
     def load(self, idx):
         """
         Returns an object from the storage.
@@ -58,6 +60,7 @@ class IndexedObjectStore(ObjectStore):
     # def create_uuid_index(self):
     #     return dict()
 
+    @synchronized
     def save(self, obj, idx=None):
         """
         Saves an object to the storage.
@@ -1,4 +1,5 @@
 from openpathsampling.netcdfplus.base import StorableNamedObject
+from openpathsampling.netcdfplus.util import synchronized
 
 from .object import ObjectStore
 
@@ -182,6 +183,7 @@ class NamedObjectStore(ObjectStore):
     # LOAD/SAVE DECORATORS FOR CACHE HANDLING
     # ==========================================================================
 
+    @synchronized
     def load(self, idx):
         """
         Returns an object from the storage.
@@ -305,6 +307,7 @@ class NamedObjectStore(ObjectStore):
 
         return obj
 
+    @synchronized
     def save(self, obj, idx=None):
         """
         Saves an object to the storage.
@@ -422,6 +425,7 @@ class UniqueNamedObjectStore(NamedObjectStore):
 
         return name in self.name_idx or name in self._free_name
 
+    @synchronized
     def save(self, obj, idx=None):
         """
         Saves an object to the storage.
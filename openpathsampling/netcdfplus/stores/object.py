@@ -1,11 +1,14 @@
 import logging
-# from uuid import UUID
+from uuid import UUID
 from weakref import WeakValueDictionary
 
+import numpy as np
+
 from openpathsampling.netcdfplus.base import StorableNamedObject, StorableObject
 from openpathsampling.netcdfplus.cache import MaxCache, Cache, NoCache, \
     WeakLRUCache
 from openpathsampling.netcdfplus.proxy import LoaderProxy
+from openpathsampling.netcdfplus.util import synchronized
 
 import sys
 if sys.version_info > (3, ):
@@ -59,6 +62,329 @@ class HashedList(dict):
         return self._list
 
 
+class UUIDColumn(object):
+    """
+    Sorted, array-backed lookup of the UUIDs stored in a netcdf variable
+
+    The UUID strings are read in chunks when the first lookup is made and
+    kept as two 64 bit integer arrays together with their sort order.
+    Lookups use bisection. UUIDs that appear more than once resolve to their
+    last position, as in :class:`HashedList`.
+    """
+
+    # number of UUIDs read from the file at once
+    chunksize = 1024 * 1024
+
+    # positions of the hex digits in the string representation of a UUID
+    _hex_columns = np.array(
+        list(range(0, 8)) + list(range(9, 13)) + list(range(14, 18)) +
+        list(range(19, 23)) + list(range(24, 36)))
+
+    # maps ascii codes to hex digit values; everything else is invalid (16)
+    _hex_table = np.full(256, 16, dtype=np.uint64)
+    _hex_table[np.frombuffer(b'0123456789', dtype=np.uint8)] = np.arange(10)
+    _hex_table[np.frombuffer(b'abcdef', dtype=np.uint8)] = np.arange(10, 16)
+    _hex_table[np.frombuffer(b'ABCDEF', dtype=np.uint8)] = np.arange(10, 16)
+
+    _mask64 = (1 << 64) - 1
+
+    def __init__(self, variable):
+        """
+        Parameters
+        ----------
+        variable : `netCDF4.Variable`
+            the variable holding the UUID strings
+        """
+        self.variable = variable
+        self._length = len(variable)
+        self._hi = None
+        self._lo = None
+        self._valid = None
+        self._order = None
+        self._sorted_hi = None
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def is_loaded(self):
+        return self._order is not None
+
+    @classmethod
+    def parse(cls, uuids):
+        """
+        Convert UUID strings into the upper and lower 64 bits of the UUIDs
+
+        Parameters
+        ----------
+        uuids : iterable of str
+            UUID strings in the canonical 36 character format
+
+        Returns
+        -------
+        hi : numpy.ndarray of uint64
+        lo : numpy.ndarray of uint64
+        valid : numpy.ndarray of bool
+            `False` for strings that are no UUID, e.g. placeholders for
+            `None`
+        """
+        raw = np.asarray(uuids, dtype='S36')
+        chars = raw.view(np.uint8).reshape(len(raw), 36)
+        digits = cls._hex_table[chars[:, cls._hex_columns]]
+
+        valid = (digits < 16).all(axis=1)
+
+        hi = np.zeros(len(raw), dtype=np.uint64)
+        lo = np.zeros(len(raw), dtype=np.uint64)
+        for col in range(16):
+            hi = (hi << np.uint64(4)) | digits[:, col]
+            lo = (lo << np.uint64(4)) | digits[:, col + 16]
+
+        return hi, lo, valid
+
+    def _load(self):
+        n = self._length
+        hi = np.zeros(n, dtype=np.uint64)
+        lo = np.zeros(n, dtype=np.uint64)
+        valid = np.zeros(n, dtype=bool)
+        for start in range(0, n, self.chunksize):
+            stop = min(start + self.chunksize, n)
+            hi[start:stop], lo[start:stop], valid[start:stop] = \
+                self.parse(self.variable[start:stop])
+
+        # a stable sort keeps duplicates in the order of their position
+        order = np.lexsort((lo, hi))
+        order = order[valid[order]]
+
+        self._hi = hi
+        self._lo = lo
+        self._valid = valid
+        self._order = order
+        self._sorted_hi = hi[order]
+
+    def find(self, uuid):
+        """
+        Return the position of a UUID
+
+        Parameters
+        ----------
+        uuid : int
+
+        Returns
+        -------
+        int or None
+            the last position of `uuid` or `None` if it is not present
+        """
+        if not isinstance(uuid, (int, long)) or uuid < 0:
+            return None
+
+        if self._order is None:
+            self._load()
+
+        hi = np.uint64(uuid >> 64)
+        lo = np.uint64(uuid & self._mask64)
+
+        left = np.searchsorted(self._sorted_hi, hi, side='left')
+        right = np.searchsorted(self._sorted_hi, hi, side='right')
+        candidates = self._order[left:right]
+        matches = candidates[self._lo[candidates] == lo]
+        if len(matches) == 0:
+            return None
+
+        return int(matches[-1])
+
+    def uuid(self, pos):
+        """
+        Return the UUID at a position
+
+        Parameters
+        ----------
+        pos : int
+
+        Returns
+        -------
+        int or None
+            `None` if no UUID is stored at `pos`
+        """
+        if self._order is not None:
+            if not self._valid[pos]:
+                return None
+
+            return (int(self._hi[pos]) << 64) | int(self._lo[pos])
+
+        uuid = self.variable[pos]
+        if uuid[0] == '-':
+            return None
+
+        return int(UUID(uuid))
+
+    def uuids(self):
+        """
+        Return all UUIDs in the order of their position
+
+        Returns
+        -------
+        list of int or None
+            `None` for positions without a UUID
+        """
+        if self._order is None:
+            self._load()
+
+        return [(int(hi) << 64) | int(lo) if valid else None
+                for hi, lo, valid in zip(self._hi, self._lo, self._valid)]
+
+
+class LazyHashedList(object):
+    """
+    An index of UUIDs like :class:`HashedList` that reads a file lazily
+
+    UUIDs that are already in the file are looked up in a
+    :class:`UUIDColumn`, which is only built once it is needed. All later
+    changes are kept in a dictionary on top of it. Opening a file is
+    therefore fast and only the stores that are actually used pay for
+    reading their UUIDs.
+    """
+    def __init__(self):
+        self._column = None
+        self._n_column = 0
+        # changes on top of the column: key -> value, keys in deleted are
+        # hidden in the column, appended keys and changed positions
+        self._dict = {}
+        self._deleted = set()
+        self._tail = []
+        self._changed = {}
+
+    def attach(self, variable):
+        """
+        Use the UUIDs stored in a netcdf variable as initial content
+
+        Parameters
+        ----------
+        variable : `netCDF4.Variable`
+            the variable holding the UUID strings
+        """
+        self.clear()
+        self._column = UUIDColumn(variable)
+        self._n_column = len(self._column)
+
+    def _lookup(self, key):
+        try:
+            return self._dict[key]
+        except KeyError:
+            pass
+
+        if self._column is None or key in self._deleted:
+            return None
+
+        return self._column.find(key)
+
+    def __len__(self):
+        return self._n_column + len(self._tail)
+
+    def __contains__(self, key):
+        return self._lookup(key) is not None
+
+    def __getitem__(self, key):
+        value = self._lookup(key)
+        if value is None:
+            raise KeyError(key)
+
+        return value
+
+    def get(self, key, d=None):
+        value = self._lookup(key)
+        if value is None:
+            return d
+
+        return value
+
+    def append(self, key):
+        self._dict[key] = len(self)
+        self._tail.append(key)
+
+    def extend(self, t):
+        for key in t:
+            self.append(key)
+
+    def __setitem__(self, key, value):
+        self._dict[key] = value
+        self._set_position(value, key)
+
+    def _set_position(self, pos, key):
+        if pos < self._n_column:
+            self._changed[pos] = key
+        else:
+            self._tail[pos - self._n_column] = key
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+
+        self._dict.pop(key, None)
+        if self._column is not None:
+            self._deleted.add(key)
+
+    def index(self, key):
+        if key >= self._n_column:
+            return self._tail[key - self._n_column]
+
+        try:
+            return self._changed[key]
+        except KeyError:
+            return self._column.uuid(key)
+
+    def mark(self, key):
+        if key not in self:
+            self._dict[key] = -2
+
+    def unmark(self, key):
+        if key in self:
+            del self[key]
+
+    def clear(self):
+        self._column = None
+        self._n_column = 0
+        self._dict = {}
+        self._deleted = set()
+        self._tail = []
+        self._changed = {}
+
+    def _column_items(self):
+        if self._column is None:
+            return []
+
+        return [(key, pos) for pos, key in enumerate(self._column.uuids())
+                if key is not None]
+
+    def items(self):
+        dct = dict(self._column_items())
+        for key in self._deleted:
+            dct.pop(key, None)
+
+        dct.update(self._dict)
+        return list(dct.items())
+
+    def keys(self):
+        return [key for key, value in self.items()]
+
+    def values(self):
+        return [value for key, value in self.items()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    @property
+    def list(self):
+        if self._column is None:
+            column = []
+        else:
+            column = self._column.uuids()
+            for pos, key in self._changed.items():
+                column[pos] = key
+
+        return column + self._tail
+
+
 class ObjectStore(StorableNamedObject):
     """
     Base Class for storing complex objects in a netCDF4 file. It holds a
@@ -229,14 +555,14 @@ class ObjectStore(StorableNamedObject):
         self.index = self.create_uuid_index()
 
     def create_uuid_index(self):
-        return HashedList()
+        return LazyHashedList()
 
     def restore(self):
         self.load_indices()
 
     def load_indices(self):
-        self.index.clear()
-        self.index.extend(self.vars['uuid'][:])
+        # the stored UUIDs are only read once the index is used
+        self.index.attach(self.variables['uuid'])
 
     @property
     def storage(self):
@@ -326,7 +652,7 @@ class ObjectStore(StorableNamedObject):
         Add iteration over all elements in the storage
         """
         # we want to iterator in the order object were saved!
-        for uuid in self.index._list:
+        for uuid in self.index.list:
             yield self.load(uuid)
 
     def __len__(self):
@@ -569,7 +895,9 @@ class ObjectStore(StorableNamedObject):
             chunksizes=None,
             description=None,
             simtk_unit=None,
-            maskable=False
+            maskable=False,
+            zlib=False,
+            least_significant_digit=None
     ):
         """
         Create a new variable in the netCDF storage. This is just a helper
@@ -612,6 +940,11 @@ class ObjectStore(StorableNamedObject):
             exist and if they have not yet been written they are filled with
             a fill_value which is treated as a non-set variable. The created
             variable will interpret this values as `None` when returned
+        zlib : bool, default: False
+            if `True` the data is compressed with zlib
+        least_significant_digit : int or None
+            if not `None` float data is quantized to a precision of
+            `10**-least_significant_digit` before it is compressed
         """
 
         # add the main dimension to the var_type
@@ -664,7 +997,9 @@ class ObjectStore(StorableNamedObject):
             chunksizes=chunksizes,
             description=description,
             simtk_unit=simtk_unit,
-            maskable=maskable
+            maskable=maskable,
+            zlib=zlib,
+            least_significant_digit=least_significant_digit
         )
 
     @property
@@ -696,6 +1031,7 @@ class ObjectStore(StorableNamedObject):
     # LOAD/SAVE DECORATORS FOR CACHE HANDLING
     # ==========================================================================
 
+    @synchronized
     def load(self, idx):
         """
         Returns an object from the storage.
@@ -820,6 +1156,7 @@ class ObjectStore(StorableNamedObject):
 
         self.index.unmark(obj.__uuid__)
 
+    @synchronized
     def save(self, obj, idx=None):
         """
         Saves an object to the storage.
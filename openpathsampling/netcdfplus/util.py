@@ -1,3 +1,4 @@
+import functools
 from time import time as tt
 import logging
 
@@ -18,3 +19,19 @@ def with_timing_logging(func):
         return _wrapped
     else:
         return func
+
+
+def synchronized(func):
+    """
+    Run a method of a store while holding the lock of its storage
+
+    The lock serializes the access of several threads to the file and to
+    the caches of the stores, see `NetCDFPlus.lock`. It is reentrant, so
+    synchronized methods can call each other.
+    """
+    @functools.wraps(func)
+    def _locked(self, *args, **kwargs):
+        with self.storage.lock:
+            return func(self, *args, **kwargs)
+
+    return _locked
@@ -88,6 +88,79 @@ class SparseHistogram(object):
         """
         return tuple(np.floor((data - self.left_bin_edges) / self.bin_widths))
 
+    def map_to_bins_array(self, data):
+        """Bins of many data points at once
+
+        Parameters
+        ----------
+        data : list or list of list or np.array
+            input data; one data point (scalar or vector) per entry
+
+        Returns
+        -------
+        np.array :
+            the bins as floats (integer-valued), shape (n_points, n_dims)
+        """
+        data = np.asarray(data, dtype=float).reshape(len(data), -1)
+        return np.floor((data - self.left_bin_edges) / self.bin_widths)
+
+    @staticmethod
+    def _bin_counts(bins, weights):
+        """Sum the weights for each distinct bin
+
+        Parameters
+        ----------
+        bins : np.array
+            bins of the data points, see :meth:`.map_to_bins_array`
+        weights : np.array
+            weight of each data point
+
+        Returns
+        -------
+        collections.Counter :
+            total weight for each bin (as tuple of floats) that has one
+        """
+        finite = np.isfinite(bins).all()
+        if finite:
+            # hash each bin to a single integer within the span of the data
+            int_bins = bins.astype(np.int64)
+            min_bins = int_bins.min(axis=0)
+            spans = int_bins.max(axis=0) - min_bins + 1
+            n_keys = np.prod(spans.astype(float))
+            if n_keys < 2**52 and np.abs(bins).max() < 2**52:
+                flat = np.ravel_multi_index(tuple((int_bins - min_bins).T),
+                                            tuple(spans))
+                if n_keys <= max(4 * len(flat), 1024):
+                    # dense: count all bins in the span
+                    counts = np.bincount(flat, weights=weights,
+                                         minlength=int(n_keys))
+                    # empty bins (zero total) are dropped when adding
+                    # Counters anyway
+                    occupied = np.flatnonzero(counts)
+                    totals = counts[occupied]
+                else:
+                    occupied, inverse = np.unique(flat, return_inverse=True)
+                    totals = np.bincount(inverse, weights=weights,
+                                         minlength=len(occupied))
+                keys = (np.array(np.unravel_index(occupied, tuple(spans))).T
+                        + min_bins).astype(float)
+                return collections.Counter(
+                    dict(zip(map(tuple, keys.tolist()), totals.tolist()))
+                )
+
+            keys, inverse = np.unique(bins, axis=0, return_inverse=True)
+            totals = np.bincount(inverse.reshape(-1), weights=weights,
+                                 minlength=len(keys))
+            return collections.Counter(
+                dict(zip(map(tuple, keys.tolist()), totals.tolist()))
+            )
+
+        # infinite or NaN bins can not be sorted reliably
+        counter = collections.Counter()
+        for (key, w) in zip(map(tuple, bins.tolist()), weights.tolist()):
+            counter[key] += w
+        return counter
+
     def add_data_to_histogram(self, data, weights=None):
         """Adds data to the internal histogram counter.
 
@@ -107,14 +180,15 @@ class SparseHistogram(object):
         if self._histogram is None:
             return self.histogram(data, weights)
         if weights is None:
-            weights = [1.0]*len(data)
-
-        part_hist = sum((collections.Counter({self.map_to_bins(d) : w})
-                         for (d, w) in zip (data, weights)),
-                        collections.Counter({}))
+            weights = np.ones(len(data))
+        else:
+            weights = np.asarray(weights, dtype=float)
 
-        self._histogram += part_hist
-        self.count += len(data) if weights is None else sum(weights)
+        if len(data) > 0:
+            bins = self.map_to_bins_array(data)
+            # adding a Counter keeps only positive totals, as before
+            self._histogram += self._bin_counts(bins, weights)
+            self.count += float(weights.sum())
         return self._histogram.copy()
 
     @staticmethod
@@ -7,26 +7,60 @@ Typically, you use these tools in 3 steps:
 2. Create a function that maps a list of input data into the desired output
    DataFrame
 3. Create a ResamplingStatistics object using the `input` from step 1 and
-   the `function` from step 2.
+   the `function` from step 2. With `n_workers`, the function is evaluated
+   on a pool of worker processes.
 """
 
 import numpy as np
 import itertools
+import multiprocessing
 import pandas as pd
 
 import logging
 logger = logging.getLogger(__name__)
 
-# NOTE: there may be a better way to do this, by converting the results to
-# numpy arrays and using the numpy functions. However, you'd have to be very
-# careful that the rows and columns still correspond to the same things,
-# i.e., that there's no permutation of index order. Using pandas protects us
-# from such problems. Alternatively, it may be possible to bunch these into
-# a pandas.Panel, and use pandas functions. All requires some performance
-# testing; the advantange of the approach below is that when we want both
-# mean and std, the mean can be calculated first and passed to the std to
-# speed it up. (However, performance probably won't matter much for the
-# things we'll be doing).
+# NOTE: DataFrames are converted to a single numpy array for the
+# statistics. Each DataFrame is reindexed to the same row and column labels
+# first, so that there's no permutation of index order; the labels are
+# combined the same way pandas does when adding the DataFrames. Other
+# objects use their own `sum` and division. When we want both mean and std,
+# the mean can be calculated first and passed to the std to speed it up.
+
+def _aligned_values(objects):
+    """Values of DataFrames as one array, with aligned rows and columns.
+
+    Parameters
+    ----------
+    objects : list of pandas.DataFrame
+        the DataFrames to align
+
+    Returns
+    -------
+    index : pandas.Index
+        the row labels of the aligned DataFrames
+    columns : pandas.Index
+        the column labels of the aligned DataFrames
+    values : np.array
+        shape (len(objects), len(index), len(columns)); missing entries are
+        NaN
+    """
+    index = objects[0].index
+    columns = objects[0].columns
+    for df in objects[1:]:
+        if not df.index.equals(index):
+            index = index.union(df.index)
+        if not df.columns.equals(columns):
+            columns = columns.union(df.columns)
+
+    values = np.array([df.reindex(index=index, columns=columns).values
+                       for df in objects], dtype=float)
+    return index, columns, values
+
+
+def _all_dataframes(objects):
+    return (len(objects) > 0
+            and all(isinstance(o, pd.DataFrame) for o in objects))
+
 
 def mean_df(objects):
     """Basic calculation of mean (average) of a list of DataFrames.
@@ -43,6 +77,10 @@ Returns
     pandas.DataFrame :
         the mean of each element in the DataFrame
     """
+    if _all_dataframes(objects):
+        (index, columns, values) = _aligned_values(objects)
+        return pd.DataFrame(values.mean(axis=0), index=index,
+                            columns=columns)
     return sum(objects) / float(len(objects))
 
 def std_df(objects, mean_x=None):
@@ -63,11 +101,104 @@ def std_df(objects, mean_x=None):
     """
     if mean_x is None:
         mean_x = mean_df(objects)
-    n_obj = float(len(objects))
+    if _all_dataframes(objects):
+        (index, columns, values) = _aligned_values(objects)
+        mean_x = mean_x.reindex(index=index, columns=columns)
+        variance = (values**2).mean(axis=0) - mean_x.values**2
+        with np.errstate(invalid='ignore'):
+            return pd.DataFrame(np.sqrt(variance), index=index,
+                                columns=columns)
     sq = [o**2 for o in objects]
     variance = mean_df(sq) - mean_x**2
     return variance.applymap(np.sqrt)
 
+
+# the state of a worker process of `_parallel_results`; this is set up once
+# per process by `_resampling_worker_init`
+_resampling_worker = {}
+
+
+def _resampling_worker_init(function, inputs):
+    _resampling_worker['function'] = function
+    _resampling_worker['inputs'] = inputs
+
+
+def _resampling_worker_run(chunk):
+    """Results of the function for the inputs `chunk` = (start, stop).
+
+    The start of the chunk is returned with the results, so that results
+    which finish out of order can be put back at their place.
+    """
+    function = _resampling_worker['function']
+    inputs = _resampling_worker['inputs']
+    return (chunk[0], [function(inputs[i]) for i in range(*chunk)])
+
+
+def _report_partial(callback, results):
+    """Give the running statistics of the finished `results` to callback"""
+    finished = [r for r in results if r is not None]
+    mean_x = mean_df(finished)
+    callback(len(finished), mean_x, std_df(finished, mean_x=mean_x))
+
+
+def _parallel_results(function, inputs, n_workers, chunksize=None,
+                      callback=None):
+    """
+    Apply function to all inputs on a pool of worker processes.
+
+    The function and the inputs are given to each worker once, when the
+    worker starts. Where processes are forked (the default on Linux), they
+    are not even copied: the workers read the data of this process. Each
+    task only consists of the range of inputs to use. Tasks are collected
+    as soon as they finish, in whatever order that is.
+
+    Parameters
+    ----------
+    function : callable
+        the function to apply
+    inputs : list
+        the inputs for `function`
+    n_workers : int
+        number of worker processes
+    chunksize : int or None
+        number of inputs per task; default splits the inputs in about 4
+        tasks per worker
+    callback : callable or None
+        if given, called as ``callback(n_finished, mean, std)`` with the
+        statistics of the results finished so far, each time a task
+        finishes
+
+    Returns
+    -------
+    list
+        results of `function` for each input, in the order of `inputs`
+    """
+    n_inputs = len(inputs)
+    if chunksize is None:
+        chunksize = max(1, -(-n_inputs // (4 * n_workers)))
+    chunks = [(start, min(start + chunksize, n_inputs))
+              for start in range(0, n_inputs, chunksize)]
+
+    pool = multiprocessing.Pool(processes=n_workers,
+                                initializer=_resampling_worker_init,
+                                initargs=(function, inputs))
+    try:
+        results = [None] * n_inputs
+        n_finished = 0
+        for (start, chunk_results) in pool.imap_unordered(
+            _resampling_worker_run, chunks
+        ):
+            results[start:start + len(chunk_results)] = chunk_results
+            n_finished += len(chunk_results)
+            logger.debug("Resampling: " + str(n_finished) + "/"
+                         + str(n_inputs) + " results")
+            if callback is not None:
+                _report_partial(callback, results)
+    finally:
+        pool.terminate()
+        pool.join()
+    return results
+
 class ResamplingStatistics(object):
     """
     Contains and organizes resampled statistics.
@@ -88,14 +219,36 @@ class ResamplingStatistics(object):
         the list `inputs` and return a pandas.DataFrame
     inputs : list
         each element of inputs is can be used as input to `function`
+    n_workers : int
+        number of worker processes to evaluate `function`; default 1 uses
+        this process only. If the worker processes can't be forked (e.g.,
+        on Windows), `function` and `inputs` must be picklable.
+    chunksize : int or None
+        number of inputs each worker evaluates per task; default splits the
+        inputs in about 4 tasks per worker
+    callback : callable or None
+        if given, called as ``callback(n_finished, mean, std)`` with the
+        running mean and standard deviation of the results finished so far,
+        each time a result (or, with `n_workers`, a task) finishes. Useful
+        to follow the convergence of long calculations.
     """
-    def __init__(self, function, inputs):
+    def __init__(self, function, inputs, n_workers=1, chunksize=None,
+                 callback=None):
         self.function = function
         self.inputs = inputs
-        self.results = [self.function(inp) for inp in self.inputs]
+        if n_workers > 1:
+            self.results = _parallel_results(self.function, self.inputs,
+                                             n_workers, chunksize, callback)
+        else:
+            self.results = []
+            for inp in self.inputs:
+                self.results.append(self.function(inp))
+                if callback is not None:
+                    _report_partial(callback, self.results)
         self._mean = None
         self._std = None
         self._sorted_series = None
+        self._sorted_values = None
 
     @property
     def mean(self):
@@ -142,11 +295,14 @@ class ResamplingStatistics(object):
         """
         n_entries = len(self.results)
         rank = min(int(percent / 100.0 * n_entries), n_entries - 1)
-        df = pd.DataFrame(index=self.index, columns=self.columns)
-        for idx in self.index:
-            for col in self.columns:
-                df.loc[idx, col] = self.sorted_series[(idx, col)].iloc[rank]
-        return df
+        if self._sorted_values is None:
+            (_, _, values) = _aligned_values(
+                [df.reindex(index=self.index, columns=self.columns)
+                 for df in self.results]
+            )
+            self._sorted_values = np.sort(values, axis=0)
+        return pd.DataFrame(self._sorted_values[rank], index=self.index,
+                            columns=self.columns)
 
 class BlockResampling(object):
     """Select samples according to block resampling.
@@ -39,18 +39,31 @@ class WHAM(object):
         maximum number of iterations. Default 1000000
     cutoff : float
         windowing cutoff, as fraction of maximum value. Default 0.05
+    diis_history : int
+        number of previous iterations used to extrapolate the WHAM
+        iteration (DIIS/Anderson acceleration); 0 gives the plain
+        self-consistent iteration. Default 5
 
     Attributes
     ----------
     sample_every : int
         frequency (in iterations) to report debug information
+    convergence : tuple (int, float)
+        number of iterations and final difference of the last call to
+        :meth:`.generate_lnZ`
+    residuals : list of float
+        difference (see :meth:`.get_diff`) after each iteration of the last
+        call to :meth:`.generate_lnZ`
     """
     def __init__(self, tol=1e-10, max_iter=1000000, cutoff=0.05,
-                 interfaces=None):
+                 interfaces=None, diis_history=5):
         self.tol = tol
         self.max_iter = max_iter
         self.cutoff = cutoff
         self.interfaces = interfaces
+        self.diis_history = diis_history
+        self.convergence = None
+        self.residuals = []
 
         self.sample_every = max_iter + 1
         self._float_format = "10.8"
@@ -129,9 +142,8 @@ class WHAM(object):
         # clear things that don't pass the cutoff
         hist_max = df.max(axis=0)
         raw_cutoff = cutoff*hist_max
-        cleaned_df = df.apply(
-            lambda s : [x if x > raw_cutoff[s.name] else 0.0 for x in s]
-        )
+        cleaned = df.values.astype(float)
+        cleaned[~(cleaned > raw_cutoff.values)] = 0.0
 
         if self.interfaces is not None:
             # use the interfaces values to set anything before that value to
@@ -139,30 +151,19 @@ class WHAM(object):
             if type(self.interfaces) is not pd.Series:
                 self.interfaces = pd.Series(data=self.interfaces,
                                             index=df.columns)
-            greater_almost_equal = lambda a, b : (a >= b or 
-                                                  abs(a - b) < 10e-10)
-            cleaned_df = cleaned_df.apply(
-                lambda s : [
-                    (
-                        s.iloc[i] 
-                        if greater_almost_equal(s.index[i],
-                                                self.interfaces[s.name])
-                        else 0.0
-                    )
-                    for i in range(len(s))
-                ]
-            )
+            lambdas = np.asarray(df.index, dtype=float)[:, np.newaxis]
+            iface_lambdas = self.interfaces[df.columns].values.astype(float)
+            greater_almost_equal = ((lambdas >= iface_lambdas)
+                                    | (abs(lambdas - iface_lambdas) < 10e-10))
+            cleaned[~greater_almost_equal] = 0.0
         else:
             # clear duplicates of leading values
-            test_f = lambda val1, val2, val_max : (
-                abs(val1 - val2) > tol or abs(val1 - val_max) > tol
-            )
-            cleaned_df = cleaned_df.apply(
-                lambda s : [
-                    s.iloc[i] if test_f(s.iloc[i], s.iloc[i+1], s.max()) else 0.0
-                    for i in range(len(s)-1)
-                ] + [s.iloc[-1]]
-            )
+            is_leading = ((abs(cleaned[:-1] - cleaned[1:]) <= tol)
+                          & (abs(cleaned[:-1] - cleaned.max(axis=0)) <= tol))
+            cleaned[:-1][is_leading] = 0.0
+
+        cleaned_df = pd.DataFrame(data=cleaned, index=df.index,
+                                  columns=df.columns)
         return cleaned_df
 
 
@@ -187,9 +188,7 @@ class WHAM(object):
         pandas.DataFrame
             unweighting values for the input dataframe
         """
-        unweighting = cleaned_df.copy().applymap(
-            lambda x : 1.0 if x > 0.0 else 0.0
-        )
+        unweighting = (cleaned_df > 0.0).astype(float)
         return unweighting
 
 
@@ -248,8 +247,7 @@ class WHAM(object):
         pandas.DataFrame
             weighted counts matrix, size n_hists by n_dims
         """
-        weighted_counts = unweighting.apply(lambda s : [x * n_entries[s.name]
-                                                        for x in s])
+        weighted_counts = unweighting.multiply(n_entries, axis=1)
         return weighted_counts
 
 
@@ -258,6 +256,13 @@ class WHAM(object):
         """
         Perform the WHAM iteration to estimate ln(Z_i) for each histogram.
 
+        Each iteration updates all histograms at once (see
+        :meth:`.wham_iteration`). Unless `diis_history` is 0, the next guess
+        is extrapolated from the previous iterations (DIIS), which needs
+        far fewer iterations than the plain self-consistent iteration. The
+        number of iterations and the differences per iteration are stored
+        in :attr:`.convergence` and :attr:`.residuals`.
+
         Parameters
         ----------
         lnZ : pandas.Series, one per histogram (length n_hists)
@@ -285,67 +290,66 @@ class WHAM(object):
         diff = self.tol + 1  # always start above the tolerance
         iteration = 0
         hists = weighted_counts.columns
-        bins = weighted_counts.index
-        # TODO: probably faster if we make wc this a sparse matrix
-        wc = weighted_counts.as_matrix()
-        unw = unweighting.as_matrix()
-        lnZ_old = pd.Series(data=lnZ, index=hists)
-        Z_new = pd.Series(index=hists)
-        sum_k_Hk_byQ = sum_k_Hk_Q.as_matrix()
+        wc = weighted_counts.values
+        unw = unweighting.values
+        sum_k_Hk_byQ = sum_k_Hk_Q.values
+        lnZ_old = pd.Series(data=lnZ, index=hists).values.astype(float)
+        lnZ_new = lnZ_old - lnZ_old[0]
+        extrapolation = _DIISExtrapolation(self.diis_history)
+        self.residuals = []
         while diff > tol and iteration < self.max_iter:
-            Z_old = np.exp(lnZ_old)
-            reciprocal_Z_old = (1.0 / Z_old).as_matrix()
-            for i in range(len(hists)):
-                #############################################################
-                # this is equation 7.3.10 in F&S
-                # Z_i^{(new)} = 
-                #    \int \dd{Q} w_{i,Q}
-                #    \times \frac{\sum_{j=1}^n H_j(Q)}
-                #                {\sum_{k=1}^n w_{k,Q} M_k / Z_k^{(old)}}
-                # where F&S explicitly use w_{i,Q} = e^{-\beta W_i}
-                #
-                # Matching terms from F&S to our variables:
-                #   w_i = w_{i,Q} = $e^{-\beta W_i}$
-                #       * this is a column (len == n_bins) from a matrix
-                #         size n_hists \times n_bins
-                #       * from "unweighting", which is Boltzmann in umbrella
-                #         sampling (F&S), but 1 or 0 in TIS
-                #       * see unweighting_tis: not entirely clear why this
-                #         is a matrix, not an vector length n_hists
-                #   sum_k_Hk_byQ = $\sum_{j=1}^n H_j(Q)$
-                #       * this is a function of Q, thus len == n_bins
-                #   wc = w_{k,Q} * M_k = $e^{-\beta W_k} M_k$
-                #       * note that this is element-wise multiplication
-                #       * matrix, size n_hists \times n_bins
-                #   reciprocal_Z_old = $1/Z_k^{(old)}$
-                #       * vector, len == n_hists
-                #
-                # Note that we do all of this with matrix/vector
-                # multiplication, which numpy can do very quickly.
-                #############################################################
-
-                w_i = unw[:,i]
-
-                # numerator: w_{i,Q} * sum_k_Hk_byQ
-                numerator_byQ = np.multiply(w_i, sum_k_Hk_byQ)
-
-                # denominator: wc * Z^{-1}
-                sum_over_Z_byQ = wc.dot(reciprocal_Z_old)
-
-                # divide each entry, and add them (integrate over Q in F&S)
-                addends_k = np.divide(numerator_byQ, sum_over_Z_byQ)
-                Z_new[hists[i]] = np.nansum(addends_k)
-
-            lnZ_new = np.log(Z_new)
-
+            lnZ_new = self.wham_iteration(lnZ_old, unw, wc, sum_k_Hk_byQ)
             iteration += 1
             diff = self.get_diff(lnZ_old, lnZ_new, iteration)
-            lnZ_old = lnZ_new - lnZ_new.iloc[0]
+            self.residuals.append(diff)
+            lnZ_new = lnZ_new - lnZ_new[0]
+            lnZ_old = extrapolation.next_guess(lnZ_old, lnZ_new)
 
+        lnZ_result = pd.Series(data=lnZ_new, index=hists)
         logger.info("iterations=" + str(iteration) + " diff=" + str(diff))
-        logger.info("       lnZ=" + str(lnZ_old))
+        logger.info("       lnZ=" + str(lnZ_result))
         self.convergence = (iteration, diff)
-        return lnZ_old
+        return lnZ_result
+
+    @staticmethod
+    def wham_iteration(lnZ, unweighting, weighted_counts, sum_k_Hk_Q):
+        r"""
+        Single self-consistent WHAM update of ln(Z_i) for all histograms.
+
+        This is equation 7.3.10 in F&S:
+
+        .. math::
+            Z_i^{(new)} = \int \mathrm{d}Q\, w_{i,Q}
+                \frac{\sum_{j=1}^n H_j(Q)}
+                      {\sum_{k=1}^n w_{k,Q} M_k / Z_k^{(old)}}
+
+        where F&S explicitly use :math:`w_{i,Q} = e^{-\beta W_i}`. The
+        denominator is the same for all histograms, so the update for all
+        histograms is one matrix-vector product and one weighted sum over
+        bins. Bins where the integrand is undefined (0/0) are skipped.
+
+        Parameters
+        ----------
+        lnZ : np.array, length n_hists
+            previous value of ln(Z_i)
+        unweighting : np.array, n_bins by n_hists
+            the unweighting matrix :math:`w_{i,Q}`; see
+            :meth:`.unweighting_tis`
+        weighted_counts : np.array, n_bins by n_hists
+            :math:`w_{k,Q} M_k`; see :meth:`.weighted_counts_tis`
+        sum_k_Hk_Q : np.array, length n_bins
+            :math:`\sum_j H_j(Q)`; see :meth:`.sum_k_Hk_Q`
+
+        Returns
+        -------
+        np.array
+            new (not normalized) value of ln(Z_i)
+        """
+        sum_over_Z_byQ = weighted_counts.dot(np.exp(-lnZ))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            integrand_byQ = np.divide(sum_k_Hk_Q, sum_over_Z_byQ)
+            addends = np.multiply(unweighting, integrand_byQ[:, np.newaxis])
+            return np.log(np.nansum(addends, axis=0))
 
 
     def get_diff(self, lnZ_old, lnZ_new, iteration):
@@ -368,8 +372,7 @@ class WHAM(object):
             difference between old and new to use for convergence testing
         """
         # get error
-        diff=0
-        diff = sum(abs(lnZ_old - lnZ_new))
+        diff = np.abs(lnZ_old - lnZ_new).sum()
         # check status (mainly for debugging)
         if (iteration % self.sample_every == 0):  # pragma: no cover
             logger.debug("niteration = " + str(iteration))
@@ -400,15 +403,11 @@ class WHAM(object):
         """
         Z = np.exp(lnZ)
         Z0_over_Zi = Z.iloc[0] / Z
-        output = pd.Series(index=sum_k_Hk_Q.index, name="WHAM")
-        for val in sum_k_Hk_Q.index:
-            sum_w_over_Z = sum([
-                weighted_counts.loc[val, hist_i] * Z0_over_Zi[hist_i]
-                for hist_i in Z.index
-            ])
-            output[val] = sum_k_Hk_Q[val] / sum_w_over_Z
+        sum_w_over_Z = weighted_counts[Z.index].values.dot(Z0_over_Zi.values)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            output = sum_k_Hk_Q.values / sum_w_over_Z
 
-        return output
+        return pd.Series(data=output, index=sum_k_Hk_Q.index, name="WHAM")
 
     @staticmethod
     def normalize_cumulative(series):
@@ -516,6 +515,64 @@ class WHAM(object):
         return result
 
 
+class _DIISExtrapolation(object):
+    """
+    DIIS (Anderson) extrapolation of a fixed-point iteration x -> g(x)
+
+    The next guess is the combination of the last iterates that minimizes
+    the (linearized) residual g(x) - x in the least-squares sense.
+
+    Parameters
+    ----------
+    n_history : int
+        number of previous iterations used; 0 returns g(x) unchanged
+    """
+    def __init__(self, n_history):
+        self.n_history = n_history
+        self.values = []
+        self.residuals = []
+
+    def next_guess(self, x, g_x):
+        """
+        Next guess after the iteration x -> g(x)
+
+        Parameters
+        ----------
+        x : np.array
+            the previous guess
+        g_x : np.array
+            the result of the iteration for `x`
+
+        Returns
+        -------
+        np.array
+            the extrapolated next guess
+        """
+        if self.n_history == 0:
+            return g_x
+
+        if not np.all(np.isfinite(g_x)):
+            self.values = []
+            self.residuals = []
+            return g_x
+
+        self.values = self.values[-self.n_history:] + [g_x]
+        self.residuals = self.residuals[-self.n_history:] + [g_x - x]
+        if len(self.values) < 2:
+            return g_x
+
+        delta_g = np.diff(np.array(self.values), axis=0).T
+        delta_f = np.diff(np.array(self.residuals), axis=0).T
+        gamma = np.linalg.lstsq(delta_f, self.residuals[-1], rcond=-1)[0]
+        guess = g_x - delta_g.dot(gamma)
+        if not np.all(np.isfinite(guess)):  # pragma: no cover
+            self.values = []
+            self.residuals = []
+            return g_x
+
+        return guess
+
+
 def parsing(parseargs):  # pragma: no cover
     # TODO: switch to argparse. 
     import optparse
@@ -14,6 +14,7 @@ import openpathsampling as paths
 from openpathsampling.netcdfplus import StorableNamedObject, StorableObject
 from openpathsampling.pathmover_inout import InOutSet, InOut
 from .ops_logging import initialization_logging
+from . import profiling
 from .treelogic import TreeMixin
 
 from future.utils import with_metaclass
@@ -534,7 +535,9 @@ class SampleMover(PathMover):
         # TODO: This isn't right. `bias` should be associated with the
         # change; not with each individual sample. ~~~DWHS
         for ens, sample in trial_dict.items():
-            valid = ens(sample.trajectory, candidate=self._trust_candidate)
+            with profiling.timer('ensemble'):
+                valid = ens(sample.trajectory,
+                            candidate=self._trust_candidate)
             if not valid:
                 # one sample not valid reject
                 accepted = False
@@ -583,6 +586,10 @@ class SampleMover(PathMover):
         return []
 
     def move(self, sample_set):
+        with profiling.mover(self):
+            return self._move(sample_set)
+
+    def _move(self, sample_set):
         # 1. pick a set of ensembles (in case we allow to pick several ones)
         ensembles = self._called_ensembles()
 
@@ -731,7 +738,8 @@ class EngineMover(SampleMover):
 
     def __call__(self, input_sample):
         initial_trajectory = input_sample.trajectory
-        shooting_index = self.selector.pick(initial_trajectory)
+        with profiling.timer('shooting_point'):
+            shooting_index = self.selector.pick(initial_trajectory)
 
         try:
             trial_trajectory, run_details = self._run(initial_trajectory,
@@ -770,11 +778,12 @@ class EngineMover(SampleMover):
         initial_trajectory = input_sample.trajectory
 
         if stopping_reason is None:
-            bias = self.selector.probability_ratio(
-                initial_trajectory[shooting_index],
-                initial_trajectory,
-                trial_trajectory
-            )
+            with profiling.timer('shooting_point'):
+                bias = self.selector.probability_ratio(
+                    initial_trajectory[shooting_index],
+                    initial_trajectory,
+                    trial_trajectory
+                )
         else:
             bias = 0.0
 
@@ -1452,6 +1461,10 @@ class SelectionMover(PathMover):
         the PathMovers to choose from
     """
 
+    # whether the weights returned by `_selector` are independent of the
+    # sample set; if so, the choice can be made before the move is run
+    _selection_is_independent = False
+
     def __init__(self, movers):
         super(SelectionMover, self).__init__()
 
@@ -1488,7 +1501,25 @@ class SelectionMover(PathMover):
     def _selector(self, sample_set):
         pass
 
-    def move(self, sample_set):
+    @property
+    def selection_is_independent(self):
+        """bool : whether the choice does not depend on the sample set"""
+        return self._selection_is_independent
+
+    def choose(self, sample_set):
+        """
+        Randomly choose one of the submovers
+
+        Parameters
+        ----------
+        sample_set : :class:`openpathsampling.SampleSet`
+            the sample set the chosen mover will be applied to
+
+        Returns
+        -------
+        :class:`openpathsampling.MoveDetails`
+            details of the choice, including the `chosen_mover`
+        """
         weights = self._selector(sample_set)
 
         rand = np.random.random() * sum(weights)
@@ -1523,10 +1554,13 @@ class SelectionMover(PathMover):
             'weights': weights
         }
 
-        details = MoveDetails(**kwargs)
+        return MoveDetails(**kwargs)
+
+    def move(self, sample_set):
+        details = self.choose(sample_set)
 
         path = paths.RandomChoiceMoveChange(
-            mover.move(sample_set),
+            details.chosen_mover.move(sample_set),
             mover=self,
             details=details
         )
@@ -1551,6 +1585,8 @@ class RandomChoiceMover(SelectionMover):
         the relative weight of each PathMover (does not need to be normalized)
     """
 
+    _selection_is_independent = True
+
     def __init__(self, movers, weights=None):
         super(RandomChoiceMover, self).__init__(movers)
 
@@ -1583,6 +1619,8 @@ class RandomAllowedChoiceMover(RandomChoiceMover):
         the relative weight of each PathMover (does not need to be normalized)
     """
 
+    _selection_is_independent = False
+
     def _selector(self, sample_set):
         if self.weights is None:
             weights = [1.0] * len(self.movers)
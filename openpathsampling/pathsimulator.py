@@ -1,16 +1,22 @@
 import time
 import sys
 import logging
+import collections
+import multiprocessing
+import random
+import threading
 import numpy as np
 import pandas as pd
 
 from openpathsampling.netcdfplus import StorableNamedObject, StorableObject
+from openpathsampling.netcdfplus.dictify import CachedUUIDObjectJSON
 
 import openpathsampling as paths
 import openpathsampling.tools
 
 from openpathsampling.pathmover import SubPathMover
 from .ops_logging import initialization_logging
+from . import profiling
 import abc
 
 from future.utils import with_metaclass
@@ -62,6 +68,139 @@ class MCStep(StorableObject):
         self.mccycle = mccycle
 
 
+# the state of a worker process of a `_MoverPool`; this is set up once per
+# process by `_mover_worker_init`
+_mover_worker = {}
+
+
+def _mover_worker_init(movers_json):
+    """Rebuild default engine and movers in a worker process"""
+    # forked workers share the parent's random state and UUID counter
+    np.random.seed()
+    random.seed()
+    StorableObject.renew_instance_uuid()
+
+    serializer = CachedUUIDObjectJSON()
+    engine, mover = serializer.from_json(movers_json)
+    if engine is not None:
+        paths.EngineMover.default_engine = engine
+
+    _mover_worker['serializer'] = serializer
+    _mover_worker['engine'] = engine
+    _mover_worker['mover'] = mover
+    _mover_worker['known'] = serializer.known_objects()
+
+
+def _mover_worker_run(task_json):
+    """Run a single move in a worker process and return the change as JSON"""
+    serializer = _mover_worker['serializer']
+    serializer.reset_cache(_mover_worker['known'])
+    mover, sample_set = serializer.from_json(task_json)
+    change = mover.move(sample_set)
+    # everything the parent sent us is known there, so only reference it
+    return serializer.to_json_cached(change)
+
+
+class _MoverPool(object):
+    """
+    Run moves of a mover tree on a pool of worker processes
+
+    Objects are sent to the workers and back as JSON. Each worker builds its
+    own copy of the mover tree (and the default engine) once. After that,
+    each message only references the objects that both sides already know,
+    so the returned changes are built from the objects in this process.
+
+    Parameters
+    ----------
+    mover : :class:`.PathMover`
+        the root of all movers that will be run in the pool
+    n_workers : int
+        the number of worker processes
+    engine : :class:`.DynamicsEngine` or None
+        the engine used by movers without an engine of their own; default
+        is the current `EngineMover.default_engine`
+    """
+    def __init__(self, mover, n_workers, engine=None):
+        if engine is None:
+            engine = paths.EngineMover.default_engine
+
+        self._encoder = CachedUUIDObjectJSON()
+        self._decoder = CachedUUIDObjectJSON()
+        movers_json = self._encoder.to_json((engine, mover))
+        self._known = self._encoder.known_objects()
+        self.n_workers = n_workers
+        self._pool = multiprocessing.Pool(processes=n_workers,
+                                          initializer=_mover_worker_init,
+                                          initargs=(movers_json,))
+
+    def imap(self, tasks, max_ahead=None):
+        """
+        Run moves in the pool
+
+        The tasks are taken from `tasks` and encoded lazily by the feeder
+        thread of the pool, at most `max_ahead` ahead of the changes that
+        were already returned. So the memory used does not grow with the
+        number of tasks.
+
+        Parameters
+        ----------
+        tasks : iterable of (:class:`.PathMover`, :class:`.SampleSet`)
+            the movers to run, each with the sample set to move. The movers
+            must be part of the tree the pool was created with.
+        max_ahead : int or None
+            the maximal number of tasks that are encoded or running but
+            whose change was not returned yet. Default is twice the number
+            of workers.
+
+        Yields
+        ------
+        :class:`.MoveChange`
+            the resulting changes, in the order of `tasks`
+        """
+        if max_ahead is None:
+            max_ahead = 2 * self.n_workers
+
+        ahead = threading.Semaphore(max_ahead)
+        stopped = threading.Event()
+        # `Pool.imap` keeps the order, so the objects known when a task was
+        # encoded are decoded with its result in first-in, first-out order
+        task_known = collections.deque()
+
+        def messages():
+            task_iter = iter(tasks)
+            while True:
+                ahead.acquire()
+                if stopped.is_set():
+                    return
+                try:
+                    (mover, sample_set) = next(task_iter)
+                except StopIteration:
+                    return
+
+                self._encoder.reset_cache(self._known)
+                message = self._encoder.to_json_cached((mover, sample_set))
+                task_known.append(self._encoder.known_objects())
+                yield message
+
+        results = self._pool.imap(_mover_worker_run, messages())
+        try:
+            for change_json in results:
+                self._decoder.reset_cache(task_known.popleft())
+                change = self._decoder.from_json(change_json)
+                ahead.release()
+                yield change
+        finally:
+            # let a waiting feeder thread finish, so the pool can be closed
+            stopped.set()
+            for _ in range(max_ahead):
+                ahead.release()
+
+    def close(self):
+        """Shut down the worker processes"""
+        self._pool.terminate()
+        self._pool.join()
+
+
 class PathSimulator(with_metaclass(abc.ABCMeta, StorableNamedObject)):
     """Abstract class for the "main" function of a simulation.
 
@@ -83,12 +222,22 @@ class PathSimulator(with_metaclass(abc.ABCMeta, StorableNamedObject)):
         Whether to allow the output to refresh an ipynb cell; default True.
         This is likely to be overridden when a pathsimulator is wrapped in
         another simulation.
+    write_behind : int
+        If larger than 0, results are saved by a background thread, while
+        the simulation continues. At most ``write_behind`` steps wait to be
+        saved; if there are more, the simulation waits for the storage.
+        Default is 0, which saves results directly. Note: subclasses must
+        support this, currently only :class:`.PathSampling` does.
+    profiler : :class:`.MCProfiler` or None
+        If set, the profiler records where the time of each step is spent
+        while the simulation runs. Default is None. Note: subclasses must
+        support this, currently only :class:`.PathSampling` does.
     """
     #__metaclass__ = abc.ABCMeta
 
     calc_name = "PathSimulator"
     _excluded_attr = ['sample_set', 'step', 'save_frequency',
-                      'output_stream']
+                      'output_stream', 'write_behind', 'profiler']
 
     def __init__(self, storage):
         super(PathSimulator, self).__init__()
@@ -103,13 +252,59 @@ class PathSimulator(with_metaclass(abc.ABCMeta, StorableNamedObject)):
         self.sample_set = None
         self.output_stream = sys.stdout  # user can change to file handler
         self.allow_refresh =  True
+        self.write_behind = 0
+        self.profiler = None
+        self._writer = None
 
     def sync_storage(self):
         """
         Will sync all collective variables and the storage to disk
         """
-        if self.storage is not None:
-            self.storage.sync_all()
+        with profiling.timer('storage'):
+            if self._writer is not None:
+                self._writer.sync()
+            elif self.storage is not None:
+                self.storage.sync_all()
+
+    def _save_to_storage(self, store, obj):
+        """Save an object now or, if writing behind, queue it for saving"""
+        with profiling.timer('storage'):
+            if self._writer is not None:
+                self._writer.save(store, obj)
+            else:
+                store.save(obj)
+
+    def _start_profiler(self):
+        """Activate the `profiler`, if set"""
+        if self.profiler is not None:
+            self.profiler.start()
+
+    def _stop_profiler(self):
+        """Deactivate the `profiler`, if set"""
+        if self.profiler is not None:
+            self.profiler.stop()
+
+    def _profile_step(self):
+        """Context manager that profiles the current step, if profiling"""
+        if self.profiler is not None:
+            return self.profiler.step(self.step)
+        else:
+            return profiling._null_timer
+
+    def _start_writer(self):
+        """Start the background writer if `write_behind` is set"""
+        if self.storage is not None and self.write_behind > 0:
+            self._writer = paths.storage.StorageWriter(
+                self.storage,
+                max_queued=self.write_behind
+            )
+
+    def _stop_writer(self):
+        """Save all results still waiting and stop the background writer"""
+        if self._writer is not None:
+            writer = self._writer
+            self._writer = None
+            writer.close()
 
     @abc.abstractmethod
     def run(self, n_steps):
@@ -606,7 +801,7 @@ class PathSampling(PathSimulator):
 
         """
         if self.storage is not None and self._current_step is not None:
-            self.storage.steps.save(self._current_step)
+            self._save_to_storage(self.storage.steps, self._current_step)
 
     @classmethod
     def from_step(cls, storage, step, initialize=True):
@@ -676,16 +871,34 @@ class PathSampling(PathSimulator):
 
         self._current_step = step
 
-    def run_until(self, n_steps):
+    def run_until(self, n_steps, n_workers=1):
         # if self.storage is not None:
         #     if len(self.storage.steps) > 0:
         #         self.step = len(self.storage.steps)
         n_steps_to_run = n_steps - self.step
-        self.run(n_steps_to_run)
+        self.run(n_steps_to_run, n_workers=n_workers)
 
-    def run(self, n_steps):
-        mcstep = None
+    def run(self, n_steps, n_workers=1):
+        """
+        Run the simulator for a number of steps
+
+        Parameters
+        ----------
+        n_steps : int
+            number of step to be run
+        n_workers : int
+            number of processes used to run the moves. If 1 (default), all
+            moves are run in this process. Otherwise consecutive moves that
+            act on disjoint sets of ensembles are run concurrently on a
+            process pool of this size. The steps are still saved one by one
+            in the order they were drawn, so this samples the same Markov
+            chain as the serial run.
 
+        Notes
+        -----
+        If `write_behind` is set, all steps are saved when this returns,
+        also if the run stopped with an error.
+        """
         # cvs = list()
         # n_samples = 0
 
@@ -695,6 +908,29 @@ class PathSampling(PathSimulator):
 
         initial_time = time.time()
 
+        if n_workers > 1:
+            pool = _MoverPool(self.root_mover, n_workers)
+            changes = self._parallel_changes(n_steps, pool)
+        else:
+            pool = None
+            changes = None
+
+        self._start_writer()
+        self._start_profiler()
+        try:
+            self._run_steps(n_steps, changes, initial_time)
+        finally:
+            try:
+                if pool is not None:
+                    pool.close()
+            finally:
+                try:
+                    self._stop_writer()
+                finally:
+                    self._stop_profiler()
+
+    def _run_steps(self, n_steps, changes, initial_time):
+        mcstep = None
         for nn in range(n_steps):
             self.step += 1
             logger.info("Beginning MC cycle " + str(self.step))
@@ -721,41 +957,46 @@ class PathSampling(PathSimulator):
                     output_stream=self.output_stream
                 )
 
-            time_start = time.time()
-            movepath = self._mover.move(self.sample_set, step=self.step)
-            samples = movepath.results
-            new_sampleset = self.sample_set.apply_samples(samples)
-            time_elapsed = time.time() - time_start
+            with self._profile_step():
+                time_start = time.time()
+                if changes is None:
+                    movepath = self._mover.move(self.sample_set,
+                                                step=self.step)
+                else:
+                    movepath = next(changes)
+                samples = movepath.results
+                new_sampleset = self.sample_set.apply_samples(samples)
+                time_elapsed = time.time() - time_start
 
-            # TODO: we can save this with the MC steps for timing? The bit
-            # below works, but is only a temporary hack
-            setattr(movepath.details, "timing", time_elapsed)
+                # TODO: we can save this with the MC steps for timing? The
+                # bit below works, but is only a temporary hack
+                setattr(movepath.details, "timing", time_elapsed)
 
-            mcstep = MCStep(
-                simulation=self,
-                mccycle=self.step,
-                previous=self.sample_set,
-                active=new_sampleset,
-                change=movepath
-            )
+                mcstep = MCStep(
+                    simulation=self,
+                    mccycle=self.step,
+                    previous=self.sample_set,
+                    active=new_sampleset,
+                    change=movepath
+                )
 
-            self._current_step = mcstep
-            self.save_current_step()
+                self._current_step = mcstep
+                self.save_current_step()
 
-            # if self.storage is not None:
-            #     # I think this is done automatically when saving snapshots
-            #     # for cv in cvs:
-            #     #     n_len = len(self.storage.snapshots)
-            #     #     cv(self.storage.snapshots[n_samples:n_len])
-            #     #     n_samples = n_len
-            #
-            #     self.storage.steps.save(mcstep)
+                # if self.storage is not None:
+                #     # I think this is done automatically when saving snapshots
+                #     # for cv in cvs:
+                #     #     n_len = len(self.storage.snapshots)
+                #     #     cv(self.storage.snapshots[n_samples:n_len])
+                #     #     n_samples = n_len
+                #
+                #     self.storage.steps.save(mcstep)
 
-            if self.step % self.save_frequency == 0:
-                self.sample_set.sanity_check()
-                self.sync_storage()
+                if self.step % self.save_frequency == 0:
+                    self.sample_set.sanity_check()
+                    self.sync_storage()
 
-            self.sample_set = new_sampleset
+                self.sample_set = new_sampleset
 
         self.sync_storage()
 
@@ -767,6 +1008,107 @@ class PathSampling(PathSimulator):
             output_stream=self.output_stream
         )
 
+    def _draw_move(self):
+        """
+        Make the choices of the decision tree that do not need the samples
+
+        Starting at the root mover, this follows all selection movers
+        whose choice is independent of the sample set (like
+        :class:`.RandomChoiceMover`) and makes their random choice now.
+
+        Returns
+        -------
+        choices : list of (:class:`.SelectionMover`, :class:`.MoveDetails`)
+            the selection movers and their choices, from the root down
+        mover : :class:`.PathMover`
+            the mover that remains to be run
+        """
+        choices = []
+        mover = self.root_mover
+        while isinstance(mover, paths.SelectionMover) \
+                and mover.selection_is_independent:
+            details = mover.choose(self.sample_set)
+            choices.append((mover, details))
+            mover = details.chosen_mover
+
+        return choices, mover
+
+    def _wrap_change(self, choices, change, step):
+        """Build the full change of a step from the change of its submover"""
+        for (mover, details) in reversed(choices):
+            change = paths.RandomChoiceMoveChange(
+                change,
+                mover=mover,
+                details=details
+            )
+
+        return paths.PathSimulatorMoveChange(
+            change,
+            mover=self._mover,
+            details=paths.MoveDetails(step=step)
+        )
+
+    def _parallel_changes(self, n_steps, pool):
+        """
+        Generate the changes of the next steps, running moves concurrently
+
+        The choices of the move decision tree do not depend on the samples
+        down to the actual movers (e.g., a specific shooting mover), so the
+        movers of the following steps can be drawn in advance. Consecutive
+        steps whose movers act on disjoint sets of ensembles commute: running
+        them concurrently from the same sample set gives the same result as
+        running them one after the other. Such steps are run together and
+        returned in the order they were drawn, which is therefore the same
+        Markov chain as running all steps serially.
+
+        The changes are meant to be consumed one step at a time, updating
+        `sample_set` and `step` in between, as done by :meth:`.run`.
+
+        Parameters
+        ----------
+        n_steps : int
+            number of steps to generate
+        pool : :class:`._MoverPool`
+            the pool to run the moves in
+
+        Yields
+        ------
+        :class:`.PathSimulatorMoveChange`
+            the change for each step
+        """
+        n_drawn = 0
+        pending = None
+        while n_drawn < n_steps:
+            batch = []
+            used_ensembles = set()
+            while n_drawn < n_steps and len(batch) < pool.n_workers:
+                if pending is None:
+                    pending = self._draw_move()
+
+                mover = pending[1]
+                ensembles = set(mover.input_ensembles) \
+                    | set(mover.output_ensembles)
+                if len(batch) > 0 and (len(ensembles) == 0 or
+                                       ensembles & used_ensembles):
+                    # not independent of the batch; wait for the next one
+                    break
+
+                batch.append(pending)
+                used_ensembles |= ensembles
+                pending = None
+                n_drawn += 1
+                if len(ensembles) == 0:
+                    # we don't know what this mover acts on; run it alone
+                    break
+
+            logger.info("Running %d moves concurrently", len(batch))
+            sample_set = self.sample_set
+            changes = pool.imap(
+                [(mover, sample_set) for (_, mover) in batch]
+            )
+            for ((choices, _), change) in zip(batch, changes):
+                yield self._wrap_change(choices, change, self.step)
+
 
 class ShootFromSnapshotsSimulation(PathSimulator):
     """
@@ -858,7 +1200,7 @@ class ShootFromSnapshotsSimulation(PathSimulator):
         return obj
 
 
-    def run(self, n_per_snapshot, as_chain=False):
+    def run(self, n_per_snapshot, as_chain=False, n_workers=1):
         """Run the simulation.
 
         Parameters
@@ -871,22 +1213,78 @@ class ShootFromSnapshotsSimulation(PathSimulator):
             input to the modifier is the previous (modified) snapshot.
             Useful for modifications that can't cover the whole range from a
             given snapshot.
+        n_workers : int
+            number of processes used to run the shots. If 1 (default), all
+            shots are run in this process. Otherwise, the shots are run on a
+            process pool of this size; each worker builds its own copy of
+            the engine and mover, and the results are saved in the original
+            order by this process, which remains the only one writing to
+            the storage.
         """
         self.step = 0
-        snap_num = 0
-        for snapshot in self.initial_snapshots:
-            start_snap = snapshot
-            # do what we need to get the snapshot set up
-            for step in range(n_per_snapshot):
-                paths.tools.refresh_output(
-                    "Working on snapshot %d / %d; shot %d / %d" % (
-                        snap_num+1, len(self.initial_snapshots),
-                        step+1, n_per_snapshot
-                    ),
-                    output_stream=self.output_stream,
-                    refresh=self.allow_refresh
-                )
+        shots = self._shot_sample_sets(n_per_snapshot, as_chain)
+        if n_workers > 1:
+            changes = self._parallel_changes(shots, n_workers)
+        else:
+            changes = self._serial_changes(shots, n_per_snapshot)
+
+        for (snap_num, shot_num, sample_set, change) in changes:
+            if n_workers > 1:
+                # shots finish out of our control, so report the results
+                self._report_shot(snap_num, shot_num, n_per_snapshot)
+
+            new_sample_set = sample_set.apply_samples(change.results)
+
+            mcstep = MCStep(
+                simulation=self,
+                mccycle=self.step,
+                previous=sample_set,
+                active=new_sample_set,
+                change=change
+            )
+
+            if self.storage is not None:
+                self.storage.steps.save(mcstep)
+                if self.step % self.save_frequency == 0:
+                    self.sync_storage()
+
+            self.step += 1
 
+    def _report_shot(self, snap_num, shot_num, n_per_snapshot):
+        paths.tools.refresh_output(
+            "Working on snapshot %d / %d; shot %d / %d" % (
+                snap_num+1, len(self.initial_snapshots),
+                shot_num+1, n_per_snapshot
+            ),
+            output_stream=self.output_stream,
+            refresh=self.allow_refresh
+        )
+
+    def _serial_changes(self, shots, n_per_snapshot):
+        """Run the shots one after the other in this process
+
+        Yields
+        ------
+        tuple (int, int, :class:`.SampleSet`, :class:`.MoveChange`)
+            like the shots, plus the move change of the shot
+        """
+        for (snap_num, shot_num, sample_set) in shots:
+            self._report_shot(snap_num, shot_num, n_per_snapshot)
+            yield (snap_num, shot_num, sample_set,
+                   self.mover.move(sample_set))
+
+    def _shot_sample_sets(self, n_per_snapshot, as_chain):
+        """Generate the initial sample set for each shot
+
+        Yields
+        ------
+        tuple (int, int, :class:`.SampleSet`)
+            number of the initial snapshot, number of the shot from that
+            snapshot, and the sample set to run the shot from
+        """
+        for (snap_num, snapshot) in enumerate(self.initial_snapshots):
+            start_snap = snapshot
+            for shot_num in range(n_per_snapshot):
                 if as_chain:
                     start_snap = self.randomizer(start_snap)
                 else:
@@ -898,26 +1296,32 @@ class ShootFromSnapshotsSimulation(PathSimulator):
                                  ensemble=self.starting_ensemble)
                 ])
                 sample_set.sanity_check()
-                new_pmc = self.mover.move(sample_set)
-                samples = new_pmc.results
-                new_sample_set = sample_set.apply_samples(samples)
+                yield (snap_num, shot_num, sample_set)
 
-                mcstep = MCStep(
-                    simulation=self,
-                    mccycle=self.step,
-                    previous=sample_set,
-                    active=new_sample_set,
-                    change=new_pmc
-                )
+    def _parallel_changes(self, shots, n_workers):
+        """Run the shots on a process pool
 
-                if self.storage is not None:
-                    self.storage.steps.save(mcstep)
-                    if self.step % self.save_frequency == 0:
-                        self.sync_storage()
+        Yields
+        ------
+        tuple (int, int, :class:`.SampleSet`, :class:`.MoveChange`)
+            the shots in their original order, with the resulting change
+        """
+        # the shots are only made when the pool needs new tasks; they wait
+        # here for their changes, which come back in the same order
+        pending = collections.deque()
 
-                self.step += 1
-            snap_num += 1
+        def tasks():
+            for shot in shots:
+                pending.append(shot)
+                yield (self.mover, shot[2])
 
+        pool = _MoverPool(self.mover, n_workers, engine=self.engine)
+        try:
+            for change in pool.imap(tasks()):
+                (snap_num, shot_num, sample_set) = pending.popleft()
+                yield (snap_num, shot_num, sample_set, change)
+        finally:
+            pool.close()
 
 
 class CommittorSimulation(ShootFromSnapshotsSimulation):
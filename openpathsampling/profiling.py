@@ -0,0 +1,285 @@
+"""
+Timing instrumentation for path sampling simulations
+
+The hot paths of a simulation (engine integration, ensemble checks, CV
+evaluation, shooting point selection and storage writes) report their
+timing to the active :class:`MCProfiler`, if there is one. If no profiler
+is active, the hooks do nothing.
+
+Profilers are active per thread, so that e.g. a background storage writer
+does not report to the profiler of the simulation.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+# `_local.active` is the profiler that currently receives all timings of
+# this thread; see `MCProfiler.start`
+_local = threading.local()
+
+
+def _active():
+    return getattr(_local, 'active', None)
+
+
+class _NullTimer(object):
+    """Context manager that does nothing; used if no profiler is active"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_null_timer = _NullTimer()
+
+
+def timer(category):
+    """
+    Time a block of code for the active profiler
+
+    Parameters
+    ----------
+    category : str
+        the category the time is counted for; one of
+        :attr:`MCProfiler.categories`
+
+    Returns
+    -------
+    context manager
+    """
+    profiler = _active()
+    if profiler is None:
+        return _null_timer
+    return _Frame(profiler, category)
+
+
+def mover(path_mover):
+    """
+    Count all time of a block of code for a mover of the active profiler
+
+    Parameters
+    ----------
+    path_mover : :class:`openpathsampling.PathMover`
+        the mover that runs the block
+
+    Returns
+    -------
+    context manager
+    """
+    profiler = _active()
+    if profiler is None:
+        return _null_timer
+    return _Frame(profiler, 'other', path_mover)
+
+
+def count_frames(n_frames=1):
+    """
+    Count frames generated by an engine for the active profiler
+
+    Parameters
+    ----------
+    n_frames : int
+        number of new frames
+    """
+    profiler = _active()
+    if profiler is not None:
+        profiler._add(profiler._current_mover(), 'n_frames', n_frames)
+
+
+class _Frame(object):
+    """A timed block of code; blocks can be nested"""
+    __slots__ = ['profiler', 'category', 'mover', 'start', 'children']
+
+    def __init__(self, profiler, category, path_mover=None):
+        self.profiler = profiler
+        self.category = category
+        if path_mover is None:
+            self.mover = profiler._current_mover()
+        else:
+            self.mover = path_mover.name
+
+        self.start = None
+        self.children = 0.0
+
+    def __enter__(self):
+        self.profiler._stack.append(self)
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed = time.time() - self.start
+        stack = self.profiler._stack
+        stack.pop()
+        # time spent in nested blocks is counted there, not here
+        self.profiler._add(
+            self.mover, self.category, elapsed - self.children)
+        if stack:
+            stack[-1].children += elapsed
+
+        return False
+
+
+class MCProfiler(object):
+    """
+    Record where the time of a simulation is spent
+
+    Times are collected per MC step and per mover in the decision tree.
+    Each time is counted in exactly one category: time in nested blocks
+    (e.g., CV evaluation during the stopping condition checks) counts for
+    the inner block only. Time that is not in any of the timed blocks is
+    counted as `other`.
+
+    To profile a :class:`.PathSimulator`, set its `profiler` attribute.
+    Profiling only covers this process: moves run in worker processes
+    (`n_workers > 1`) are not profiled.
+
+    Parameters
+    ----------
+    output_stream : file or None
+        if given, each record is written to this stream as a line of JSON
+        as soon as its step is completed
+
+    Attributes
+    ----------
+    records : list of dict
+        one record per MC step and mover. Each record has the keys `step`,
+        `mover`, the times of all :attr:`categories` and `other` in
+        seconds, `total` and the number of generated frames `n_frames`.
+
+    Examples
+    --------
+    >>> profiler = MCProfiler(output_stream=open('profile.jsonl', 'w'))
+    >>> simulation.profiler = profiler
+    >>> simulation.run(100)
+    >>> profiler.dataframe.groupby('mover').sum()
+    """
+
+    categories = ['engine', 'ensemble', 'cv', 'shooting_point', 'storage']
+
+    def __init__(self, output_stream=None):
+        self.output_stream = output_stream
+        self.records = []
+        self._step = None
+        self._times = OrderedDict()
+        self._stack = []
+        self._previous = None
+
+    @property
+    def columns(self):
+        """list of str : the keys of each record"""
+        return (['step', 'mover'] + self.categories +
+                ['other', 'total', 'n_frames'])
+
+    def start(self):
+        """
+        Make this the active profiler of the current thread
+
+        Raises
+        ------
+        RuntimeError
+            if this profiler is already active
+        """
+        active = _active()
+        if self._previous is not None or active is self:
+            raise RuntimeError('MCProfiler is already active')
+
+        self._previous = active
+        _local.active = self
+
+    def stop(self):
+        """
+        Stop recording and make the previous profiler active again
+
+        Times recorded outside of any MC step are added as a record with
+        `step` `None`.
+        """
+        if _active() is not self:
+            raise RuntimeError('MCProfiler is not active')
+
+        self._flush()
+        _local.active = self._previous
+        self._previous = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    def step(self, step):
+        """
+        Context manager for a complete MC step
+
+        Parameters
+        ----------
+        step : int
+            the number of the MC step
+        """
+        return _Step(self, step)
+
+    @property
+    def dataframe(self):
+        """
+        :class:`pandas.DataFrame` : all records, one row per step and mover
+        """
+        import pandas as pd
+        return pd.DataFrame(self.records, columns=self.columns)
+
+    def _current_mover(self):
+        if self._stack:
+            return self._stack[-1].mover
+        return None
+
+    def _add(self, mover_name, key, value):
+        try:
+            times = self._times[mover_name]
+        except KeyError:
+            times = dict.fromkeys(self.categories + ['other'], 0.0)
+            times['n_frames'] = 0
+            self._times[mover_name] = times
+
+        times[key] += value
+
+    def _flush(self):
+        for (mover_name, times) in self._times.items():
+            record = OrderedDict([('step', self._step),
+                                  ('mover', mover_name)])
+            for category in self.categories + ['other']:
+                record[category] = times[category]
+
+            record['total'] = sum(record[category]
+                                  for category in self.categories + ['other'])
+            record['n_frames'] = times['n_frames']
+            self.records.append(record)
+            if self.output_stream is not None:
+                self.output_stream.write(json.dumps(record) + '\n')
+
+        self._times = OrderedDict()
+        if self.output_stream is not None:
+            self.output_stream.flush()
+
+
+class _Step(object):
+    """Context manager for a profiled MC step"""
+    def __init__(self, profiler, step):
+        self.profiler = profiler
+        self.step = step
+        self.frame = _Frame(profiler, 'other')
+
+    def __enter__(self):
+        # everything recorded so far was outside of this step
+        self.profiler._flush()
+        self.profiler._step = self.step
+        self.frame.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.frame.__exit__(exc_type, exc_value, traceback)
+        self.profiler._flush()
+        self.profiler._step = None
+        return False
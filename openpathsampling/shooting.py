@@ -3,13 +3,21 @@ import logging
 
 import numpy as np
 
-from openpathsampling.netcdfplus import StorableNamedObject
+from openpathsampling.netcdfplus import StorableNamedObject, LRUCache
 
 logger = logging.getLogger(__name__)
 init_log = logging.getLogger('openpathsampling.initialization')
 
 
 class ShootingPointSelector(StorableNamedObject):
+    # number of trajectories for which the biases are kept
+    bias_cache_size = 8
+
+    # if `True` the bias of a frame depends only on the snapshot and not on
+    # the trajectory it is part of. Biases of frames shared by two
+    # trajectories are then reused
+    snapshot_local_bias = False
+
     def __init__(self):
         super(ShootingPointSelector, self).__init__()
 
@@ -20,6 +28,17 @@ class ShootingPointSelector(StorableNamedObject):
         else:
             return None
 
+    @property
+    def _bias_cache(self):
+        # created lazily, so it also exists for selectors that do not call
+        # this __init__
+        try:
+            return self.__dict__['_bias_cache_lru']
+        except KeyError:
+            cache = LRUCache(self.bias_cache_size)
+            self.__dict__['_bias_cache_lru'] = cache
+            return cache
+
     def f(self, snapshot, trajectory):
         '''
         Returns the unnormalized proposal probability of a snapshot
@@ -39,6 +58,11 @@ class ShootingPointSelector(StorableNamedObject):
             return 0.0
 
     def probability_ratio(self, snapshot, old_trajectory, new_trajectory):
+        if self.snapshot_local_bias:
+            # compute only the biases of frames not in the old trajectory
+            self._cumulative_biases(old_trajectory)
+            self._cumulative_biases(new_trajectory, old_trajectory)
+
         p_old = self.probability(snapshot, old_trajectory)
         p_new = self.probability(snapshot, new_trajectory)
         return p_new / p_old
@@ -50,6 +74,75 @@ class ShootingPointSelector(StorableNamedObject):
         '''
         return [self.f(s, trajectory) for s in trajectory]
 
+    def _cumulative_biases(self, trajectory, reference=None):
+        '''
+        Returns the biases of all frames in trajectory and their cumulative sum
+
+        The arrays of the last used trajectories are cached.
+
+        Parameters
+        ----------
+        trajectory : :class:`openpathsampling.Trajectory`
+        reference : :class:`openpathsampling.Trajectory` or None
+            a trajectory that shares an initial and/or final part with
+            `trajectory`. If `snapshot_local_bias` is set and the biases of
+            `reference` are cached, they are reused for the shared frames
+
+        Returns
+        -------
+        biases : numpy.ndarray
+        cumulative : numpy.ndarray
+        '''
+        key = (trajectory.__uuid__, len(trajectory))
+        try:
+            return self._bias_cache[key]
+        except KeyError:
+            pass
+
+        ref_biases = None
+        if reference is not None and self.snapshot_local_bias:
+            try:
+                ref_biases = self._bias_cache[
+                    (reference.__uuid__, len(reference))][0]
+            except KeyError:
+                pass
+
+        if ref_biases is None:
+            biases = np.array(self._biases(trajectory), dtype=float)
+        else:
+            biases = self._biases_with_reference(
+                trajectory, reference, ref_biases)
+
+        result = (biases, np.cumsum(biases))
+        self._bias_cache[key] = result
+        return result
+
+    def _biases_with_reference(self, trajectory, reference, ref_biases):
+        frames = list(trajectory.iter_proxies())
+        ref_frames = list(reference.iter_proxies())
+        max_shared = min(len(frames), len(ref_frames))
+
+        n_head = 0
+        while n_head < max_shared and \
+                frames[n_head] == ref_frames[n_head]:
+            n_head += 1
+
+        n_tail = 0
+        while n_tail < max_shared - n_head and \
+                frames[-1 - n_tail] == ref_frames[-1 - n_tail]:
+            n_tail += 1
+
+        biases = np.empty(len(frames), dtype=float)
+        biases[:n_head] = ref_biases[:n_head]
+        if n_tail > 0:
+            biases[len(frames) - n_tail:] = ref_biases[-n_tail:]
+
+        n_stop = len(frames) - n_tail
+        if n_stop > n_head:
+            biases[n_head:n_stop] = self._biases(trajectory[n_head:n_stop])
+
+        return biases
+
     def sum_bias(self, trajectory):
         '''
         Returns the unnormalized probability probability of a trajectory.
@@ -65,8 +158,10 @@ class ShootingPointSelector(StorableNamedObject):
         only for the non-symmetric proposal of different snapshots is given
         by `probability(old_trajectory) / probability(new_trajectory)`
         '''
+        if len(trajectory) == 0:
+            return 0.0
 
-        return sum(self._biases(trajectory))
+        return float(self._cumulative_biases(trajectory)[1][-1])
 
     def pick(self, trajectory):
         '''
@@ -74,24 +169,21 @@ class ShootingPointSelector(StorableNamedObject):
         
         Notes
         -----
-        The native implementation is very slow. Simple picking algorithm
-        should override this function.
+        The cumulative biases are searched by bisection. Simple picking
+        algorithms should still override this function.
         '''
 
-        prob_list = self._biases(trajectory)
-        sum_bias = sum(prob_list)
+        cumulative = self._cumulative_biases(trajectory)[1]
 
-        rand = np.random.random() * sum_bias
-        idx = 0
-        prob = prob_list[0]
-        while prob <= rand and idx < len(prob_list):
-            idx += 1
-            prob += prob_list[idx]
+        rand = np.random.random() * cumulative[-1]
+        idx = int(np.searchsorted(cumulative, rand, side='right'))
 
-        return idx
+        return min(idx, len(cumulative) - 1)
 
 
 class GaussianBiasSelector(ShootingPointSelector):
+    snapshot_local_bias = True
+
     def __init__(self, collectivevariable, alpha=1.0, l_0=0.5):
         '''
         A Selector that biases according to a specified CollectiveVariable
@@ -106,6 +198,13 @@ class GaussianBiasSelector(ShootingPointSelector):
         l_s = self.collectivevariable(snapshot)
         return math.exp(-self.alpha * (l_s - self.l_0) ** 2)
 
+    def _biases(self, trajectory):
+        # evaluate the CV for the whole trajectory at once so that all
+        # missing values are computed in a single call
+        l_s = np.array(self.collectivevariable(trajectory), dtype=float)
+        l_s = l_s.reshape(len(trajectory))
+        return np.exp(-self.alpha * (l_s - self.l_0) ** 2).tolist()
+
 
 class UniformSelector(ShootingPointSelector):
     """
@@ -3,8 +3,12 @@ from .distributed import DistributedUUIDStorage, TrajectoryStorage
 from .stores import (
     MCStepStore, MoveChangeStore, SampleSetStore,
     SampleStore, TrajectoryStore, CVStore, PathSimulatorStore,
-    SnapshotWrapperStore)
+    SnapshotWrapperStore, FramePolicy, EveryNthFrame)
 
 from .storage import Storage, AnalysisStorage
 
+from .step_index import StepIndex
+
+from .writer import StorageWriter
+
 from .util import join_md_storage, split_md_storage
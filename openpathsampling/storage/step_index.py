@@ -0,0 +1,413 @@
+"""
+Columnar index of the MC steps and active samples in a storage
+
+The index is built from the raw variables of the stores of steps, sample
+sets, samples, move changes and trajectories. No :class:`.MCStep`,
+:class:`.SampleSet`, :class:`.Sample` or :class:`.Trajectory` objects are
+created, so analyses that only need the replica, ensemble, trajectory,
+path length, acceptance or mover of each step can run on a large file
+without loading it.
+"""
+from uuid import UUID
+
+import numpy as np
+
+from openpathsampling.netcdfplus import NetCDFPlus
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def _positions(store, uuids):
+    """Positions of the objects with the given UUID strings in `store`
+
+    Parameters
+    ----------
+    store : :class:`openpathsampling.netcdfplus.ObjectStore`
+        the store the UUIDs refer to
+    uuids : iterable of str
+        the raw UUID strings of an `obj.` variable; `None` is stored as
+        dashes
+
+    Returns
+    -------
+    np.array of int
+        the position in `store` of each object; -1 for `None` or objects
+        that are not in `store`
+    """
+    index = store.index
+    positions = np.array([
+        -1 if uuid[0] == '-' else index.get(int(UUID(uuid)), -1)
+        for uuid in uuids
+    ], dtype=int)
+    # negative positions mark objects that are not (yet) stored
+    positions[positions < 0] = -1
+    return positions
+
+
+def _vlen_positions(store, vlen_uuids):
+    """Positions for each entry of a variable length `obj.` variable"""
+    return [_positions(store, NetCDFPlus.to_uuid_chunks(uuids))
+            for uuids in vlen_uuids]
+
+
+class _GrowingArray(object):
+    """Array that can be extended in place; used for the index columns"""
+    def __init__(self, dtype=int):
+        self._data = np.zeros(16, dtype=dtype)
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self._data.dtype)
+        new_length = self._length + len(values)
+        if new_length > len(self._data):
+            data = np.zeros(max(new_length, 2 * len(self._data)),
+                            dtype=self._data.dtype)
+            data[:self._length] = self._data[:self._length]
+            self._data = data
+
+        self._data[self._length:new_length] = values
+        self._length = new_length
+
+    @property
+    def values(self):
+        """np.array : the current content (a view, do not modify)"""
+        return self._data[:self._length]
+
+
+class StepIndex(object):
+    """
+    Columnar index of the MC steps and active samples in a storage
+
+    The index has two tables of numpy arrays. The step table has one entry
+    per stored step (in the order of storage):
+
+    * `mccycle`: the MC cycle number of the step
+    * `accepted`: whether the active samples of the step differ from the
+      previous ones (for steps without previous sample set: whether there
+      are any active samples)
+    * `mover`: position in `storage.pathmovers` of the canonical mover of
+      the step's change (see :attr:`.MoveChange.canonical`), -1 if none
+
+    The sample table has one entry per active sample of each step:
+
+    * `step`: position of the step in the step table
+    * `sample`: position in `storage.samples`
+    * `replica`: the replica ID
+    * `ensemble`: position in `storage.ensembles`
+    * `trajectory`: position in `storage.trajectories`
+    * `length`: number of frames of the trajectory
+
+    Objects are referred to by their position in their store; the query
+    methods also accept the objects themselves. Call :meth:`.update` to
+    add steps that were saved after the index was built;
+    :attr:`.Storage.step_index` does this automatically.
+
+    Parameters
+    ----------
+    storage : :class:`.Storage`
+        the storage to index
+    """
+    step_columns = ['mccycle', 'accepted', 'mover']
+    sample_columns = ['step', 'sample', 'replica', 'ensemble', 'trajectory',
+                      'length']
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._steps = {
+            'mccycle': _GrowingArray(int),
+            'accepted': _GrowingArray(bool),
+            'mover': _GrowingArray(int)
+        }
+        self._samples = {col: _GrowingArray(int)
+                         for col in self.sample_columns}
+        # columns per stored object, to look up the references of steps
+        self._sample_table = {'replica': _GrowingArray(int),
+                              'ensemble': _GrowingArray(int),
+                              'trajectory': _GrowingArray(int)}
+        self._trajectory_lengths = _GrowingArray(int)
+        self._sampleset_samples = []
+        self._change_movers = _GrowingArray(int)
+        self._change_subchanges = []
+        self._canonical_movers = {}
+        self.update()
+
+    def __len__(self):
+        return len(self._steps['mccycle'])
+
+    @staticmethod
+    def _new_rows(store, n_known):
+        """Slice of the rows of `store` that are not indexed yet, or None"""
+        n_stored = len(store)
+        if n_stored > n_known:
+            return slice(n_known, n_stored)
+        return None
+
+    def _update_trajectories(self):
+        store = self.storage.trajectories
+        rows = self._new_rows(store, len(self._trajectory_lengths))
+        if rows is not None:
+            self._trajectory_lengths.extend([
+                len(uuids) // 36
+                for uuids in store.variables['snapshots'][rows]
+            ])
+
+    def _update_samples(self):
+        store = self.storage.samples
+        rows = self._new_rows(store, len(self._sample_table['replica']))
+        if rows is not None:
+            self._sample_table['replica'].extend(
+                store.variables['replica'][rows])
+            self._sample_table['ensemble'].extend(_positions(
+                self.storage.ensembles, store.variables['ensemble'][rows]))
+            self._sample_table['trajectory'].extend(_positions(
+                self.storage.trajectories,
+                store.variables['trajectory'][rows]
+            ))
+
+    def _update_samplesets(self):
+        store = self.storage.samplesets
+        rows = self._new_rows(store, len(self._sampleset_samples))
+        if rows is not None:
+            self._sampleset_samples.extend(_vlen_positions(
+                self.storage.samples, store.variables['samples'][rows]))
+
+    def _update_changes(self):
+        store = self.storage.movechanges
+        rows = self._new_rows(store, len(self._change_movers))
+        if rows is not None:
+            self._change_movers.extend(_positions(
+                self.storage.pathmovers, store.variables['mover'][rows]))
+            self._change_subchanges.extend(_vlen_positions(
+                store, store.variables['subchanges'][rows]))
+
+    def _is_canonical(self, mover):
+        # movers are few, so we just load them
+        if mover not in self._canonical_movers:
+            self._canonical_movers[mover] = (
+                mover >= 0
+                and self.storage.pathmovers.load(int(mover)).is_canonical
+                is True
+            )
+        return self._canonical_movers[mover]
+
+    def _canonical_mover(self, change):
+        """Mover of the canonical change; see `MoveChange.canonical`"""
+        movers = self._change_movers.values
+        subchanges = self._change_subchanges
+        while len(subchanges[change]) == 1 and subchanges[change][0] >= 0:
+            if self._is_canonical(movers[change]):
+                return movers[change]
+            change = subchanges[change][0]
+
+        return movers[change]
+
+    def update(self):
+        """
+        Add the steps that were saved since the last update
+
+        Only the new rows of each store are read.
+        """
+        store = self.storage.steps
+        rows = self._new_rows(store, len(self))
+        if rows is None:
+            return
+
+        self._update_trajectories()
+        self._update_samples()
+        self._update_samplesets()
+        self._update_changes()
+
+        samplesets = self.storage.samplesets
+        actives = _positions(samplesets, store.variables['active'][rows])
+        previouses = _positions(samplesets,
+                                store.variables['previous'][rows])
+        changes = _positions(self.storage.movechanges,
+                             store.variables['change'][rows])
+        self._steps['mccycle'].extend(store.variables['mccycle'][rows])
+
+        replicas = self._sample_table['replica'].values
+        ensembles = self._sample_table['ensemble'].values
+        trajectories = self._sample_table['trajectory'].values
+        lengths = self._trajectory_lengths.values
+        no_samples = np.zeros(0, dtype=int)
+        accepted = []
+        movers = []
+        for (n_step, active, previous, change) in zip(
+            range(rows.start, rows.stop), actives, previouses, changes
+        ):
+            samples = (self._sampleset_samples[active] if active >= 0
+                       else no_samples)
+            if previous >= 0:
+                previous_samples = self._sampleset_samples[previous]
+                accepted.append(set(samples.tolist())
+                                != set(previous_samples.tolist()))
+            else:
+                accepted.append(len(samples) > 0)
+
+            movers.append(self._canonical_mover(change) if change >= 0
+                          else -1)
+
+            trajectory = trajectories[samples]
+            self._samples['step'].extend(np.full(len(samples), n_step))
+            self._samples['sample'].extend(samples)
+            self._samples['replica'].extend(replicas[samples])
+            self._samples['ensemble'].extend(ensembles[samples])
+            self._samples['trajectory'].extend(trajectory)
+            self._samples['length'].extend(
+                np.where(trajectory >= 0, lengths[trajectory], 0))
+
+        self._steps['accepted'].extend(accepted)
+        self._steps['mover'].extend(movers)
+        logger.debug("StepIndex: " + str(len(accepted)) + " new steps")
+
+    def step_column(self, name):
+        """
+        Column of the step table
+
+        Parameters
+        ----------
+        name : str
+            one of :attr:`.step_columns`
+
+        Returns
+        -------
+        np.array
+            one entry per step
+        """
+        return self._steps[name].values
+
+    def sample_column(self, name):
+        """
+        Column of the sample table
+
+        Parameters
+        ----------
+        name : str
+            one of :attr:`.sample_columns`
+
+        Returns
+        -------
+        np.array
+            one entry per active sample of each step
+        """
+        return self._samples[name].values
+
+    def _position(self, store, obj):
+        if obj is None or isinstance(obj, (int, np.integer)):
+            return obj
+        return store.index[obj.__uuid__]
+
+    def sample_mask(self, replica=None, ensemble=None, steps=None):
+        """
+        Select entries of the sample table
+
+        Parameters
+        ----------
+        replica : int or None
+            only samples of this replica
+        ensemble : :class:`.Ensemble` or int or None
+            only samples in this ensemble (or ensemble position)
+        steps : slice or array of int or None
+            only samples of these steps (positions in the step table)
+
+        Returns
+        -------
+        np.array of bool
+            mask for the columns of the sample table
+        """
+        mask = np.ones(len(self._samples['step']), dtype=bool)
+        if replica is not None:
+            mask &= self.sample_column('replica') == replica
+        if ensemble is not None:
+            ensemble = self._position(self.storage.ensembles, ensemble)
+            mask &= self.sample_column('ensemble') == ensemble
+        if steps is not None:
+            selected = np.zeros(len(self), dtype=bool)
+            selected[steps] = True
+            mask &= selected[self.sample_column('step')]
+        return mask
+
+    def path_lengths(self, ensemble, steps=None):
+        """
+        Lengths of the active trajectories in an ensemble
+
+        Parameters
+        ----------
+        ensemble : :class:`.Ensemble` or int
+            the ensemble (or its position in the storage)
+        steps : slice or array of int or None
+            only these steps; default all
+
+        Returns
+        -------
+        np.array of int
+            the length of the active trajectory of `ensemble`, for each
+            step that has one
+        """
+        mask = self.sample_mask(ensemble=ensemble, steps=steps)
+        return self.sample_column('length')[mask]
+
+    def replica_ensembles(self, replica):
+        """
+        Ensemble of a replica at each step
+
+        Parameters
+        ----------
+        replica : int
+            the replica ID
+
+        Returns
+        -------
+        np.array of int
+            the position of the ensemble of `replica` in
+            `storage.ensembles`, for each step that has `replica`
+        """
+        mask = self.sample_mask(replica=replica)
+        return self.sample_column('ensemble')[mask]
+
+    def step_mask(self, mover=None, accepted=None):
+        """
+        Select entries of the step table
+
+        Parameters
+        ----------
+        mover : :class:`.PathMover` or int or None
+            only steps with this canonical mover (or mover position)
+        accepted : bool or None
+            only accepted (True) or rejected (False) steps
+
+        Returns
+        -------
+        np.array of bool
+            mask for the columns of the step table
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if mover is not None:
+            mover = self._position(self.storage.pathmovers, mover)
+            mask &= self.step_column('mover') == mover
+        if accepted is not None:
+            mask &= self.step_column('accepted') == accepted
+        return mask
+
+    def acceptance(self):
+        """
+        Number of trials and acceptances per canonical mover
+
+        Returns
+        -------
+        dict
+            maps the position of each mover in `storage.pathmovers` to the
+            tuple (number of accepted steps, number of steps)
+        """
+        movers = self.step_column('mover')
+        accepted = self.step_column('accepted')
+        counts = {}
+        for mover in np.unique(movers):
+            mask = movers == mover
+            counts[int(mover)] = (int(accepted[mask].sum()),
+                                  int(mask.sum()))
+        return counts
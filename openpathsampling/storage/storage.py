@@ -12,6 +12,7 @@ from openpathsampling.netcdfplus import NetCDFPlus, WeakLRUCache, ObjectStore, \
     ImmutableDictStore, NamedObjectStore
 
 from .stores import SnapshotWrapperStore
+from .step_index import StepIndex
 
 import openpathsampling.engines as peng
 
@@ -41,7 +42,8 @@ class Storage(NetCDFPlus):
             filename,
             mode=None,
             template=None,
-            fallback=None):
+            fallback=None,
+            coordinate_precision=None):
         """
         Create a netCDF+ storage for OPS Objects
 
@@ -55,9 +57,17 @@ class Storage(NetCDFPlus):
         template : :class:`openpathsampling.Snapshot`
             a Snapshot instance that contains a reference to a Topology, the
             number of atoms and used units
+        coordinate_precision : int or None
+            if not `None` snapshot coordinates are stored compressed and
+            rounded to `10**-coordinate_precision` nanometers, e.g. `3` keeps
+            0.001 nm. Only used when the snapshot stores are created, an
+            existing file keeps the mode it was created with. Velocities are
+            always stored with full (single) precision
         """
 
         self._template = template
+        self.coordinate_precision = coordinate_precision
+        self._step_index = None
         super(Storage, self).__init__(
             filename,
             mode,
@@ -123,6 +133,20 @@ class Storage(NetCDFPlus):
     def tags(self):
         return self.tag
 
+    @property
+    def step_index(self):
+        """
+        :class:`.StepIndex` : columnar index of all stored steps
+
+        The index is built on first use and updated with the steps saved
+        since then on each access.
+        """
+        if self._step_index is None:
+            self._step_index = StepIndex(self)
+        else:
+            self._step_index.update()
+        return self._step_index
+
     def write_meta(self):
         self.setncattr('storage_format', 'openpathsampling')
         self.setncattr('storage_version', paths.version.version)
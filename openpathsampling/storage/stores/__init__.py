@@ -5,5 +5,5 @@ from .sample import SampleSetStore, SampleStore
 # from snapshot_value import SnapshotValueStore
 # from snapshot_feature import FeatureSnapshotStore
 from .snapshot_wrapper import SnapshotWrapperStore
-from .trajectory import TrajectoryStore
+from .trajectory import TrajectoryStore, FramePolicy, EveryNthFrame
 from .pathsimulator import PathSimulatorStore
@@ -17,6 +17,10 @@ class CVStore(UniqueNamedObjectStore):
         if cv.diskcache_enabled:
             self.add_diskcache(cv)
 
+        if self.storage.trajectories.frame_policy is not None:
+            # values of mentioned frames are only found in a complete cache
+            self.storage.trajectories.complete_cv_cache(cv)
+
     def _load(self, idx):
         op = self.vars['json'][idx]
 
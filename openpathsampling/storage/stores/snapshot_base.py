@@ -3,7 +3,7 @@ import logging
 from uuid import UUID
 
 import openpathsampling.engines as peng
-from openpathsampling.netcdfplus import IndexedObjectStore
+from openpathsampling.netcdfplus import IndexedObjectStore, synchronized
 
 logger = logging.getLogger(__name__)
 init_log = logging.getLogger('openpathsampling.initialization')
@@ -79,6 +79,7 @@ class BaseSnapshotStore(IndexedObjectStore):
             'descriptor': self.descriptor,
         }
 
+    @synchronized
     def load(self, idx):
         pos = idx // 2
 
@@ -121,6 +122,7 @@ class BaseSnapshotStore(IndexedObjectStore):
         self._get(st_idx, obj)
         return obj
 
+    @synchronized
     def save(self, obj, idx=None):
         pos = idx // 2
 
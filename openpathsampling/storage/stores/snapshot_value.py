@@ -2,7 +2,7 @@ import logging
 
 import openpathsampling.engines as peng
 from openpathsampling.netcdfplus import ObjectStore, \
-    LRUChunkLoadingCache
+    LRUChunkLoadingCache, synchronized
 
 logger = logging.getLogger(__name__)
 init_log = logging.getLogger('openpathsampling.initialization')
@@ -51,6 +51,7 @@ class SnapshotValueStore(ObjectStore):
     # LOAD/SAVE DECORATORS FOR CACHE HANDLING
     # ==========================================================================
 
+    @synchronized
     def load(self, idx):
         pos = self.snapshot_pos(idx)
         # print idx.__uuid__ in self.storage.stores['snapshots'].index
@@ -146,6 +147,7 @@ class SnapshotValueStore(ObjectStore):
         )
         self.cache.update_size()
 
+    @synchronized
     def __getitem__(self, item):
         # enable numpy style selection of objects in the store
         try:
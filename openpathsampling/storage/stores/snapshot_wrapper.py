@@ -1,9 +1,15 @@
 import logging
+import time
 from uuid import UUID
 
+import numpy as np
+
+import openpathsampling as paths
 import openpathsampling.engines as peng
-from openpathsampling.netcdfplus import ObjectStore, with_timing_logging, \
-    NetCDFPlus, LoaderProxy
+from openpathsampling.netcdfplus import ObjectStore, \
+    NetCDFPlus, LoaderProxy, synchronized
+
+from openpathsampling.netcdfplus.stores.object import LazyHashedList
 
 from .snapshot_feature import FeatureSnapshotStore
 from .snapshot_value import SnapshotValueStore
@@ -77,10 +83,95 @@ class ReversalHashedList(dict):
         return self._list
 
 
+class LazyReversalHashedList(LazyHashedList):
+    """
+    A :class:`ReversalHashedList` that reads the stored UUIDs lazily
+
+    A snapshot and its reversed copy share one entry, see
+    :class:`openpathsampling.netcdfplus.stores.object.LazyHashedList`.
+    """
+    def _lookup(self, key):
+        k = key & ~1
+        try:
+            return self._dict[k] ^ (key & 1)
+        except KeyError:
+            pass
+
+        if self._column is None or k in self._deleted:
+            return None
+
+        # the file holds the UUID of the saved one of both copies
+        pos = self._column.find(k)
+        value = None if pos is None else 2 * pos
+        pos = self._column.find(k | 1)
+        if pos is not None and (value is None or 2 * pos > value):
+            value = 2 * pos ^ 1
+
+        if value is None:
+            return None
+
+        return value ^ (key & 1)
+
+    def __len__(self):
+        return 2 * (self._n_column + len(self._tail))
+
+    def append(self, key):
+        self._dict[key & ~1] = len(self) ^ (key & 1)
+        self._tail.append(key)
+
+    def __setitem__(self, key, value):
+        # we will always store the ones with even keys
+        self._dict[key & ~1] = value ^ (key & 1)
+        # we will always store the ones with even value
+        self._set_position(value // 2, key ^ (value & 1))
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+
+        k = key & ~1
+        self._dict.pop(k, None)
+        if self._column is not None:
+            self._deleted.add(k)
+
+    def index(self, key):
+        return super(LazyReversalHashedList, self).index(key // 2) ^ (key & 1)
+
+    def mark(self, key):
+        k = key & ~1
+        if k not in self:
+            self._dict[k] = -2
+
+    def unmark(self, key):
+        k = key & ~1
+        if k in self:
+            del self[k]
+
+    def _column_items(self):
+        if self._column is None:
+            return []
+
+        return [(key & ~1, 2 * pos ^ (key & 1))
+                for pos, key in enumerate(self._column.uuids())
+                if key is not None]
+
+
 class SnapshotWrapperStore(ObjectStore):
     """
     A Store to store arbitrary snapshots
     """
+
+    # number of stored snapshots processed at once by `complete_cv`
+    complete_chunksize = 4096
+
+    # features kept in containers that are shared by a snapshot and its
+    # reversed copy; the flag tells if a snapshot sees the negated values
+    bulk_sign_flags = {'velocities': 'is_reversed'}
+
+    # rows of a variable this close to each other are read in one slice by
+    # `feature_as_numpy`
+    bulk_read_gap = 16
+
     def __init__(self):
         super(SnapshotWrapperStore, self).__init__(
             peng.BaseSnapshot,
@@ -115,6 +206,7 @@ class SnapshotWrapperStore(ObjectStore):
 
         self._treat_missing_snapshot_type = value
 
+    @synchronized
     def load(self, idx):
         """
         Returns an object from the storage.
@@ -219,8 +311,13 @@ class SnapshotWrapperStore(ObjectStore):
             elif self.storage.fallback is not None:
                 return self.storage.fallback.snapshots.load(idx)
             else:
-                raise KeyError(
-                    '%s not found in storage or fallback' % idx)
+                # not a KeyError, which a LoaderProxy would replace by a
+                # generic message
+                raise RuntimeError(
+                    ('Snapshot %s is only mentioned in the storage, e.g. '
+                     'as a frame not selected by the `frame_policy` of the '
+                     'trajectory store, and not found in a fallback. Its '
+                     'features were not saved.') % idx)
         else:
             store = self.store_snapshot_list[store_idx]
             snap = store[int(idx)]
@@ -305,9 +402,9 @@ class SnapshotWrapperStore(ObjectStore):
 
         self.load_indices()
 
-    @with_timing_logging
     def load_indices(self):
-        self.index.extend(self.vars['uuid'][:])
+        # the stored UUIDs are only read once the index is used
+        self.index.attach(self.variables['uuid'])
 
     def get_cv_cache(self, idx):
         store_name = SnapshotWrapperStore._get_cv_name(idx)
@@ -318,6 +415,121 @@ class SnapshotWrapperStore(ObjectStore):
         else:
             return None
 
+    @synchronized
+    def feature_as_numpy(self, name, indices):
+        """
+        Read a numpy feature of many stored snapshots at once
+
+        The values are read directly from the netCDF variables without
+        loading any snapshot or container object. Only the rows of the
+        requested snapshots are read, see :meth:`_read_rows`.
+
+        Parameters
+        ----------
+        name : str
+            the name of the feature, e.g. `coordinates` or `velocities`
+        indices : list of int
+            the indices of the snapshots in this store, e.g. as returned by
+            :meth:`TrajectoryStore.snapshot_indices`
+
+        Returns
+        -------
+        numpy.ndarray or None
+            a read-only array of shape `(len(indices), ...)` without units.
+            `None` if the values cannot be read in bulk, e.g. because the
+            snapshots are of different types, are only stored in a fallback
+            storage or `name` is not a stored numpy feature.
+        """
+        if len(indices) == 0:
+            return None
+
+        indices = np.asarray(indices)
+        reversed_frames = (indices & 1).astype(bool)
+        pos = indices // 2
+
+        unique_pos, pos_inverse = np.unique(pos, return_inverse=True)
+        store_idxs = np.unique(
+            self._read_rows(self.variables['store'], unique_pos))
+        if len(store_idxs) != 1 or store_idxs[0] < 0:
+            return None
+
+        store = self.store_snapshot_list[int(store_idxs[0])]
+        rows = np.array([store.index[p] for p in unique_pos])[pos_inverse]
+        features = store.snapshot_class.__features__
+
+        if name in features.numpy:
+            values = self._read_rows(store.variables[name], rows)
+            if name in features.minus:
+                values[reversed_frames] *= -1
+
+        else:
+            for lazy in features.lazy:
+                container = store.vars[lazy].store
+                var_name = container.prefix + '_' + name
+                if var_name in self.storage.variables:
+                    break
+            else:
+                return None
+
+            unique_rows, rows_inverse = np.unique(rows, return_inverse=True)
+            uuids = [
+                str(uuid)
+                for uuid in self._read_rows(store.variables[lazy], unique_rows)
+            ]
+            if any(uuid[0] == '-' for uuid in uuids):
+                return None
+
+            container_rows = np.array([
+                container.index[int(UUID(uuid))] for uuid in uuids
+            ])[rows_inverse]
+            values = self._read_rows(
+                self.storage.variables[var_name], container_rows)
+
+            flag = self.bulk_sign_flags.get(name)
+            if flag is not None:
+                flags = np.asarray(
+                    self._read_rows(store.variables[flag], unique_rows),
+                    dtype=bool)
+                negate = flags[rows_inverse] ^ reversed_frames
+                values[negate] *= -1
+
+        values.setflags(write=False)
+        return values
+
+    def _read_rows(self, variable, rows):
+        """
+        Read the given rows of a netCDF variable
+
+        The rows are sorted and read as slices over runs of nearby rows:
+        rows that are at most `bulk_read_gap` apart are read in one slice,
+        otherwise a new slice is started. So only the needed rows and short
+        gaps are read, and string variables, which cannot be read with an
+        index list, work as well.
+
+        Parameters
+        ----------
+        variable : netCDF4.Variable
+            the variable to read from
+        rows : list of int
+            the rows to read, in any order and with repetitions
+
+        Returns
+        -------
+        numpy.ndarray
+            the values of the rows in the order of `rows`
+        """
+        unique_rows, inverse = np.unique(rows, return_inverse=True)
+        breaks = np.flatnonzero(
+            np.diff(unique_rows) > self.bulk_read_gap) + 1
+        parts = []
+        for run in np.split(unique_rows, breaks):
+            first = int(run[0])
+            block = np.asarray(variable[first:int(run[-1]) + 1])
+            parts.append(block[run - first])
+
+        return np.concatenate(parts)[inverse]
+
+    @synchronized
     def mention(self, snapshot):
         """
         Save a shallow copy
@@ -339,6 +551,7 @@ class SnapshotWrapperStore(ObjectStore):
         self.only_mention = current_mention
         return ref
 
+    @synchronized
     def save(self, obj, idx=None):
         n_idx = self.index.get(obj.__uuid__)
 
@@ -422,6 +635,35 @@ class SnapshotWrapperStore(ObjectStore):
                     )
                 )
 
+    def _auto_complete_snapshots(self, snapshots):
+        """
+        Compute values of complete CVs for snapshots that are about to be saved
+
+        Each CV is called once with all new snapshots that have no cached
+        value and the results are put into the CV caches. Saving the
+        single snapshots then finds the values in the cache.
+
+        Parameters
+        ----------
+        snapshots : iterable of :obj:`openpathsampling.engines.BaseSnapshot`
+            the snapshots to be saved; proxies are already stored and
+            will be skipped
+        """
+        new = [snap for snap in snapshots
+               if type(snap) is not LoaderProxy and
+               self.index.get(snap.__uuid__) is None]
+
+        if not new:
+            return
+
+        for cv, (cv_store, cv_idx) in self.cv_list.items():
+            if not cv_store.allow_incomplete and cv._eval_dict:
+                cache_dict = cv._cache_dict
+                missing = cache_dict._unique(
+                    [snap for snap in new if cache_dict._get(snap) is None])
+                if missing:
+                    cache_dict._set_list(missing, cv._eval_dict(missing))
+
     def _auto_complete_single_snapshot(self, obj, pos):
         for cv, (cv_store, cv_idx) in self.cv_list.items():
             if not cv_store.allow_incomplete:
@@ -443,87 +685,133 @@ class SnapshotWrapperStore(ObjectStore):
                         cv_store.vars['value'][n_idx] = value
                         cv_store.cache[n_idx] = value
 
-    def complete_cv(self, cv):
+    def complete_cv(self, cv, chunksize=None, output_stream=None):
         """
         Compute all missing values of a CV and store them
 
+        The stored snapshots are processed in chunks, so only the UUIDs,
+        snapshots and values of one chunk are in memory at a time. Missing
+        values of a chunk are computed in a single call to the CV, so CVs
+        with `cv_requires_lists` get all snapshots of a chunk at once.
 
         Parameters
         ----------
         cv : :obj:`openpathsampling.CollectiveVariable`
-
-
+        chunksize : int or None
+            the number of stored snapshots (without their reversed copies)
+            processed at once. If `None` (default) the
+            `complete_chunksize` of this store is used
+        output_stream : file or None
+            if not `None`, the progress is written to this stream after
+            each chunk
         """
         if cv not in self.cv_list:
             return
 
         cv_store = self.cv_list[cv][0]
 
-        if cv_store.allow_incomplete:
-            # for complete this does not make sense
+        # for complete this does not make sense
+        if not cv_store.allow_incomplete:
+            return
 
-            # TODO: Make better looping over this to not have
-            # to load all the indices at once
-            # can be problematic for 10M+ stored snapshots
-            indices = self.vars['uuid'][:]
+        if chunksize is None:
+            chunksize = self.complete_chunksize
 
-            for pos, idx in enumerate(indices):
+        n_total = len(self.storage.dimensions[self.prefix])
+        initial_time = time.time()
+
+        for start in range(0, n_total, chunksize):
+            stop = min(start + chunksize, n_total)
+            uuids = self.vars['uuid'][start:stop]
+
+            # collect the (cv store position, snapshot) that are missing
+            missing = []
+            for (pos, uuid) in enumerate(uuids, start):
                 if not cv_store.time_reversible:
                     pos *= 2
 
                 proxy = None
-
                 if pos not in cv_store.index:
-                    # this value is not stored to go ahead
-
-                    proxy = self.storage.snapshots[idx]
-
-                    # get from cache first, this is fastest
-                    value = cv._cache_dict._get(proxy)
-
-                    if value is None:
-                        # not in cache so compute it if possible
-                        if cv._eval_dict:
-                            value = cv._eval_dict([proxy])[0]
-                        else:
-                            value = None
-
-                    if value is not None:
-                        n_idx = cv_store.free()
-
-                        cv_store.vars['value'][n_idx] = value
-                        cv_store.vars['index'][n_idx] = pos
-                        cv_store.index[pos] = n_idx
-                        cv_store.cache[n_idx] = value
+                    proxy = self.storage.snapshots[uuid]
+                    missing.append((pos, proxy))
 
                 if not cv_store.time_reversible:
                     pos += 1
                     if pos not in cv_store.index:
                         if proxy is None:
-                            proxy = self.storage.snapshots[idx]
+                            proxy = self.storage.snapshots[uuid]
 
                         if proxy._reversed is not None:
                             proxy = proxy._reversed
                         else:
                             proxy = proxy.reversed
 
-                        # get from cache first, this is fastest
-                        value = cv._cache_dict._get(proxy)
+                        missing.append((pos, proxy))
+
+            self._complete_cv_values(cv, cv_store, missing)
+
+            logger.info('Completed CV %s for %d of %d snapshots',
+                        cv.name, stop, n_total)
+            if output_stream is not None:
+                paths.tools.refresh_output(
+                    "Completing CV " + cv.name + "\n" +
+                    paths.tools.progress_string(
+                        stop, n_total, time.time() - initial_time),
+                    output_stream=output_stream
+                )
+
+    @staticmethod
+    def _complete_cv_values(cv, cv_store, missing):
+        """
+        Compute and store values of a CV for a list of snapshots
+
+        Values are taken from the CV cache where possible, all others are
+        evaluated at once. The values are appended to the (incomplete) CV
+        store, using slice assignment where the value type allows it.
+
+        Parameters
+        ----------
+        cv : :obj:`openpathsampling.CollectiveVariable`
+        cv_store : :obj:`SnapshotValueStore`
+            the incomplete store of the CV
+        missing : list of (int, :obj:`openpathsampling.engines.BaseSnapshot`)
+            the position in `cv_store` and the snapshot of each missing value
+        """
+        # get from cache first, this is fastest
+        values = [cv._cache_dict._get(proxy) for (pos, proxy) in missing]
 
-                        if value is None:
-                            # not in cache so compute it if possible
-                            if cv._eval_dict:
-                                value = cv._eval_dict([proxy])[0]
-                            else:
-                                value = None
+        to_eval = [i for (i, value) in enumerate(values) if value is None]
+        if to_eval and cv._eval_dict:
+            # not in cache so compute it
+            evaluated = cv._eval_dict([missing[i][1] for i in to_eval])
+            for (i, value) in zip(to_eval, evaluated):
+                values[i] = value
 
-                        if value is not None:
-                            n_idx = cv_store.free()
+        positions = [pos for ((pos, proxy), value) in zip(missing, values)
+                     if value is not None]
+        values = [value for value in values if value is not None]
 
-                            cv_store.vars['value'][n_idx] = value
-                            cv_store.vars['index'][n_idx] = pos
-                            cv_store.index[pos] = n_idx
-                            cv_store.cache[n_idx] = value
+        if not values:
+            return
+
+        n_start = cv_store.free()
+        n_stop = n_start + len(values)
+
+        value_var = cv_store.variables['value']
+        if not hasattr(value_var, 'unit_simtk') and (
+                value_var.var_type in ['float', 'int', 'bool'] or
+                value_var.var_type.startswith('numpy.')):
+            cv_store.vars['value'][n_start:n_stop] = values
+        else:
+            for (n_idx, value) in enumerate(values, n_start):
+                cv_store.vars['value'][n_idx] = value
+
+        cv_store.vars['index'][n_start:n_stop] = positions
+
+        for (n_idx, pos, value) in zip(range(n_start, n_stop),
+                                       positions, values):
+            cv_store.index[pos] = n_idx
+            cv_store.cache[n_idx] = value
 
     def sync_cv(self, cv):
         """
@@ -544,10 +832,10 @@ class SnapshotWrapperStore(ObjectStore):
         # for complete this does not make sense
         if cv_store.allow_incomplete:
 
-            # loop all objects in the fast CV cache
-            for obj, value in cv._cache_dict.cache.items():
+            # loop all objects in the fast CV cache, which are keyed by UUID
+            for uuid, value in cv._cache_dict.cache.items():
                 if value is not None:
-                    pos = self.pos(obj)
+                    pos = self.index.get(uuid)
 
                     # if the snapshot is not saved, nothing we can do
                     if pos is None:
@@ -707,6 +995,8 @@ class SnapshotWrapperStore(ObjectStore):
         if not allow_incomplete:
 
             indices = self.vars['uuid'][:]
+            has_fallback = (self.fallback_store is not None or
+                            self.storage.fallback is not None)
 
             for pos, idx in enumerate(indices):
 
@@ -714,8 +1004,10 @@ class SnapshotWrapperStore(ObjectStore):
                 value = cv._cache_dict._get(proxy)
 
                 if value is None:
-                    # not in cache so compute it if possible
-                    if cv._eval_dict:
+                    # not in cache so compute it if possible. Snapshots that
+                    # are only mentioned cannot be loaded to compute it
+                    mentioned = int(self.variables['store'][pos]) < 0
+                    if cv._eval_dict and (has_fallback or not mentioned):
                         value = cv._eval_dict([proxy])[0]
                     else:
                         value = None
@@ -728,7 +1020,7 @@ class SnapshotWrapperStore(ObjectStore):
         return store, store_idx
 
     def create_uuid_index(self):
-        return ReversalHashedList()
+        return LazyReversalHashedList()
 
     def _get_id(self, idx, obj):
         uuid = self.index.index(int(idx))
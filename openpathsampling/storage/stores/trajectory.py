@@ -1,23 +1,220 @@
+import logging
+from uuid import UUID
+
 from openpathsampling.engines.trajectory import Trajectory
-from openpathsampling.netcdfplus import ObjectStore, LoaderProxy
+from openpathsampling.netcdfplus import (ObjectStore, LoaderProxy, NetCDFPlus,
+                                         synchronized)
+
+logger = logging.getLogger(__name__)
+
+
+class FramePolicy(object):
+    """
+    Selects the frames of a trajectory that are saved with all features
+
+    The other frames of a trajectory are only mentioned: their UUIDs and the
+    values of complete CVs are stored, but not their coordinates or
+    velocities. This base class selects all frames, which is the same as
+    not setting a policy (`TrajectoryStore.frame_policy = None`, the
+    default).
+
+    A mentioned snapshot is stored with all features as soon as it is saved
+    again by itself, e.g. as the shooting snapshot in the details of a move.
+    Note that mentioned frames cannot be loaded from the file, so a
+    simulation can only be continued from fully stored frames.
+    """
+
+    def full_frames(self, trajectory):
+        """
+        The frames to be saved with all features
+
+        Parameters
+        ----------
+        trajectory : :class:`openpathsampling.Trajectory`
+            the trajectory to be saved
+
+        Returns
+        -------
+        list of int
+            the frame numbers in increasing order
+        """
+        return list(range(len(trajectory)))
+
+
+class EveryNthFrame(FramePolicy):
+    """
+    Save every n-th frame of a trajectory with all features
+
+    Parameters
+    ----------
+    n : int
+        the stride, frames `0, n, 2n, ...` are saved
+    endpoints : bool
+        if `True` (default) the last frame is saved, too
+
+    Notes
+    -----
+    The CV values of the frames that are only mentioned can only be read
+    from the disk cache of the CV. While a policy is set, every stored CV
+    gets a complete disk cache, as with
+    `cv.with_diskcache(allow_incomplete=False)`. CVs that are not time
+    reversible or that already have an incomplete disk cache only keep the
+    values that are synced explicitly; a warning is logged for them.
+
+    Examples
+    --------
+    >>> storage.trajectories.frame_policy = EveryNthFrame(10)
+    >>> # all stored CVs now have complete disk caches, so after reopening
+    >>> # the file the CV values of all frames are available
+    >>> storage.cvs['x'](storage.trajectories[0])
+    """
+
+    def __init__(self, n, endpoints=True):
+        if n < 1:
+            raise ValueError('The stride must be at least 1, not %d' % n)
+
+        self.n = n
+        self.endpoints = endpoints
+
+    def full_frames(self, trajectory):
+        n_frames = len(trajectory)
+        frames = list(range(0, n_frames, self.n))
+        if self.endpoints and n_frames > 0 and frames[-1] != n_frames - 1:
+            frames.append(n_frames - 1)
+
+        return frames
 
 
 class TrajectoryStore(ObjectStore):
+    """
+    ObjectStore to save and load trajectories
+
+    Attributes
+    ----------
+    frame_policy : :class:`FramePolicy` or None
+        if not `None`, only the frames it selects are saved with all
+        features and all other frames are only mentioned. A reloaded
+        trajectory still has all its frames, but a mentioned frame cannot
+        be loaded: accessing it raises a `RuntimeError`, unless the snapshot
+        can be found in a fallback storage. Use
+        :meth:`snapshot_indices` or stored CV values for these frames. While
+        a policy is set, all stored CVs get a complete disk cache.
+    """
     def __init__(self):
         super(TrajectoryStore, self).__init__(Trajectory)
 
+        # if not `None` a `FramePolicy` that selects the frames saved with
+        # all features, all others are only mentioned
+        self._frame_policy = None
+
+        # CVs without a complete disk cache that we already warned about
+        self._incomplete_cvs = set()
+
+    @property
+    def frame_policy(self):
+        return self._frame_policy
+
+    @frame_policy.setter
+    def frame_policy(self, value):
+        self._frame_policy = value
+        if value is not None and self._storage is not None:
+            self.complete_cv_caches()
+
     def to_dict(self):
         return {}
 
+    @synchronized
+    def complete_cv_caches(self, template=None):
+        """
+        Add a complete disk cache to every stored CV that has none
+
+        The CV values of snapshots that are only mentioned are only
+        available from the disk cache, so this is done whenever a
+        `frame_policy` is set and before each trajectory is saved with it.
+
+        Parameters
+        ----------
+        template : :obj:`openpathsampling.engines.BaseSnapshot` or None
+            a snapshot to determine type and shape of the CV values. If
+            `None` the template of the CV or the first stored snapshot is
+            used; CVs without either are skipped for now
+        """
+        for cv in self.storage.cvs:
+            self.complete_cv_cache(cv, template)
+
+    @synchronized
+    def complete_cv_cache(self, cv, template=None):
+        """
+        Add a complete disk cache to a stored CV that has none
+
+        Parameters
+        ----------
+        cv : :obj:`openpathsampling.CollectiveVariable`
+            the CV, which must be saved in this storage
+        template : :obj:`openpathsampling.engines.BaseSnapshot` or None
+            a snapshot to determine type and shape of the CV values
+        """
+        snapshots = self.storage.snapshots
+        if cv in snapshots.cv_list:
+            if snapshots.cv_list[cv][0].allow_incomplete:
+                self._warn_incomplete(cv)
+        elif not cv.cv_time_reversible:
+            # only time reversible CVs can have a complete disk cache
+            self._warn_incomplete(cv)
+        elif (template is not None or cv.diskcache_template is not None
+              or len(snapshots) > 0):
+            cv.diskcache_enabled = True
+            cv.diskcache_allow_incomplete = False
+            self.storage.cvs.add_diskcache(
+                cv, template=template, allow_incomplete=False)
+
+    def _warn_incomplete(self, cv):
+        if cv not in self._incomplete_cvs:
+            self._incomplete_cvs.add(cv)
+            logger.warning(
+                ('CV `%s` has no complete disk cache. Its values for frames '
+                 'that the `frame_policy` only mentions are only stored if '
+                 'they are synced with `storage.cvs.sync`; otherwise they '
+                 'cannot be computed after reloading.') % cv.name)
+
     def _save(self, trajectory, idx):
-        self.vars['snapshots'][idx] = trajectory
         store = self.storage.snapshots
 
+        if self.frame_policy is not None and len(trajectory) > 0:
+            self.complete_cv_caches(template=trajectory[0])
+
+        # compute the CV values of all new snapshots at once, before they
+        # are saved one by one
+        store._auto_complete_snapshots(trajectory.iter_proxies())
+
+        if self.frame_policy is None or store.only_mention:
+            full_frames = None
+            self.vars['snapshots'][idx] = trajectory
+        else:
+            full_frames = set(self.frame_policy.full_frames(trajectory))
+            proxies = list(trajectory.iter_proxies())
+            for frame in sorted(full_frames):
+                store.save(proxies[frame])
+
+            # the frames saved above are found, all others are mentioned.
+            # `save` holds the storage lock, so a `StorageWriter` thread
+            # never sees the changed flag.
+            store.only_mention = True
+            try:
+                self.vars['snapshots'][idx] = trajectory
+            finally:
+                store.only_mention = False
+
         for frame, snapshot in enumerate(trajectory.iter_proxies()):
             if type(snapshot) is not LoaderProxy:
+                if full_frames is not None and frame not in full_frames:
+                    # mentioned snapshots cannot be loaded, keep them
+                    continue
+
                 loader = store.proxy(snapshot)
                 trajectory[frame] = loader
 
+    @synchronized
     def mention(self, trajectory):
         """
         Save a trajectory and store its snapshots only shallow
@@ -34,8 +231,10 @@ class TrajectoryStore(ObjectStore):
         snap_store = self.storage.snapshots
         current_mention = snap_store.only_mention
         snap_store.only_mention = True
-        self.save(trajectory)
-        snap_store.only_mention = current_mention
+        try:
+            self.save(trajectory)
+        finally:
+            snap_store.only_mention = current_mention
 
     def _load(self, idx):
         trajectory = Trajectory(self.vars['snapshots'][idx])
@@ -89,12 +288,15 @@ class TrajectoryStore(ObjectStore):
         Returns
         -------
         list of int
-            trajectory indices
+            the indices of the frames in the snapshot store
 
         """
-
-        # get the values
-        return self.variables['snapshots'][idx].tolist()
+        snapshots = self.storage.snapshots
+        return [
+            snapshots.index[int(UUID(uuid))]
+            for uuid in NetCDFPlus.to_uuid_chunks(
+                self.variables['snapshots'][idx])
+        ]
 
     def iter_snapshot_indices(self):
         """
@@ -0,0 +1,152 @@
+import logging
+import sys
+import threading
+
+from future.utils import raise_
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+logger = logging.getLogger(__name__)
+
+
+class StorageWriter(object):
+    """
+    Save objects to a storage from a background thread
+
+    Objects handed to :meth:`save` are put into a bounded queue and saved
+    by a dedicated writer thread, in the order they were handed over. If
+    the queue is full, :meth:`save` blocks until the writer caught up, so
+    the number of objects waiting to be saved never exceeds `max_queued`.
+
+    Saving an object changes objects that are still in use: frames of saved
+    trajectories are replaced by proxies and CV values are computed and
+    cached. netCDF files are not thread-safe either. So each save holds the
+    lock of the storage (`storage.lock`), which the stores also acquire to
+    load objects, e.g. when a proxy is accessed, and the CV caches are
+    thread-safe. The calling thread can therefore keep simulating while
+    older results are saved, but it has to wait for the writer as soon as
+    it needs the storage itself. Objects must not be changed after they
+    have been handed to the writer.
+
+    An error in the writer thread stops the writer: everything queued after
+    it is discarded. The error is raised again in the calling thread by
+    each following call to :meth:`save`, :meth:`sync` or :meth:`flush`,
+    and by :meth:`close` unless it has been raised before.
+
+    Parameters
+    ----------
+    storage : :class:`openpathsampling.storage.Storage`
+        the storage to write to
+    max_queued : int
+        the maximal number of objects waiting to be saved
+
+    Examples
+    --------
+    >>> writer = StorageWriter(storage)
+    >>> try:
+    >>>     for step in steps:
+    >>>         writer.save(storage.steps, step)
+    >>> finally:
+    >>>     writer.close()
+    """
+
+    def __init__(self, storage, max_queued=10):
+        self.storage = storage
+        self.max_queued = max_queued
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._error = None
+        self._error_raised = False
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run,
+            name='StorageWriter'
+        )
+        self._thread.daemon = True
+        self._thread.start()
+
+    def save(self, store, obj):
+        """
+        Queue an object to be saved
+
+        Parameters
+        ----------
+        store : :class:`openpathsampling.netcdfplus.ObjectStore`
+            the store of `storage` to save the object in
+        obj : object
+            the object to be saved
+        """
+        self._put((store.save, obj))
+
+    def sync(self):
+        """
+        Queue a sync of all collective variables and the storage to disk
+        """
+        self._put((self.storage.sync_all, None))
+
+    def flush(self):
+        """
+        Wait until all queued objects have been saved
+        """
+        self._check_open()
+        self._queue.join()
+        self._raise_error()
+
+    def close(self):
+        """
+        Save all queued objects, sync the storage and stop the writer
+
+        Calling `close` on a closed writer does nothing.
+        """
+        if self._closed:
+            return
+
+        self._closed = True
+        if self._error is None:
+            self._queue.put((self.storage.sync_all, None))
+
+        self._queue.put(None)
+        self._thread.join()
+        if not self._error_raised:
+            self._raise_error()
+
+    @property
+    def is_alive(self):
+        """bool : whether the writer thread is still running"""
+        return self._thread.is_alive()
+
+    def _check_open(self):
+        if self._closed:
+            raise RuntimeError('StorageWriter is closed')
+
+    def _put(self, item):
+        self._check_open()
+        self._raise_error()
+        self._queue.put(item)
+
+    def _raise_error(self):
+        if self._error is not None:
+            self._error_raised = True
+            raise_(*self._error)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    break
+
+                if self._error is None:
+                    (func, obj) = item
+                    with self.storage.lock:
+                        if obj is None:
+                            func()
+                        else:
+                            func(obj)
+            except Exception:
+                logger.exception('Error while writing to storage')
+                self._error = sys.exc_info()
+            finally:
+                self._queue.task_done()
@@ -65,3 +65,30 @@ class testOpenMMSnapshot(object):
         temp_1 = trajectory[1].instantaneous_temperature
         temp_2 = trajectory[2].instantaneous_temperature
         assert_not_equal(temp_1, temp_2)
+
+    def test_construct_copy(self):
+        coordinates = np.zeros((self.n_atoms, 3)) * u.nanometers
+        velocities = np.zeros((self.n_atoms, 3)) * u.nanometers / u.picoseconds
+        box_vectors = np.eye(3) * u.nanometers
+
+        copied = omm_engine.Snapshot.construct(
+            coordinates=coordinates,
+            box_vectors=box_vectors,
+            velocities=velocities,
+            engine=self.engine
+        )
+        assert copied.coordinates._value is not coordinates._value
+        assert copied.velocities._value is not velocities._value
+
+        adopted = omm_engine.Snapshot.construct(
+            coordinates=coordinates,
+            box_vectors=box_vectors,
+            velocities=velocities,
+            engine=self.engine,
+            copy=False,
+            readonly=True
+        )
+        assert adopted.coordinates._value is coordinates._value
+        assert adopted.velocities._value is velocities._value
+        assert not coordinates._value.flags.writeable
+        assert not box_vectors._value.flags.writeable
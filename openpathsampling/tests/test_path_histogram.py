@@ -149,6 +149,34 @@ class testPathHistogram(object):
             assert_equal(counter[val], 0.0)
 
 
+    def test_vectorized_matches_loop(self):
+        random = np.random.RandomState(7)
+        for (n_dims, interp, per_traj) in [(1, True, False), (2, True, False),
+                                           (2, True, True), (3, True, False),
+                                           (2, False, False)]:
+            hist = PathHistogram(left_bin_edges=(0.0,) * n_dims,
+                                 bin_widths=(0.3,) * n_dims,
+                                 interpolate=interp, per_traj=per_traj)
+            steps = random.normal(scale=0.5, size=(200, n_dims))
+            traj = [tuple(frame) for frame in np.cumsum(steps, axis=0)]
+            # include exact corner crossings and repeated frames
+            traj += [(0.15,) * n_dims, (1.05,) * n_dims, (1.05,) * n_dims]
+            assert_equal(hist.single_trajectory_counter(traj),
+                         hist._single_trajectory_counter_loop(traj))
+
+    def test_add_array_trajectory(self):
+        hist = PathHistogram(left_bin_edges=(0.0, 0.0),
+                             bin_widths=(0.5, 0.5),
+                             interpolate=True, per_traj=False)
+        hist.add_trajectory(np.array(self.trajectory))
+        expected = PathHistogram(left_bin_edges=(0.0, 0.0),
+                                 bin_widths=(0.5, 0.5),
+                                 interpolate=True, per_traj=False)
+        expected.add_trajectory(self.trajectory)
+        assert_equal(hist._histogram, expected._histogram)
+        assert_equal(hist.count, expected.count)
+
+
 class testPathDensityHistogram(object):
     def setup(self):
         id_cv = paths.FunctionCV("Id",
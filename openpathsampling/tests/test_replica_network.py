@@ -0,0 +1,133 @@
+from __future__ import absolute_import
+from builtins import range
+from builtins import object
+import random
+
+from nose.tools import assert_equal, assert_true, raises
+from .test_helpers import make_1d_traj
+
+import openpathsampling as paths
+from openpathsampling.analysis.replica_network import (
+    ReplicaNetwork, trace_ensembles_for_replica,
+    trace_replicas_for_ensemble, condense_repeats
+)
+
+import logging
+logging.getLogger('openpathsampling.initialization').setLevel(logging.CRITICAL)
+logging.getLogger('openpathsampling.ensemble').setLevel(logging.CRITICAL)
+
+
+class testReplicaNetwork(object):
+    def setup(self):
+        random.seed(23)
+        cv = paths.FunctionCV("x", lambda snap: snap.xyz[0][0])
+        state_a = paths.CVDefinedVolume(cv, float("-inf"), 0.0)
+        state_b = paths.CVDefinedVolume(cv, 1.0, float("inf"))
+        interfaces = paths.VolumeInterfaceSet(cv, float("-inf"),
+                                              [0.0, 0.2, 0.4, 0.6])
+        network = paths.MISTISNetwork([(state_a, interfaces, state_b)])
+        self.ensembles = network.sampling_ensembles
+        movers = [paths.PathReversalMover(ens) for ens in self.ensembles]
+        movers += [paths.ReplicaExchangeMover(ens1, ens2)
+                   for (ens1, ens2) in zip(self.ensembles[:-1],
+                                           self.ensembles[1:])]
+        root = paths.RandomChoiceMover(movers)
+        self.scheme = paths.LockedMoveScheme(root, network=network)
+
+        # all trajectories are valid in all ensembles, but differ
+        sample_set = paths.SampleSet([
+            paths.Sample(replica=i,
+                         trajectory=make_1d_traj([-0.1, 0.7 + 0.01 * i,
+                                                  -0.1]),
+                         ensemble=ens)
+            for (i, ens) in enumerate(self.ensembles)
+        ])
+        self.steps = [paths.MCStep(
+            mccycle=0, active=sample_set,
+            change=paths.AcceptedSampleMoveChange(sample_set.samples)
+        )]
+        for step in range(1, 300):
+            change = root.move(sample_set)
+            new_sample_set = sample_set.apply_samples(change.results)
+            self.steps.append(paths.MCStep(mccycle=step,
+                                           previous=sample_set,
+                                           active=new_sample_set,
+                                           change=change))
+            sample_set = new_sample_set
+
+    def _expected_accepted(self):
+        n_accepted = {}
+        for (prev, step) in zip(self.steps[:-1], self.steps[1:]):
+            if step.change.canonical.mover.is_ensemble_change_mover:
+                for old in prev.active:
+                    new = step.active
+                    if old.replica != new[old.ensemble].replica:
+                        hop = (old.ensemble, new[old.replica].ensemble)
+                        n_accepted[hop] = n_accepted.get(hop, 0) + 1
+        return n_accepted
+
+    def test_analyze_exchanges(self):
+        repx = ReplicaNetwork(self.scheme, self.steps)
+        (n_try, n_acc) = repx.analyze_exchanges()
+        expected = self._expected_accepted()
+        assert_true(len(expected) > 0)
+        assert_equal(n_acc, expected)
+        n_trials = len([s for s in self.steps[1:]
+                        if s.change.canonical.mover.is_ensemble_change_mover])
+        assert_equal(n_try, {hop: n_trials for hop in expected})
+
+    def test_analyze_traces(self):
+        repx = ReplicaNetwork(self.scheme, self.steps)
+        traces = repx.analyze_traces()
+        for ens in self.ensembles:
+            assert_equal(traces[ens], condense_repeats(
+                trace_replicas_for_ensemble(ens, self.steps)
+            ))
+        for replica in range(len(self.ensembles)):
+            assert_equal(traces[replica], condense_repeats(
+                trace_ensembles_for_replica(replica, self.steps)
+            ))
+
+    def test_steps_read_once(self):
+        n_read = [0]
+
+        def generator():
+            for step in self.steps:
+                n_read[0] += 1
+                yield step
+
+        repx = ReplicaNetwork(self.scheme, generator())
+        repx.analyze_exchanges()
+        repx.analyze_traces()
+        repx.transitions_from_traces()
+        repx.trips(self.ensembles[0], self.ensembles[-1])
+        assert_equal(n_read[0], len(self.steps))
+        assert_equal(repx.n_steps, len(self.steps))
+
+    def test_update(self):
+        bottom = self.ensembles[0]
+        top = self.ensembles[-1]
+        full = ReplicaNetwork(self.scheme, self.steps)
+        partial = ReplicaNetwork(self.scheme)
+        partial.update(iter(self.steps[:100]))
+        # results of the first part are replaced after the update
+        partial.analyze_traces()
+        partial.update(iter(self.steps[100:]))
+
+        assert_equal(partial.analyze_exchanges(), full.analyze_exchanges())
+        assert_equal(partial.analyze_traces(), full.analyze_traces())
+        assert_equal(partial.flow(bottom, top), full.flow(bottom, top))
+        assert_equal(partial.trips(bottom, top), full.trips(bottom, top))
+        assert_equal(partial.transition_matrix().values.tolist(),
+                     full.transition_matrix().values.tolist())
+
+    def test_force(self):
+        repx = ReplicaNetwork(self.scheme, self.steps[:100])
+        repx.analyze_exchanges(self.steps, force=True)
+        assert_equal(repx.n_steps, len(self.steps))
+        assert_equal(repx.analyze_exchanges()[1],
+                     self._expected_accepted())
+
+    @raises(RuntimeError)
+    def test_no_steps(self):
+        ReplicaNetwork(self.scheme).analyze_exchanges()
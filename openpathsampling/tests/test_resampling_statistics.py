@@ -17,6 +17,12 @@ logging.getLogger('openpathsampling.ensemble').setLevel(logging.CRITICAL)
 logging.getLogger('openpathsampling.storage').setLevel(logging.CRITICAL)
 logging.getLogger('openpathsampling.netcdfplus').setLevel(logging.CRITICAL)
 
+def block_matrix(block):
+    # module-level, so that it can be sent to worker processes
+    return pd.DataFrame([[float(sum(block)), float(len(block))],
+                         [float(max(block)), float(min(block))]],
+                        columns=['A', 'B'], index=['A', 'B'])
+
 class TestResamplingStatistics(object):
     # NOTE: we test the mean_df and std_df functions within this
     def setup(self):
@@ -90,6 +96,63 @@ class TestResamplingStatistics(object):
             check_dtype=False
         )
 
+    def test_mean_not_dataframes(self):
+        from openpathsampling.numerics.resampling_statistics import mean_df
+        assert_almost_equal(mean_df([1.0, 2.0, 3.0]), 2.0)
+        series = [pd.Series([1.0, 2.0]), pd.Series([3.0, 2.0])]
+        assert_equal(list(mean_df(series).values), [2.0, 2.0])
+
+    def test_percentile_many_results(self):
+        blocks = paths.numerics.BlockResampling(list(range(100)),
+                                                n_blocks=20).blocks
+        stats = paths.numerics.ResamplingStatistics(function=block_matrix,
+                                                    inputs=blocks)
+        for percent in [0, 10, 50, 90, 100]:
+            rank = min(int(percent / 100.0 * 20), 19)
+            expected = pd.DataFrame(
+                [[stats.sorted_series[(idx, col)].iloc[rank]
+                  for col in stats.columns] for idx in stats.index],
+                index=stats.index, columns=stats.columns
+            )
+            assert_frame_equal(stats.percentile(percent), expected,
+                               check_dtype=False)
+
+    def test_parallel(self):
+        blocks = paths.numerics.BlockResampling(list(range(100)),
+                                                n_blocks=20).blocks
+        serial = paths.numerics.ResamplingStatistics(function=block_matrix,
+                                                     inputs=blocks)
+        parallel = paths.numerics.ResamplingStatistics(
+            function=block_matrix,
+            inputs=blocks,
+            n_workers=2,
+            chunksize=3
+        )
+        assert_equal(len(parallel.results), 20)
+        for (truth, beauty) in zip(serial.results, parallel.results):
+            assert_frame_equal(beauty, truth)
+        assert_frame_equal(parallel.mean, serial.mean)
+        assert_frame_equal(parallel.std, serial.std)
+
+    def test_callback(self):
+        blocks = paths.numerics.BlockResampling(list(range(100)),
+                                                n_blocks=20).blocks
+        for n_workers in [1, 2]:
+            reports = []
+            stats = paths.numerics.ResamplingStatistics(
+                function=block_matrix,
+                inputs=blocks,
+                n_workers=n_workers,
+                chunksize=3,
+                callback=lambda n, mean, std: reports.append((n, mean, std))
+            )
+            n_finished = [n for (n, _, _) in reports]
+            assert_equal(n_finished, sorted(n_finished))
+            assert_equal(n_finished[-1], 20)
+            (_, mean, std) = reports[-1]
+            assert_frame_equal(mean, stats.mean)
+            assert_frame_equal(std, stats.std)
+
 class TestBlockResampling(object):
     def setup(self):
         self.samples = list(range(100))
@@ -0,0 +1,121 @@
+from __future__ import absolute_import
+from builtins import range
+from builtins import object
+import os
+
+from nose.tools import assert_equal, assert_true
+
+from .test_helpers import data_filename, make_1d_traj
+
+import openpathsampling as paths
+from openpathsampling.storage import StepIndex
+
+import logging
+logging.getLogger('openpathsampling.initialization').setLevel(logging.CRITICAL)
+logging.getLogger('openpathsampling.storage').setLevel(logging.CRITICAL)
+logging.getLogger('openpathsampling.netcdfplus').setLevel(logging.CRITICAL)
+logging.getLogger('openpathsampling.ensemble').setLevel(logging.CRITICAL)
+
+
+class testStepIndex(object):
+    def setup(self):
+        self.ensembles = [paths.LengthEnsemble(n) for n in [3, 4, 5]]
+        self.reversals = [paths.PathReversalMover(ens)
+                          for ens in self.ensembles]
+        # trajectories never fit the other ensemble: always rejected
+        self.repex = paths.ReplicaExchangeMover(self.ensembles[0],
+                                                self.ensembles[1])
+        root = paths.RandomChoiceMover(self.reversals + [self.repex])
+        scheme = paths.LockedMoveScheme(root)
+        init_conds = paths.SampleSet([
+            paths.Sample(replica=i,
+                         trajectory=make_1d_traj(list(range(n_frames))),
+                         ensemble=ens)
+            for (i, (ens, n_frames)) in enumerate(zip(self.ensembles,
+                                                      [3, 4, 5]))
+        ])
+        self.filename = data_filename("step_index_test.nc")
+        self.storage = paths.Storage(self.filename, 'w')
+        self.simulation = paths.PathSampling(storage=self.storage,
+                                             move_scheme=scheme,
+                                             sample_set=init_conds)
+        self.simulation.output_stream = open(os.devnull, "w")
+
+    def teardown(self):
+        self.storage.close()
+        if os.path.isfile(self.filename):
+            os.remove(self.filename)
+
+    def _check_index(self, index, storage):
+        steps = list(storage.steps)
+        assert_equal(len(index), len(steps))
+        assert_equal(index.step_column('mccycle').tolist(),
+                     [step.mccycle for step in steps])
+        accepted = [True] + [step.change.accepted for step in steps[1:]]
+        assert_equal(index.step_column('accepted').tolist(), accepted)
+        movers = [-1 if step.change.canonical.mover is None
+                  else storage.pathmovers.index[
+                      step.change.canonical.mover.__uuid__]
+                  for step in steps]
+        assert_equal(index.step_column('mover').tolist(), movers)
+
+        rows = [(n_step, storage.samples.index[sample.__uuid__],
+                 sample.replica,
+                 storage.ensembles.index[sample.ensemble.__uuid__],
+                 storage.trajectories.index[sample.trajectory.__uuid__],
+                 len(sample.trajectory))
+                for (n_step, step) in enumerate(steps)
+                for sample in step.active]
+        columns = [index.sample_column(col).tolist()
+                   for col in StepIndex.sample_columns]
+        assert_equal(sorted(zip(*columns)), sorted(rows))
+
+    def test_index(self):
+        self.simulation.run(20)
+        index = StepIndex(self.storage)
+        self._check_index(index, self.storage)
+        assert_true(0 < index.step_column('accepted').sum() < len(index))
+
+    def test_update(self):
+        self.simulation.run(5)
+        index = self.storage.step_index
+        assert_equal(len(index), 6)
+        self.simulation.run(10)
+        assert_true(self.storage.step_index is index)
+        self._check_index(index, self.storage)
+
+    def test_read_only(self):
+        self.simulation.run(10)
+        self.storage.close()
+        self.storage = paths.Storage(self.filename, 'r')
+        self._check_index(self.storage.step_index, self.storage)
+
+    def test_queries(self):
+        self.simulation.run(20)
+        index = self.storage.step_index
+        steps = list(self.storage.steps)
+        ens3 = self.ensembles[0]
+        assert_equal(index.path_lengths(ens3).tolist(), [3] * len(steps))
+        assert_equal(index.path_lengths(ens3, steps=slice(0, 5)).tolist(),
+                     [3] * 5)
+        ens_pos = [self.storage.ensembles.index[ens.__uuid__]
+                   for ens in self.ensembles]
+        for replica in range(3):
+            assert_equal(index.replica_ensembles(replica).tolist(),
+                         [ens_pos[replica]] * len(steps))
+
+        assert_equal(index.sample_mask(replica=0, ensemble=ens3).sum(),
+                     len(steps))
+        assert_equal(index.sample_mask(replica=0,
+                                       ensemble=self.ensembles[1]).sum(), 0)
+
+        acceptance = index.acceptance()
+        repex = self.storage.pathmovers.index[self.repex.__uuid__]
+        n_repex = sum(1 for step in steps[1:]
+                      if step.change.canonical.mover is self.repex)
+        if n_repex > 0:
+            assert_equal(acceptance[repex], (0, n_repex))
+        for mover in self.reversals:
+            n_trials = index.step_mask(mover=mover).sum()
+            assert_equal(index.step_mask(mover=mover, accepted=True).sum(),
+                         n_trials)
@@ -129,6 +129,39 @@ class testCombinations(object):
     def test_kinetic_energy(self):
         assert_almost_equal(self.simpletest.kinetic_energy(self), 0.4575)
 
+class testBatchPES(object):
+    def setUp(self):
+        self.positions = np.array([init_pos, init_pos[::-1], -init_pos])
+        self.velocities = np.array([init_vel, init_vel[::-1], -init_vel])
+        self.mass = sys_mass
+        self.pes = gaussian + outer - linear + harmonic
+
+    def _single(self, i):
+        single = testBatchPES()
+        single.positions = self.positions[i]
+        single.velocities = self.velocities[i]
+        single.mass = self.mass
+        return single
+
+    def test_V(self):
+        batch_V = self.pes.V(self)
+        assert_equal(batch_V.shape, (3,))
+        for i in range(3):
+            assert_almost_equal(batch_V[i], self.pes.V(self._single(i)))
+
+    def test_dVdx(self):
+        batch_dVdx = self.pes.dVdx(self)
+        assert_equal(batch_dVdx.shape, (3, 2))
+        for i in range(3):
+            np.testing.assert_allclose(batch_dVdx[i],
+                                       self.pes.dVdx(self._single(i)))
+
+    def test_kinetic_energy(self):
+        batch_ke = self.pes.kinetic_energy(self)
+        for i in range(3):
+            assert_almost_equal(batch_ke[i],
+                                self.pes.kinetic_energy(self._single(i)))
+
 
 # === TESTS FOR TOY ENGINE OBJECT =========================================
 
@@ -233,6 +266,62 @@ class testToyEngine(object):
             assert_items_equal(s1.coordinates[0], s2.coordinates[0])
             assert_items_equal(s1.velocities[0], s2.velocities[0])
 
+    def test_generate_batch(self):
+        ens = paths.LengthEnsemble(4)
+        orig = self.sim.current_snapshot.copy()
+        other = toy.Snapshot(coordinates=np.array([[0.1, -0.2]]),
+                             velocities=np.array([[0.3, 0.4]]),
+                             engine=self.sim)
+        trajs = self.sim.generate_batch([orig, other], [ens.can_append])
+        assert_equal(len(trajs), 2)
+        for (init, batch_traj) in zip([orig, other], trajs):
+            traj = self.sim.generate(init, [ens.can_append])
+            assert_equal(len(batch_traj), len(traj))
+            assert_equal(batch_traj[0], init)
+            for (s1, s2) in zip(batch_traj, traj):
+                np.testing.assert_allclose(s1.coordinates, s2.coordinates)
+                np.testing.assert_allclose(s1.velocities, s2.velocities)
+
+    def test_generate_batch_independent_stop(self):
+        orig = self.sim.current_snapshot.copy()
+        ens_short = paths.LengthEnsemble(2)
+        ens_long = paths.LengthEnsemble(4)
+        def running(traj, trusted=False):
+            if traj[0] is orig:
+                return ens_short.can_append(traj, trusted)
+            else:
+                return ens_long.can_append(traj, trusted)
+
+        other = orig.copy()
+        trajs = self.sim.generate_batch([orig, other], running)
+        assert_equal([len(t) for t in trajs], [2, 4])
+        for (s1, s2) in zip(trajs[0], trajs[1]):
+            np.testing.assert_allclose(s1.coordinates, s2.coordinates)
+
+    def test_generate_batch_backward(self):
+        ens = paths.LengthEnsemble(3)
+        orig = self.sim.current_snapshot.copy()
+        (batch_traj,) = self.sim.generate_batch([orig], ens.can_append,
+                                                direction=-1)
+        traj = self.sim.generate(orig, [ens.can_append], direction=-1)
+        assert_equal(batch_traj[-1], orig)
+        for (s1, s2) in zip(batch_traj, traj):
+            np.testing.assert_allclose(s1.coordinates, s2.coordinates)
+            np.testing.assert_allclose(s1.velocities, s2.velocities)
+
+    def test_generate_batch_max_length(self):
+        snap = self.sim.current_snapshot
+        try:
+            self.sim.generate_batch([snap, snap.copy()], [true_func])
+        except paths.engines.EngineMaxLengthError as e:
+            assert_equal(len(e.last_trajectory), self.sim.n_frames_max)
+        else:
+            raise RuntimeError('Did not raise MaxLength Error')
+
+        self.sim.options['on_max_length'] = 'stop'
+        trajs = self.sim.generate_batch([snap, snap.copy()], [true_func])
+        assert_equal([len(t) for t in trajs], [self.sim.n_frames_max] * 2)
+
     def test_start_with_snapshot(self):
         snap = toy.Snapshot(coordinates=np.array([1,2]),
                         velocities=np.array([3,4]))
@@ -12,7 +12,7 @@ import numpy as np
 
 import openpathsampling.collectivevariable as op
 import openpathsampling.engines.openmm as peng
-from openpathsampling.netcdfplus import NetCDFPlus
+from openpathsampling.netcdfplus import NetCDFPlus, MemoryCache
 
 from msmbuilder.featurizer import AtomPairsFeaturizer
 
@@ -78,6 +78,56 @@ class test_FunctionCV(object):
         np.testing.assert_allclose(md_distances, my_distances, rtol=10 ** -6,
                                    atol=10 ** -10)
 
+    def test_coalesce_cache_misses(self):
+        calls = []
+
+        def f(snapshots):
+            calls.append(len(snapshots))
+            return np.array([s.coordinates[0][0] for s in snapshots])
+
+        cv = paths.FunctionCV("x", f, cv_requires_lists=True)
+        traj = make_1d_traj([0.0, 1.0, 2.0])
+        # repeated snapshots are only evaluated once
+        values = cv(traj + traj)
+        assert calls == [3]
+        np.testing.assert_allclose(values, [0.0, 1.0, 2.0] * 2)
+
+        # only the misses are passed on, in a single call
+        traj2 = traj + make_1d_traj([3.0, 4.0])
+        values = cv(traj2)
+        assert calls == [3, 2]
+        np.testing.assert_allclose(values, [0.0, 1.0, 2.0, 3.0, 4.0])
+
+    def test_cache_stats(self):
+        cv = paths.FunctionCV("x", lambda s: s.coordinates[0][0])
+        traj = make_1d_traj([0.0, 1.0, 2.0])
+        cv(traj)
+        stats = cv.cache_stats
+        assert stats['misses'] == 3
+        assert stats['hits'] == 0
+        assert stats['count'] == 3
+
+        cv(traj)
+        assert cv.cache_stats['hits'] == 3
+
+    def test_cache_budget(self):
+        cv = paths.FunctionCV(
+            "xs", lambda s: np.zeros(100), cv_wrap_numpy_array=True)
+        size = MemoryCache.estimate_size(np.zeros(100))
+        cv.with_cache(max_bytes=2 * size, policy='lfu')
+        traj = make_1d_traj([0.0, 1.0, 2.0])
+
+        cv(traj[0])
+        cv(traj[0])
+        cv(traj[1])
+        cv(traj[2])
+        stats = cv.cache_stats
+        assert stats['evictions'] == 1
+        assert stats['nbytes'] <= 2 * size
+        # the frequently used value is kept
+        assert traj[0].__uuid__ in cv._cache_dict.cache
+        assert traj[1].__uuid__ not in cv._cache_dict.cache
+
     def test_return_parameters_from_template(self):
 
         atom_pairs = [[0, 1], [10, 14]]
@@ -263,6 +313,57 @@ class test_FunctionCV(object):
             if os.path.isfile(fname):
                 os.remove(fname)
 
+    def test_storage_complete_chunked(self):
+        import os
+
+        fname = data_filename("cv_storage_test.nc")
+        if os.path.isfile(fname):
+            os.remove(fname)
+
+        traj = paths.Trajectory(list(self.traj_simple))
+        template = traj[0]
+
+        storage_w = paths.Storage(fname, "w")
+        storage_w.snapshots.save(template)
+
+        cv1 = paths.CoordinateFunctionCV(
+            'f1',
+            lambda snapshots: [snap.coordinates[0] for snap in snapshots],
+            cv_requires_lists=True
+        ).with_diskcache(
+            allow_incomplete=True
+        )
+
+        storage_w.trajectories.save(traj[3:])
+        storage_w.trajectories.save(traj.reversed)
+        assert (len(storage_w.snapshots) == 20)
+
+        storage_w.save(cv1)
+
+        store = storage_w.cvs.cache_store(cv1)
+        assert (len(store.vars['value']) == 0)
+
+        # the chunks do not divide the number of snapshots
+        storage_w.snapshots.complete_cv(cv1, chunksize=3)
+        assert (len(store.vars['value']) == 10)
+        assert (sorted(store.variables['index'][:]) == list(range(10)))
+
+        # a second run finds nothing to do
+        storage_w.snapshots.complete_cv(cv1, chunksize=3)
+        assert (len(store.vars['value']) == 10)
+
+        for idx, value in zip(
+                store.variables['index'][:],
+                store.vars['value']):
+            snap = storage_w.snapshots[
+                storage_w.snapshots.vars['uuid'][idx]]
+            assert_close_unit(cv1(snap), value)
+
+        storage_w.close()
+
+        if os.path.isfile(fname):
+            os.remove(fname)
+
     def test_storage_sync(self):
         import os
 
@@ -71,3 +71,52 @@ class testDynamicsEngine(object):
         assert (self.engine.n_spatial == 1)
         assert(self.stupid.n_atoms == 1)
         assert (self.stupid.n_spatial == 1)
+
+
+class testIterGenerate(object):
+    def setup(self):
+        from .test_helpers import CalvinistDynamics
+        self.engine = CalvinistDynamics(
+            [-0.5, -0.4, -0.3, -0.2, -0.1, 0.1, 0.2, 0.3, 0.4, 0.5])
+        self.initial = make_1d_traj(coordinates=[0.1], velocities=[1.0])[0]
+
+    @staticmethod
+    def _coordinates(trajectory):
+        return [s.coordinates[0][0] for s in trajectory]
+
+    def test_backward(self):
+        traj = self.engine.generate(
+            self.initial, [lambda t, trusted: len(t) < 4], direction=-1)
+        for (value, expected) in zip(self._coordinates(traj),
+                                     [-0.3, -0.2, -0.1, 0.1]):
+            assert abs(value - expected) < 1e-7
+
+    def test_iter_backward(self):
+        lengths = [len(t) for t in self.engine.iter_generate(
+            self.initial, [lambda t, trusted: len(t) < 5], direction=-1,
+            intervals=2)]
+        assert_equal(lengths, [1, 3, 5])
+
+    def test_backward_max_length(self):
+        self.engine.options['on_max_length'] = 'stop'
+        self.engine.options['n_frames_max'] = 4
+        traj = self.engine.generate(
+            self.initial, [lambda t, trusted: True], direction=-1)
+        # the newest frame is dropped, the initial frame is kept
+        assert_equal(len(traj), 4)
+        assert abs(traj[-1].coordinates[0][0] - 0.1) < 1e-7
+
+    def test_backward_conditions_see_frames_in_time_order(self):
+        seen = []
+
+        def running(trajectory, trusted):
+            seen.append((trajectory, self._coordinates(trajectory)))
+            return len(trajectory) < 4
+
+        traj = self.engine.generate(self.initial, [running], direction=-1)
+        assert_equal(type(traj), paths.Trajectory)
+        # the conditions get the same, growing object and no copies
+        assert all(t is seen[0][0] for (t, _) in seen)
+        for (_, coordinates) in seen:
+            assert abs(coordinates[-1] - 0.1) < 1e-7
+            assert_equal(coordinates, sorted(coordinates))
@@ -1392,6 +1392,16 @@ class testEnsembleCache(EnsembleCacheTest):
         assert_equal(self._was_cache_reset(self.rev), False)
 
 
+    def test_prev_last_index(self):
+        self.fwd.check(self.traj[0:2])
+        assert_equal(self.fwd.prev_last_index, 1)
+        self.fwd.check(self.traj[0:3])
+        assert_equal(self.fwd.prev_last_index, 2)
+        self.rev.check(self.traj[-2:])
+        assert_equal(self.rev.prev_last_index, 0)
+        self.rev.check(self.traj[-3:])
+        assert_equal(self.rev.prev_last_index, 0)
+
     def test_trajectory_skips_frame(self):
         # tests for forward
         self.fwd.check(self.traj[0:1])
@@ -1484,6 +1494,36 @@ class testSequentialEnsembleCache(EnsembleCacheTest):
         assert_equal(cache.contents['ens_from'], 0)
         assert_equal(cache.contents['subtraj_from'], 5)
 
+    def test_sequential_caching_matches_fresh(self):
+        # growing frame by frame uses the cache; a new ensemble does not
+        def fresh():
+            return SequentialEnsemble(self.pseudo_minus.ensembles)
+
+        for i in range(len(self.traj)):
+            assert_equal(self.pseudo_minus.can_append(self.traj[0:i+1]),
+                         fresh().can_append(self.traj[0:i+1]))
+        for i in range(len(self.traj)):
+            assert_equal(self.pseudo_minus.can_prepend(self.traj[-i-1:]),
+                         fresh().can_prepend(self.traj[-i-1:]))
+
+    def test_sequential_caching_extends_subtraj(self):
+        cache = self.pseudo_minus._cache_can_append
+        assert_equal(self.pseudo_minus.can_append(self.traj[0:3]), True)
+        subtraj = dict(cache.contents['subtrajs'])[(2, 2)]
+        assert_equal(subtraj, self.traj[2:3])
+        assert_equal(self.pseudo_minus.can_append(self.traj[0:4]), True)
+        assert_true(dict(cache.contents['subtrajs'])[(2, 2)] is subtraj)
+        assert_equal(subtraj, self.traj[2:4])
+
+        cache = self.pseudo_minus._cache_can_prepend
+        assert_equal(self.pseudo_minus.can_prepend(self.traj[-3:]), True)
+        subtraj = dict(cache.contents['subtrajs'])[(2, -2)]
+        assert_true(isinstance(subtraj, paths.engines.PrependingTrajectory))
+        assert_equal(subtraj, self.traj[3:4])
+        assert_equal(self.pseudo_minus.can_prepend(self.traj[-4:]), True)
+        assert_true(dict(cache.contents['subtrajs'])[(2, -2)] is subtraj)
+        assert_equal(subtraj, self.traj[2:4])
+
     def test_sequential_caching_resets(self):
         #cache = self.pseudo_minus._cache_can_append
         assert_equal(self.pseudo_minus.can_append(self.traj[2:3]), True)
@@ -14,6 +14,7 @@ logging.getLogger('openpathsampling.storage').setLevel(logging.CRITICAL)
 logging.getLogger('openpathsampling.netcdfplus').setLevel(logging.CRITICAL)
 
 import collections
+import numpy as np
 
 from openpathsampling.numerics import (Histogram, SparseHistogram,
                                        HistogramPlotter2D)
@@ -179,6 +180,51 @@ class testSparseHistogram(object):
         assert_almost_equal(normed_fcn((0.01, 0.09)), old_div(0.25,0.15))
         assert_almost_equal(normed_fcn((0.61, 0.89)), old_div(0.25,0.15))
 
+    @staticmethod
+    def _reference(histo, data, weights):
+        # one data point at a time, as done before binning arrays
+        counter = collections.Counter()
+        for (d, w) in zip(data, weights):
+            counter[histo.map_to_bins(d)] += w
+        return counter
+
+    def test_add_data_weighted(self):
+        random = np.random.RandomState(5)
+        data = random.normal(size=(1000, 2))
+        weights = random.uniform(size=1000)
+        histo = SparseHistogram(bin_widths=(0.5, 0.3),
+                                left_bin_edges=(0.0, -0.1))
+        hist = histo.histogram(data, weights)
+        expected = self._reference(histo, data, weights)
+        assert_equal(set(hist.keys()), set(expected.keys()))
+        for key in expected:
+            assert_almost_equal(hist[key], expected[key])
+        assert_almost_equal(histo.count, weights.sum())
+
+        # an outlier makes the data too sparse to count densely
+        data[0] = (1e9, -1e9)
+        hist = histo.histogram(data, weights)
+        expected = self._reference(histo, data, weights)
+        assert_equal(hist[histo.map_to_bins(data[0])], weights[0])
+        assert_equal(set(hist.keys()), set(expected.keys()))
+
+    def test_add_data_1d(self):
+        histo = Histogram(bin_width=0.5, bin_range=(1.0, 3.5))
+        # outliers far outside the range do not need a huge dense array
+        data = [1.0, 1.1, 2.6, -1e9, 1e9, 2.6]
+        hist = histo.histogram(data)
+        assert_equal(hist, self._reference(histo, data, [1.0] * len(data)))
+        hist = histo.histogram(data[:3] + [float("inf")])
+        assert_equal(hist, collections.Counter({(0.0,): 2.0, (3.0,): 1.0,
+                                                (float("inf"),): 1.0}))
+
+    def test_add_empty_data(self):
+        histo = Histogram(bin_width=0.5, bin_range=(1.0, 3.5))
+        histo.histogram([1.2])
+        assert_equal(histo.add_data_to_histogram([]),
+                     collections.Counter({(0.0,): 1.0}))
+        assert_equal(histo.count, 1)
+
 
 class testHistogramPlotter2D(object):
     def setup(self):
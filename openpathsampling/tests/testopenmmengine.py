@@ -114,6 +114,29 @@ class testOpenMMEngine(object):
         assert_equal_array_array(old_div(snap.velocities, (old_div(u.nanometers, u.picoseconds))),
                                  vel)
 
+    def test_single_precision(self):
+        # an integrator can only be bound to one context
+        integrator = mm.LangevinIntegrator(
+            300*u.kelvin,
+            old_div(1.0,u.picoseconds),
+            2.0*u.femtoseconds
+        )
+        engine = self.engine.from_new_options(
+            integrator=integrator,
+            options={'single_precision': True})
+        engine.initialize('CPU')
+        # the snapshot of another engine is rebuilt from the context
+        engine.current_snapshot = self.engine.current_snapshot
+        snap = engine.current_snapshot
+        assert snap.engine is engine
+        assert_equal(snap.coordinates._value.dtype, np.float32)
+        assert_equal(snap.box_vectors._value.dtype, np.float32)
+        assert_equal(snap.velocities._value.dtype, np.float32)
+        np.testing.assert_allclose(
+            snap.coordinates._value,
+            self.engine.current_snapshot.coordinates._value,
+            rtol=1e-6)
+
     def test_snapshot_set(self):
         pdb_pos = (old_div(template.coordinates, u.nanometers))
         testvel = []
@@ -541,6 +541,14 @@ class testRandomChoiceMover(object):
 #                count[samples[0].details.mover_path[-2]] = 1
 #        assert_equal(len(count.keys()), 2)
 
+    def test_choose(self):
+        assert_true(self.mover.selection_is_independent)
+        for t in range(20):
+            details = self.mover.choose(self.init_samp)
+            assert_true(details.chosen_mover in self.mover.movers)
+            assert_equal(details.choice,
+                         self.mover.movers.index(details.chosen_mover))
+
     def test_restricted_by_replica(self):
         raise SkipTest
 
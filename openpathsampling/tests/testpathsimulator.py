@@ -13,9 +13,11 @@ from nose.tools import (assert_equal, assert_not_equal, raises,
 
 from openpathsampling.pathsimulator import *
 import openpathsampling as paths
+from openpathsampling import profiling
 import openpathsampling.engines.toy as toys
 import numpy as np
 import os
+import random
 
 import logging
 logging.getLogger('openpathsampling.initialization').setLevel(logging.CRITICAL)
@@ -317,6 +319,50 @@ class testCommittorSimulation(object):
         assert_true(counts['bkwd'] > 0)
         assert_equal(counts['fwd'] + counts['bkwd'], 20)
 
+    def test_committor_parallel_shots_are_made_lazily(self):
+        made = []
+
+        def shots():
+            for shot in self.simulation._shot_sample_sets(20, False):
+                made.append(shot)
+                yield shot
+
+        ahead = [
+            len(made) - (shot_num + 1)
+            for (_, shot_num, _, _) in self.simulation._parallel_changes(
+                shots(), n_workers=2)
+        ]
+        assert_equal(len(ahead), 20)
+        # at most twice the number of workers are made before they are done
+        assert_true(max(ahead) <= 4)
+
+    def test_committor_run_parallel(self):
+        self.simulation.run(n_per_snapshot=20, n_workers=2)
+        assert_equal(len(self.simulation.storage.steps), 20)
+        counts = {'fwd' : 0, 'bkwd' : 0}
+        for (i, step) in enumerate(self.simulation.storage.steps):
+            assert_equal(step.mccycle, i)
+            step.active.sanity_check()  # traj is in ensemble
+            # changes are rebuilt from the objects in this process
+            assert_true(step.change.mover is self.simulation.mover)
+            traj = step.active[0].trajectory
+            assert_true(traj[0].engine is self.engine)
+            traj_str = traj.summarize_by_volumes_str(self.state_labels)
+            if traj_str == "None-Right":
+                assert_equal(step.change.canonical.mover,
+                             self.simulation.forward_mover)
+                counts['fwd'] += 1
+            elif traj_str == "Left-None":
+                assert_equal(step.change.canonical.mover,
+                             self.simulation.backward_mover)
+                counts['bkwd'] += 1
+            else:
+                raise AssertionError(
+                    str(traj_str) + "is neither 'None-Right' nor 'Left-None'"
+                )
+        assert_true(counts['fwd'] > 0)
+        assert_true(counts['bkwd'] > 0)
+
     def test_forward_only_committor(self):
         sim = CommittorSimulation(storage=self.storage,
                                   engine=self.engine,
@@ -419,6 +465,160 @@ class testCommittorSimulation(object):
         assert_true(counts['None-Right'] > 0)
         assert_equal(sum(counts.values()), 50)
 
+class testPathSampling(object):
+    def setup(self):
+        self.ens3 = paths.LengthEnsemble(3)
+        self.ens4 = paths.LengthEnsemble(4)
+        self.ens5 = paths.LengthEnsemble(5)
+        self.ensembles = [self.ens3, self.ens4, self.ens5]
+        self.movers = [paths.PathReversalMover(ens) for ens in self.ensembles]
+        root = paths.RandomChoiceMover(self.movers)
+        scheme = paths.LockedMoveScheme(root)
+        init_conds = paths.SampleSet([
+            paths.Sample(replica=i,
+                         trajectory=make_1d_traj(list(range(n_frames))),
+                         ensemble=ens)
+            for (i, (ens, n_frames)) in enumerate(zip(self.ensembles,
+                                                      [3, 4, 5]))
+        ])
+        self.filename = data_filename("path_sampling_parallel.nc")
+        self.storage = paths.Storage(self.filename, 'w')
+        self.simulation = PathSampling(storage=self.storage,
+                                       move_scheme=scheme,
+                                       sample_set=init_conds)
+        self.simulation.output_stream = open(os.devnull, "w")
+
+    def teardown(self):
+        if os.path.isfile(self.filename):
+            os.remove(self.filename)
+
+    def test_draw_move(self):
+        choices, mover = self.simulation._draw_move()
+        assert_equal(len(choices), 1)
+        assert_true(choices[0][0] is self.simulation.root_mover)
+        assert_true(mover in self.movers)
+        assert_true(choices[0][1].chosen_mover is mover)
+
+    def test_run_parallel(self):
+        self.simulation.run(10, n_workers=2)
+        # initial step plus the 10 we ran
+        assert_equal(len(self.storage.steps), 11)
+        for (i, step) in enumerate(self.storage.steps[1:]):
+            assert_equal(step.mccycle, i + 1)
+            assert_true(step.change.mover is self.simulation._mover)
+            assert_equal(step.change.details.step, step.mccycle)
+            step.active.sanity_check()
+            # each step only changes the ensemble of its mover
+            mover = step.change.canonical.mover
+            assert_true(mover in self.movers)
+            for ens in self.ensembles:
+                if ens is not mover.ensemble:
+                    assert_equal(step.active[ens], step.previous[ens])
+                else:
+                    assert_equal(step.active[ens].trajectory,
+                                 step.previous[ens].trajectory.reversed)
+
+    def test_run_write_behind(self):
+        self.simulation.write_behind = 2
+        self.simulation.run(10)
+        assert_true(self.simulation._writer is None)
+        assert_equal(len(self.storage.steps), 11)
+        for (i, step) in enumerate(self.storage.steps):
+            assert_equal(step.mccycle, i)
+        assert_equal(self.storage.steps[-1].active,
+                     self.simulation.sample_set)
+
+    def test_run_profiler(self):
+        profiler = paths.MCProfiler()
+        self.simulation.profiler = profiler
+        self.simulation.run(10)
+        steps = [r['step'] for r in profiler.records]
+        assert_equal(sorted(set(steps) - set([None])), list(range(1, 11)))
+        for step in self.storage.steps[1:]:
+            mover = step.change.canonical.mover
+            records = [r for r in profiler.records
+                       if r['step'] == step.mccycle and
+                       r['mover'] == mover.name]
+            assert_equal(len(records), 1)
+
+        assert_true(profiler.dataframe['storage'].sum() > 0.0)
+        # profiling stops with the run
+        assert_true(profiling._active() is None)
+
+
+class testPathSamplingWriteBehind(object):
+    def setup(self):
+        self.filenames = {
+            write_behind: data_filename("write_behind_%d.nc" % write_behind)
+            for write_behind in [0, 3]
+        }
+        self.teardown()
+
+    def teardown(self):
+        for filename in self.filenames.values():
+            if os.path.isfile(filename):
+                os.remove(filename)
+
+    def _run(self, write_behind):
+        # everything is built from scratch so that both runs start with
+        # empty caches and the same random numbers
+        pes = toys.HarmonicOscillator(A=[1.0], omega=[1.0], x0=[0.0])
+        topology = toys.Topology(n_spatial=1, masses=[1.0], pes=pes)
+        engine = toys.Engine(
+            options={'integ': toys.LeapfrogVerletIntegrator(0.1),
+                     'n_frames_max': 1000,
+                     'n_steps_per_frame': 2},
+            topology=topology
+        )
+        cv = paths.FunctionCV("x", lambda snap: snap.coordinates[0][0])
+        state_A = paths.CVDefinedVolume(cv, -2.0, -0.5).named("A")
+        state_B = paths.CVDefinedVolume(cv, 0.5, 2.0).named("B")
+        network = paths.TPSNetwork(state_A, state_B)
+        scheme = paths.OneWayShootingMoveScheme(network, engine=engine)
+        init_traj = paths.Trajectory([
+            toys.Snapshot(coordinates=np.array([[x]]),
+                          velocities=np.array([[1.0]]),
+                          engine=engine)
+            for x in [-0.6, -0.3, 0.0, 0.3, 0.6]
+        ])
+        init_conds = scheme.initial_conditions_from_trajectories(init_traj)
+        storage = paths.Storage(self.filenames[write_behind], "w")
+        simulation = PathSampling(storage=storage,
+                                  move_scheme=scheme,
+                                  sample_set=init_conds)
+        simulation.output_stream = open(os.devnull, "w")
+        simulation.write_behind = write_behind
+        np.random.seed(5)
+        random.seed(5)
+        simulation.run(20)
+        storage.close()
+
+    def _summary(self, write_behind):
+        storage = paths.AnalysisStorage(self.filenames[write_behind])
+        cv = storage.cvs["x"]
+        summary = [
+            (step.mccycle,
+             [list(cv(sample.trajectory)) for sample in step.active])
+            for step in storage.steps
+        ]
+        storage.close()
+        return summary
+
+    def test_write_behind_matches_serial(self):
+        self._run(0)
+        self._run(3)
+        serial = self._summary(0)
+        write_behind = self._summary(3)
+        assert_equal(len(serial), 21)
+        assert_equal([s[0] for s in serial], list(range(21)))
+        assert_equal(len(write_behind), len(serial))
+        for (step_serial, step_write_behind) in zip(serial, write_behind):
+            assert_equal(step_serial[0], step_write_behind[0])
+            for (traj_serial, traj_write_behind) in zip(step_serial[1],
+                                                        step_write_behind[1]):
+                np.testing.assert_allclose(traj_serial, traj_write_behind)
+
+
 class testDirectSimulation(object):
     def setup(self):
         pes = toys.HarmonicOscillator(A=[1.0], omega=[1.0], x0=[0.0])
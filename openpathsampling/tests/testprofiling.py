@@ -0,0 +1,114 @@
+from __future__ import absolute_import
+from builtins import object
+import io
+import json
+import time
+
+from nose.tools import (assert_equal, assert_true, assert_almost_equal,
+                        raises)
+
+from openpathsampling import profiling
+from openpathsampling.profiling import MCProfiler
+
+
+class MockMover(object):
+    def __init__(self, name):
+        self.name = name
+
+
+class testMCProfiler(object):
+    def setup(self):
+        self.mover = MockMover("mover")
+        self.profiler = MCProfiler()
+
+    def test_inactive(self):
+        # without active profiler, the hooks do nothing
+        with profiling.mover(self.mover), profiling.timer('engine'):
+            profiling.count_frames()
+        assert_equal(self.profiler.records, [])
+
+    def test_exclusive_times(self):
+        with self.profiler:
+            with self.profiler.step(1):
+                with profiling.mover(self.mover):
+                    with profiling.timer('engine'):
+                        time.sleep(0.02)
+                        with profiling.timer('cv'):
+                            time.sleep(0.01)
+                        profiling.count_frames(3)
+
+        records = {r['mover']: r for r in self.profiler.records}
+        assert_equal(set(records.keys()), set([None, 'mover']))
+        assert_equal(set(r['step'] for r in records.values()), set([1]))
+        record = records['mover']
+        assert_true(record['engine'] >= 0.02)
+        assert_true(record['cv'] >= 0.01)
+        assert_equal(record['n_frames'], 3)
+        assert_almost_equal(
+            record['total'],
+            sum(record[c] for c in MCProfiler.categories + ['other'])
+        )
+
+    def test_records_outside_steps(self):
+        with self.profiler:
+            with profiling.timer('storage'):
+                pass
+            with self.profiler.step(1):
+                pass
+            with profiling.timer('storage'):
+                pass
+
+        assert_equal([r['step'] for r in self.profiler.records],
+                     [None, 1, None])
+
+    def test_output_stream(self):
+        stream = io.StringIO()
+        profiler = MCProfiler(output_stream=stream)
+        with profiler:
+            for step in range(3):
+                with profiler.step(step):
+                    with profiling.mover(self.mover):
+                        profiling.count_frames()
+
+        lines = stream.getvalue().splitlines()
+        assert_equal(len(lines), 6)
+        records = [json.loads(line) for line in lines]
+        assert_equal(records, [dict(r) for r in profiler.records])
+        assert_equal(list(json.loads(lines[0]).keys()), profiler.columns)
+
+    def test_dataframe(self):
+        with self.profiler:
+            with self.profiler.step(1):
+                with profiling.mover(self.mover):
+                    profiling.count_frames()
+
+        df = self.profiler.dataframe
+        assert_equal(list(df.columns), self.profiler.columns)
+        assert_equal(len(df), 2)
+        assert_equal(df['n_frames'].sum(), 1)
+
+    def test_nested_profilers(self):
+        other = MCProfiler()
+        with self.profiler:
+            with other:
+                with profiling.timer('engine'):
+                    pass
+            with profiling.timer('cv'):
+                pass
+
+        assert_equal(len(other.records), 1)
+        assert_true(other.records[0]['engine'] > 0.0)
+        assert_equal(len(self.profiler.records), 1)
+        assert_equal(self.profiler.records[0]['engine'], 0.0)
+
+    @raises(RuntimeError)
+    def test_start_twice(self):
+        self.profiler.start()
+        try:
+            self.profiler.start()
+        finally:
+            self.profiler.stop()
+
+    @raises(RuntimeError)
+    def test_stop_inactive(self):
+        self.profiler.stop()
@@ -1,4 +1,5 @@
 from builtins import object
+import numpy as np
 from nose.tools import (assert_equal, assert_not_equal, assert_almost_equal,
                         raises)
 from nose.plugins.skip import Skip, SkipTest
@@ -69,3 +70,53 @@ class testFinalFrameSelector(SelectorTest):
         assert_items_equal([0.1, 0.2, 0.3, 0.4, 0.5],
                            [s.coordinates[0][0] for s in samples[0].trajectory]
                           )
+
+
+class testGaussianBiasSelector(SelectorTest):
+    def setup(self):
+        super(testGaussianBiasSelector, self).setup()
+        import openpathsampling as paths
+        self.cv = paths.FunctionCV("x", lambda s: s.coordinates[0][0])
+        self.sel = GaussianBiasSelector(self.cv, alpha=2.0, l_0=0.2)
+
+    def test_biases(self):
+        biases = self.sel._biases(self.mytraj)
+        expected = [self.sel.f(s, self.mytraj) for s in self.mytraj]
+        assert_equal(len(biases), len(self.mytraj))
+        for (bias, value) in zip(biases, expected):
+            assert_almost_equal(bias, value)
+
+    def test_sum_bias(self):
+        expected = sum(self.sel.f(s, self.mytraj) for s in self.mytraj)
+        assert_almost_equal(self.sel.sum_bias(self.mytraj), expected)
+
+    def test_pick(self):
+        biases = self.sel._biases(self.mytraj)
+        cumulative = np.cumsum(biases)
+        np.random.seed(5)
+        rands = np.random.random(20) * cumulative[-1]
+        np.random.seed(5)
+        for rand in rands:
+            expected = min(i for i in range(len(cumulative))
+                           if cumulative[i] > rand)
+            assert_equal(self.sel.pick(self.mytraj), expected)
+
+    def test_probability_ratio_reuses_shared_frames(self):
+        new_traj = self.mytraj[0:3] + make_1d_traj([0.7, 0.9])
+        calls = []
+        biases = self.sel._biases
+
+        def counting_biases(trajectory):
+            calls.append(len(trajectory))
+            return biases(trajectory)
+
+        self.sel._biases = counting_biases
+        snap = self.mytraj[1]
+        ratio = self.sel.probability_ratio(snap, self.mytraj, new_traj)
+        # the old trajectory is evaluated fully, the new one only where it
+        # differs from the old one
+        assert_equal(calls, [5, 2])
+
+        expected_new = sum(self.sel.f(s, new_traj) for s in new_traj)
+        expected_old = sum(self.sel.f(s, self.mytraj) for s in self.mytraj)
+        assert_almost_equal(ratio, expected_old / expected_new)
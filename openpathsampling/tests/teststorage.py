@@ -9,15 +9,15 @@ from builtins import object
 import os
 
 import mdtraj as md
-from nose.tools import (assert_equal)
+from nose.tools import (assert_equal, assert_raises, raises)
 
 import openpathsampling as paths
 
 import openpathsampling.engines.openmm as peng
 import openpathsampling.engines.toy as toys
 
-from openpathsampling.netcdfplus import ObjectJSON
-from openpathsampling.storage import Storage
+from openpathsampling.netcdfplus import ObjectJSON, LoaderProxy
+from openpathsampling.storage import Storage, EveryNthFrame
 from .test_helpers import (data_filename,
                           compare_snapshot
                           )
@@ -238,6 +238,24 @@ class testStorage(object):
 
             store.close()
 
+    def test_coordinate_precision(self):
+        store = Storage(filename=self.filename, mode='w',
+                        coordinate_precision=2)
+        store.save(self.template_snapshot)
+        store.close()
+
+        store = Storage(filename=self.filename, mode='a')
+        variables = [var for name, var in store.variables.items()
+                     if name.endswith('statics_coordinates')]
+        assert_equal(len(variables), 1)
+        assert variables[0].filters()['zlib']
+
+        loaded = store.snapshots[0]
+        error = np.abs(loaded.coordinates._value
+                       - self.template_snapshot.coordinates._value)
+        assert error.max() <= 0.005
+        store.close()
+
     def test_proxy(self):
         for use_uuid in [True]:
             store = Storage(filename=self.filename, mode='w')
@@ -356,6 +374,93 @@ class testStorage(object):
 
         store.close()
 
+    def test_lazy_uuid_index(self):
+        store = Storage(filename=self.filename, mode='w')
+        traj = paths.Trajectory([self.toy_template,
+                                 self.toy_template.reversed])
+        store.save(traj)
+        store.close()
+
+        store = Storage(filename=self.filename, mode='a')
+        # opening the file does not read the stored uuids
+        assert not store.snapshots.index._column.is_loaded
+        assert not store.trajectories.index._column.is_loaded
+
+        assert_equal(store.snapshots.index[self.toy_template.__uuid__], 0)
+        assert_equal(
+            store.snapshots.index[self.toy_template.reversed.__uuid__], 1)
+        assert store.snapshots.index._column.is_loaded
+        assert_equal(store.trajectories.index[traj.__uuid__], 0)
+        assert_equal(store.snapshots.index.index(1),
+                     self.toy_template.reversed.__uuid__)
+
+        # new objects are added on top of the stored ones
+        traj2 = paths.Trajectory([self.toy_template.copy()])
+        store.save(traj2)
+        assert_equal(store.trajectories.index[traj2.__uuid__], 1)
+        assert_equal(store.snapshots.index[traj2[0].__uuid__], 2)
+        assert_equal(len(store.trajectories), 2)
+        store.close()
+
+    def test_frame_policy(self):
+        store = Storage(filename=self.filename, mode='w')
+        store.trajectories.frame_policy = EveryNthFrame(3)
+        traj = paths.Trajectory([self.toy_template.copy()
+                                 for _ in range(5)])
+        store.save(traj)
+
+        # frames 0, 3 and the last frame are stored, the others mentioned
+        stored = [
+            int(store.snapshots.variables['store'][
+                store.snapshots.index[snap.__uuid__] // 2]) >= 0
+            for snap in traj.iter_proxies()
+        ]
+        assert_equal(stored, [True, False, False, True, True])
+
+        # mentioned snapshots are kept in memory
+        proxies = [type(snap) is LoaderProxy for snap in traj.iter_proxies()]
+        assert_equal(proxies, stored)
+
+        assert_equal(store.snapshots.only_mention, False)
+
+        # saving a mentioned snapshot by itself stores it completely
+        store.save(traj[1])
+        assert int(store.snapshots.variables['store'][
+            store.snapshots.index[traj[1].__uuid__] // 2]) >= 0
+        store.close()
+
+        store = Storage(filename=self.filename, mode='r')
+        loaded = store.trajectories[0]
+        assert_equal(len(loaded), 5)
+        compare_snapshot(loaded[1], traj[1])
+        assert_raises(RuntimeError, loaded.__getitem__, 2)
+        store.close()
+
+    def test_frame_policy_cv_values(self):
+        cv = paths.CoordinateFunctionCV('x', lambda s: s.coordinates[0][0])
+        store = Storage(filename=self.filename, mode='w')
+        store.save(cv)
+        store.trajectories.frame_policy = EveryNthFrame(3)
+        traj = paths.Trajectory([
+            toys.Snapshot(coordinates=np.array([[float(i), 0.0]]),
+                          velocities=np.array([[0.0, 0.0]]),
+                          engine=self.engine)
+            for i in range(5)
+        ])
+        store.save(traj)
+
+        # the CV got a complete disk cache with the values of all frames
+        assert_equal(store.snapshots.cv_list[cv][0].allow_incomplete, False)
+        store.close()
+
+        store = paths.AnalysisStorage(self.filename)
+        loaded = store.trajectories[0]
+        # frame 2 is only mentioned, but its CV value is stored
+        assert_raises(RuntimeError, loaded.__getitem__, 2)
+        assert_equal(list(store.cvs['x'](loaded)),
+                     [0.0, 1.0, 2.0, 3.0, 4.0])
+        store.close()
+
     def test_load_save_toy(self):
         store = Storage(filename=self.filename, mode='w')
         assert(os.path.isfile(self.filename))
@@ -376,6 +481,119 @@ class testStorage(object):
 
         store.close()
 
+    def test_storage_writer(self):
+        store = Storage(filename=self.filename, mode='w')
+        writer = paths.storage.StorageWriter(store, max_queued=2)
+        snapshots = [
+            toys.Snapshot(coordinates=np.array([[float(i), 0.0]]),
+                          velocities=np.array([[0.0, 0.0]]),
+                          engine=self.engine)
+            for i in range(5)
+        ]
+        for snap in snapshots:
+            writer.save(store.snapshots, snap)
+        writer.flush()
+        assert_equal(len(store.snapshots), 10)
+        writer.close()
+        assert(not writer.is_alive)
+        # closing again does nothing
+        writer.close()
+        store.close()
+
+        store = Storage(filename=self.filename, mode='r')
+        for (i, snap) in enumerate(snapshots):
+            compare_snapshot(store.snapshots[2 * i], snap, True)
+        store.close()
+
+    @raises(RuntimeError)
+    def test_storage_writer_closed(self):
+        store = Storage(filename=self.filename, mode='w')
+        writer = paths.storage.StorageWriter(store)
+        writer.close()
+        try:
+            writer.save(store.snapshots, self.toy_template)
+        finally:
+            store.close()
+
+    def test_stored_trajectory_features(self):
+        import simtk.unit as u
+        traj = self.traj[0:4]
+        for snap in traj:
+            snap.velocities = np.random.normal(
+                size=snap.coordinates.shape
+            ).astype(np.float32) * (u.nanometers / u.picoseconds)
+
+        mixed = paths.Trajectory(
+            [traj[2], traj[0].reversed, traj[2].reversed, traj[3]])
+
+        store = Storage(filename=self.filename, mode='w')
+        store.save(traj)
+        store.save(mixed)
+        store.close()
+
+        store = Storage(filename=self.filename, mode='r')
+        assert_equal(store.trajectories.snapshot_indices(1), [4, 1, 5, 6])
+        items = ['coordinates', 'velocities', 'box_vectors']
+        for loaded in [store.trajectories[0], store.trajectories[1]]:
+            values = {}
+            for item in items:
+                stored = loaded._stored_feature(item)
+                assert(stored is not None)
+                assert(not stored.flags.writeable)
+                values[item] = getattr(loaded, item)
+
+            snapshots = list(loaded)
+            for item in items:
+                assert_equal(values[item].unit,
+                             getattr(snapshots[0], item).unit)
+                assert_equal(values[item]._value.dtype,
+                             getattr(snapshots[0], item)._value.dtype)
+                assert(values[item]._value.flags.writeable)
+                for (frame, snap) in enumerate(snapshots):
+                    np.testing.assert_array_equal(
+                        values[item][frame]._value,
+                        getattr(snap, item)._value)
+
+                # loaded snapshots are read from memory
+                assert(loaded._stored_feature(item) is None)
+
+            np.testing.assert_array_equal(
+                loaded.to_mdtraj(self.mdtraj.topology).xyz,
+                np.array([snap.xyz for snap in snapshots]))
+
+        store.close()
+
+    def test_stored_trajectory_features_toy(self):
+        snapshots = [
+            toys.Snapshot(coordinates=np.array([[float(i), 0.5]]),
+                          velocities=np.array([[1.0, float(i)]]),
+                          engine=self.engine)
+            for i in range(3)
+        ]
+        traj = paths.Trajectory(
+            [snapshots[1], snapshots[0].reversed, snapshots[2]])
+        unstored = paths.Trajectory(snapshots)
+
+        store = Storage(filename=self.filename, mode='w')
+        store.save(traj)
+        store.close()
+
+        store = Storage(filename=self.filename, mode='r')
+        loaded = store.trajectories[0]
+        for bulk_read_gap in [16, 0]:
+            # with no gap allowed every row is read in its own slice
+            store.snapshots.bulk_read_gap = bulk_read_gap
+            for item in ['coordinates', 'velocities']:
+                assert(loaded._stored_feature(item) is not None)
+                assert(unstored._stored_feature(item) is None)
+                values = getattr(loaded, item)
+                np.testing.assert_array_equal(values, getattr(traj, item))
+                # same type as values taken from memory, and can be changed
+                assert_equal(values.dtype, getattr(loaded[0], item).dtype)
+                values -= 1.0
+
+        store.close()
+
     def test_reverse_bug(self):
         store = Storage(filename=self.filename,
                         mode='w')
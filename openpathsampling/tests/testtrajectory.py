@@ -138,3 +138,43 @@ class testSubtrajectoryIndices(object):
         assert_equal(indicesA, [[0, 1], [3], [11, 12]])
         assert_equal(indicesB, [[5, 6], [8]])
         assert_equal(indicesABA, [[3, 4, 5, 6, 7, 8, 9, 10, 11]])
+
+
+class testPrependingTrajectory(object):
+    def setup(self):
+        self.traj = make_1d_traj(coordinates=[0.0, 1.0, 2.0, 3.0, 4.0])
+
+    def test_prepend(self):
+        traj = paths.engines.PrependingTrajectory(self.traj[3:])
+        for idx in [2, 1, 0]:
+            traj.prepend(self.traj[idx])
+        assert_equal(len(traj), 5)
+        assert_equal(list(traj), list(self.traj))
+        assert_equal(traj, self.traj)
+        assert_equal(hash(traj), hash(self.traj))
+        assert_equal(traj[1], self.traj[1])
+        assert_equal(traj[-1], self.traj[-1])
+        assert_equal(traj.get_as_proxy(-2), self.traj.get_as_proxy(-2))
+        assert_equal(traj.index(self.traj[3]), 3)
+        assert_equal(traj.coordinates.tolist(),
+                     self.traj.coordinates.tolist())
+
+    def test_slices_are_trajectories(self):
+        traj = paths.engines.PrependingTrajectory(self.traj)
+        assert_equal(type(traj[1:4]), paths.Trajectory)
+        assert_equal(traj[1:4], self.traj[1:4])
+        assert_equal(traj[::-1], self.traj[::-1])
+        assert_equal(paths.Trajectory(traj), self.traj)
+        assert_equal(traj.reversed, self.traj.reversed)
+
+    def test_list_methods(self):
+        traj = paths.engines.PrependingTrajectory(self.traj[1:3])
+        traj.append(self.traj[3])
+        traj.insert(0, self.traj[0])
+        traj.extend(self.traj[4:])
+        assert_equal(traj, self.traj)
+        assert_equal(traj.pop(0), self.traj[0])
+        del traj[-1]
+        assert_equal(traj, self.traj[1:4])
+        del traj[0:2]
+        assert_equal(traj, self.traj[3:4])
@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 from builtins import object
+from builtins import range
 from nose.tools import assert_equal, assert_not_equal, raises
 from nose.plugins.skip import SkipTest
 from .test_helpers import (
@@ -19,13 +20,97 @@ logging.getLogger('openpathsampling.netcdfplus').setLevel(logging.CRITICAL)
 
 class testTISTransition(object):
     def setup(self):
-        pass
-
-    def test_initialization(self):
-        pass
+        cv = paths.FunctionCV("x", lambda snap: snap.xyz[0][0])
+        self.stateA = paths.CVDefinedVolume(cv, float("-inf"), 0.0)
+        self.stateB = paths.CVDefinedVolume(cv, 1.0, float("inf"))
+        self.stateC = paths.CVDefinedVolume(cv, float("-inf"), -1.0)
+        interfaces = paths.VolumeInterfaceSet(cv, float("-inf"),
+                                              [0.0, 0.2, 0.4])
+        self.transition = paths.TISTransition(self.stateA, self.stateB,
+                                              interfaces, cv)
+        self.transition.hist_args = {
+            'max_lambda': {'bin_width': 0.1, 'bin_range': (0.0, 1.0)},
+            'pathlength': {'bin_width': 1, 'bin_range': (0, 10)}
+        }
+        # samples change every step, so each step gives new data
+        self.steps = []
+        for step in range(5):
+            samples = [
+                paths.Sample(replica=i, ensemble=ens, trajectory=make_1d_traj(
+                    [-0.1] + [0.1 * (step + i + 2)] * (step + 1) + [-0.1]
+                ))
+                for (i, ens) in enumerate(self.transition.ensembles)
+            ]
+            self.steps.append(paths.MCStep(mccycle=step,
+                                           active=paths.SampleSet(samples)))
+
+    def _counting_steps(self, counter):
+        for step in self.steps:
+            counter[0] += 1
+            yield step
 
     def test_ensemble_statistics(self):
-        pass
+        ensemble = self.transition.ensembles[1]
+        samples = (s for step in self.steps for s in step.active)
+        self.transition.ensemble_statistics(ensemble, samples, force=True)
+        hist = self.transition.histograms['pathlength'][ensemble]
+        assert_equal(dict(hist._histogram),
+                     {(float(n),): 1.0 for n in [3, 4, 5, 6, 7]})
+        assert_equal(hist.name, "pathlength " + self.transition.name + " "
+                     + ensemble.name)
+
+    def test_all_statistics(self):
+        counter = [0]
+        self.transition.all_statistics(self._counting_steps(counter),
+                                       force=True)
+        assert_equal(counter[0], len(self.steps))
+
+        expected = paths.TISTransition(self.stateA, self.stateB,
+                                       self.transition.interfaces,
+                                       self.transition.orderparameter)
+        expected.hist_args = self.transition.hist_args
+        for ens in self.transition.ensembles:
+            samples = (s for step in self.steps for s in step.active)
+            expected.ensemble_statistics(ens, samples, force=True)
+
+        for hist in ['max_lambda', 'pathlength']:
+            for ens in self.transition.ensembles:
+                assert_equal(self.transition.histograms[hist][ens]._histogram,
+                             expected.histograms[hist][ens]._histogram)
+        assert_equal(self.transition._missing_statistics(), False)
+
+    def test_all_transitions_statistics(self):
+        other = paths.TISTransition(self.stateA, self.stateC,
+                                    self.transition.interfaces,
+                                    self.transition.orderparameter)
+        other.hist_args = self.transition.hist_args
+        assert_equal(other._missing_statistics(), True)
+        counter = [0]
+        all_transitions_statistics([self.transition, other],
+                                   self._counting_steps(counter), force=True)
+        assert_equal(counter[0], len(self.steps))
+        assert_equal(self.transition._missing_statistics(), False)
+        # no sample is in the ensembles of the other transition
+        for ens in other.ensembles:
+            assert_equal(other.histograms['pathlength'][ens]._histogram,
+                         {})
+
+    def test_all_statistics_empty_ensemble_without_bin_range(self):
+        other = paths.TISTransition(self.stateA, self.stateC,
+                                    self.transition.interfaces,
+                                    self.transition.orderparameter)
+        other.hist_args = {
+            'max_lambda': {'n_bins': 10},
+            'pathlength': {'n_bins': 10}
+        }
+        all_transitions_statistics([self.transition, other], self.steps,
+                                   force=True)
+        assert_equal(self.transition._missing_statistics(), False)
+        # the bins cannot be set without data, so there are no histograms
+        for hist in ['max_lambda', 'pathlength']:
+            for ens in other.ensembles:
+                assert_equal(ens in other.histograms[hist], False)
+        assert_equal(other._missing_statistics(), True)
 
 class testFixedLengthTPSTransition(object):
     def setup(self):
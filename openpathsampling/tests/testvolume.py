@@ -17,6 +17,15 @@ class Identity2(CallIdentity):
     def __str__(self):
         return "Id2"
 
+class CallCounter(CallIdentity):
+    def __init__(self):
+        super(CallCounter, self).__init__()
+        self.calls = []
+
+    def __call__(self, value):
+        self.calls.append(value)
+        return value
+
 def setUp():
     global op_id, volA, volB, volC, volD, volA2
     op_id = CallIdentity()
@@ -401,6 +410,66 @@ class testVolumeFactory(object):
             volume.VolumeFactory.CVRangeVolumePeriodicSet(op_id, mins, maxs)
         )
 
+class testVolumeMask(object):
+    def setup(self):
+        self.values = [-1.0, -0.6, -0.5, -0.3, 0.0, 0.3, 0.5, 0.6, 1.0]
+
+    def _check_mask(self, vol, values=None):
+        if values is None:
+            values = self.values
+        mask = vol.mask(values)
+        assert_equal(mask.dtype, bool)
+        assert_equal(mask.tolist(), [vol(val) for val in values])
+
+    def test_cv_defined(self):
+        for vol in [volA, volB, volC, volD]:
+            self._check_mask(vol)
+
+    def test_periodic(self):
+        vols = [
+            volume.PeriodicCVDefinedVolume(op_id, -150, 70, -180, 180),
+            volume.PeriodicCVDefinedVolume(op_id, 70, -150, -180, 180),
+            volume.PeriodicCVDefinedVolume(op_id, 70, -150),
+            volume.PeriodicCVDefinedVolume(op_id, 0, 80, 0, 100)
+        ]
+        values = [-400.0, -330.0, -180.0, -151.0, -150.0, 0.0, 70.0, 71.0,
+                  180.0, 250.0, 359.0, 360.0, 500.0]
+        for vol in vols:
+            self._check_mask(vol, values)
+
+    def test_combinations(self):
+        combos = [volA | volB, volA & volB, volA ^ volB, volA - volB,
+                  volA | volA2, volA & volA2, volA ^ volA2, volA - volA2,
+                  ~volA, ~(volA | volA2), volume.EmptyVolume(),
+                  volume.FullVolume()]
+        for vol in combos:
+            self._check_mask(vol)
+
+    def test_combination_short_circuit(self):
+        counter = CallCounter()
+        vol = volA | volume.CVDefinedVolume(counter, 0.25, 0.75)
+        vol.mask(self.values)
+        # the second volume is only needed outside of volA
+        assert_equal(counter.calls, [[-1.0, -0.6, 0.6, 1.0]])
+
+    def test_custom_combination(self):
+        vol = volume.VolumeCombination(volA, volB, lambda a, b: a and not b,
+                                       '{0} and not {1}')
+        self._check_mask(vol)
+
+    def test_unit_support(self):
+        import simtk.unit as u
+        vol = volume.CVDefinedVolume(
+            op_id, -0.5 * u.nanometers, 0.25 * u.nanometers)
+        values = [-0.75 * u.nanometers, -0.25 * u.nanometers,
+                  0.5 * u.nanometers]
+        self._check_mask(vol, values)
+
+    def test_empty(self):
+        for vol in [volA, volA | volB, ~volA]:
+            assert_equal(vol.mask([]).tolist(), [])
+
+
 class testAbstract(object):
     @raises_with_message_like(TypeError, "Can't instantiate abstract class")
     def test_abstract_volume(self):
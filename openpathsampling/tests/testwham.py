@@ -3,7 +3,7 @@ from __future__ import absolute_import
 from builtins import object
 from past.utils import old_div
 from nose.tools import (assert_equal, assert_not_equal, raises,
-                        assert_almost_equal)
+                        assert_almost_equal, assert_true)
 from nose.plugins.skip import SkipTest
 from .test_helpers import assert_items_almost_equal, assert_items_equal
 
@@ -128,6 +128,55 @@ class testWHAM(object):
                                      sum_k_Hk_Q)
         np.testing.assert_allclose(lnZ.as_matrix(), expected_lnZ)
 
+    def test_generate_lnZ_without_diis(self):
+        unweighting = self.wham.unweighting_tis(self.cleaned)
+        sum_k_Hk_Q = self.wham.sum_k_Hk_Q(self.cleaned)
+        weighted_counts = self.wham.weighted_counts_tis(
+            unweighting,
+            self.wham.n_entries(self.cleaned)
+        )
+        lnZ_diis = self.wham.generate_lnZ([1.0, 1.0, 1.0], unweighting,
+                                          weighted_counts, sum_k_Hk_Q)
+        (n_iter_diis, diff_diis) = self.wham.convergence
+        wham = paths.numerics.WHAM(cutoff=0.1, diis_history=0)
+        lnZ = wham.generate_lnZ([1.0, 1.0, 1.0], unweighting,
+                                weighted_counts, sum_k_Hk_Q)
+        (n_iter, diff) = wham.convergence
+        np.testing.assert_allclose(lnZ.values, lnZ_diis.values)
+        assert_equal(list(lnZ.index), self.columns)
+        assert_true(n_iter_diis < n_iter)
+        for (whm, n, d) in [(self.wham, n_iter_diis, diff_diis),
+                            (wham, n_iter, diff)]:
+            assert_equal(len(whm.residuals), n)
+            assert_equal(whm.residuals[-1], d)
+            assert_true(d < whm.tol)
+
+    def test_wham_iteration(self):
+        unweighting = self.wham.unweighting_tis(self.cleaned)
+        sum_k_Hk_Q = self.wham.sum_k_Hk_Q(self.cleaned)
+        weighted_counts = self.wham.weighted_counts_tis(
+            unweighting,
+            self.wham.n_entries(self.cleaned)
+        )
+        # the exact lnZ is a fixed point of the iteration
+        expected_lnZ = np.log([1.0, old_div(1.0,4.0), old_div(7.0,120.0)])
+        lnZ = self.wham.wham_iteration(expected_lnZ, unweighting.values,
+                                       weighted_counts.values,
+                                       sum_k_Hk_Q.values)
+        np.testing.assert_allclose(lnZ - lnZ[0], expected_lnZ)
+
+    def test_generate_lnZ_max_iter(self):
+        wham = paths.numerics.WHAM(cutoff=0.1, max_iter=2)
+        unweighting = wham.unweighting_tis(self.cleaned)
+        weighted_counts = wham.weighted_counts_tis(
+            unweighting,
+            wham.n_entries(self.cleaned)
+        )
+        wham.generate_lnZ([1.0, 1.0, 1.0], unweighting, weighted_counts,
+                          wham.sum_k_Hk_Q(self.cleaned))
+        assert_equal(wham.convergence[0], 2)
+        assert_true(wham.convergence[1] > wham.tol)
+
     def test_output_histogram(self):
         sum_k_Hk_Q = self.wham.sum_k_Hk_Q(self.cleaned)
         n_entries = self.wham.n_entries(self.cleaned)
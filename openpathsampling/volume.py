@@ -6,6 +6,7 @@ Created on 03.09.2014
 
 from . import range_logic
 import abc
+import numpy as np
 from openpathsampling.netcdfplus import StorableNamedObject
 
 # TODO: Make Full and Empty be Singletons to avoid storing them several times!
@@ -32,6 +33,14 @@ def join_volumes(volume_list):
     return volume
 
 
+def _frames(trajectory):
+    # proxies avoid loading snapshots that are only needed for cached CVs
+    try:
+        return list(trajectory.as_proxies())
+    except AttributeError:
+        return list(trajectory)
+
+
 class Volume(StorableNamedObject):
     """
     A Volume describes a set of snapshots
@@ -49,6 +58,26 @@ class Volume(StorableNamedObject):
         '''
         return False # pragma: no cover
 
+    def mask(self, trajectory):
+        '''
+        Returns a boolean array marking the frames inside the volume
+
+        Subclasses that can evaluate many snapshots at once (e.g., in a
+        single call to their collective variable) should override this.
+
+        Parameters
+        ----------
+        trajectory : :class:`openpathsampling.Trajectory` or list
+            the snapshots to be tested
+
+        Returns
+        -------
+        numpy.ndarray of bool
+            `mask[i]` is `True` if `trajectory[i]` is in the volume
+        '''
+        return np.array([self(frame) for frame in _frames(trajectory)],
+                        dtype=bool)
+
     def __str__(self):
         '''
         Returns a string representation of the volume
@@ -113,13 +142,18 @@ class VolumeCombination(Volume):
 
     This should be treated as an abstract class. For storage purposes, use
     specific subclasses in practice.
+
+    `mask_fnc` is the elementwise version of `fnc` acting on boolean
+    arrays, used by :meth:`mask`. If it is `None`, `fnc` is applied to each
+    frame.
     """
-    def __init__(self, volume1, volume2, fnc, str_fnc):
+    def __init__(self, volume1, volume2, fnc, str_fnc, mask_fnc=None):
         super(VolumeCombination, self).__init__()
         self.volume1 = volume1
         self.volume2 = volume2
         self.fnc = fnc
         self.sfnc = str_fnc
+        self.mask_fnc = mask_fnc
 
     def __call__(self, snapshot):
         # short circuit following JHP's implementation in ensemble.py
@@ -134,6 +168,28 @@ class VolumeCombination(Volume):
         #return self.fnc(self.volume1.__call__(snapshot),
                         #self.volume2.__call__(snapshot))
 
+    def _combine_masks(self, a, b):
+        b = np.broadcast_to(b, a.shape)
+        if self.mask_fnc is not None:
+            return self.mask_fnc(a, b)
+        else:
+            return np.array([self.fnc(x, y) for x, y in zip(a, b)],
+                            dtype=bool)
+
+    def mask(self, trajectory):
+        # same short circuit as in __call__: volume2 is only evaluated for
+        # the frames where volume1 does not decide the result
+        frames = _frames(trajectory)
+        a = self.volume1.mask(frames)
+        res_true = self._combine_masks(a, True)
+        res_false = self._combine_masks(a, False)
+        undecided = np.flatnonzero(res_true != res_false)
+        result = res_true
+        if len(undecided) > 0:
+            b = self.volume2.mask([frames[idx] for idx in undecided])
+            result[undecided] = self._combine_masks(a[undecided], b)
+        return result
+
     def __str__(self):
         return '(' + self.sfnc.format(str(self.volume1), str(self.volume2)) + ')'
 
@@ -144,25 +200,29 @@ class VolumeCombination(Volume):
 class UnionVolume(VolumeCombination):
     """ "Or" combination (union) of two volumes."""
     def __init__(self, volume1, volume2):
-        super(UnionVolume, self).__init__(volume1, volume2, lambda a,b : a or b, str_fnc = '{0} or {1}')
+        super(UnionVolume, self).__init__(volume1, volume2, lambda a,b : a or b, str_fnc = '{0} or {1}',
+            mask_fnc=np.logical_or)
 
 
 class IntersectionVolume(VolumeCombination):
     """ "And" combination (intersection) of two volumes."""
     def __init__(self, volume1, volume2):
-        super(IntersectionVolume, self).__init__(volume1, volume2, lambda a,b : a and b, str_fnc = '{0} and {1}')
+        super(IntersectionVolume, self).__init__(volume1, volume2, lambda a,b : a and b, str_fnc = '{0} and {1}',
+            mask_fnc=np.logical_and)
 
 
 class SymmetricDifferenceVolume(VolumeCombination):
     """ "Xor" combination of two volumes."""
     def __init__(self, volume1, volume2):
-        super(SymmetricDifferenceVolume, self).__init__(volume1, volume2, lambda a,b : a ^ b, str_fnc = '{0} xor {1}')
+        super(SymmetricDifferenceVolume, self).__init__(volume1, volume2, lambda a,b : a ^ b, str_fnc = '{0} xor {1}',
+            mask_fnc=np.logical_xor)
 
 
 class RelativeComplementVolume(VolumeCombination):
     """ "Subtraction" combination (relative complement) of two volumes."""
     def __init__(self, volume1, volume2):
-        super(RelativeComplementVolume, self).__init__(volume1, volume2, lambda a,b : a and not b, str_fnc = '{0} and not {1}')
+        super(RelativeComplementVolume, self).__init__(volume1, volume2, lambda a,b : a and not b, str_fnc = '{0} and not {1}',
+            mask_fnc=lambda a, b: a & ~b)
 
 
 class NegatedVolume(Volume):
@@ -174,6 +234,9 @@ class NegatedVolume(Volume):
     def __call__(self, snapshot):
         return not self.volume(snapshot)
 
+    def mask(self, trajectory):
+        return ~self.volume.mask(trajectory)
+
     def __str__(self):
         return '(not ' + str(self.volume) + ')'
 
@@ -186,6 +249,9 @@ class EmptyVolume(Volume):
     def __call__(self, snapshot):
         return False
 
+    def mask(self, trajectory):
+        return np.zeros(len(trajectory), dtype=bool)
+
     def __and__(self, other):
         return self
 
@@ -213,6 +279,9 @@ class FullVolume(Volume):
     def __call__(self, snapshot):
         return True
 
+    def mask(self, trajectory):
+        return np.ones(len(trajectory), dtype=bool)
+
     def __invert__(self):
         return EmptyVolume()
 
@@ -370,8 +439,9 @@ class CVDefinedVolume(Volume):
             return super(CVDefinedVolume, self).__sub__(other)
 
     def __call__(self, snapshot):
-        l = self.collectivevariable(snapshot).__float__()
+        return self._in_range(self.collectivevariable(snapshot).__float__())
 
+    def _in_range(self, l):
         # we explicitly test for infinity to allow the user to
         # define `lambda_min/max='inf'` also when using units
         # a simtk unit cannot be compared to a python infinite float
@@ -383,6 +453,44 @@ class CVDefinedVolume(Volume):
 
         return True
 
+    def mask(self, trajectory):
+        # the CV is evaluated for all frames at once, which also lets it
+        # compute all missing values in a single batch
+        return self.mask_values(self.collectivevariable(_frames(trajectory)))
+
+    def mask_values(self, values):
+        '''
+        Returns a boolean array marking the CV values inside the volume
+
+        Parameters
+        ----------
+        values : iterable of float
+            values of the collective variable
+
+        Returns
+        -------
+        numpy.ndarray of bool
+            `mask[i]` is `True` if `values[i]` is in the allowed range
+        '''
+        if self._has_units:
+            # simtk quantities do not vectorize, compare them one by one
+            return np.array(
+                [self._in_range(value.__float__()) for value in values],
+                dtype=bool
+            )
+
+        # single-element arrays are treated as scalars, like in `__call__`
+        l = np.asarray(values, dtype=float)
+        return self._in_range_array(l.reshape(len(l)))
+
+    @property
+    def _has_units(self):
+        return hasattr(self.lambda_min, 'unit') or \
+            hasattr(self.lambda_max, 'unit')
+
+    def _in_range_array(self, l):
+        return ~((self.lambda_min > l) | (self.lambda_max < l))
+
     def __str__(self):
         return '{{x|{2}(x) in [{0}, {1}]}}'.format(
             self.lambda_min, self.lambda_max, self.collectivevariable.name)
@@ -473,8 +581,7 @@ class PeriodicCVDefinedVolume(CVDefinedVolume):
                                     self.period_min, self.period_max
                                    )
 
-    def __call__(self, snapshot):
-        l = self.collectivevariable(snapshot).__float__()
+    def _in_range(self, l):
         if self.wrap:
             l = self.do_wrap(l)
         if self.lambda_min > self.lambda_max:
@@ -482,6 +589,28 @@ class PeriodicCVDefinedVolume(CVDefinedVolume):
         else:
             return self.lambda_min <= l <= self.lambda_max
 
+    def _in_range_array(self, l):
+        if self.wrap:
+            l = self._wrap_array(l)
+        if self.lambda_min > self.lambda_max:
+            return (l >= self.lambda_min) | (l <= self.lambda_max)
+        else:
+            return (self.lambda_min <= l) & (l <= self.lambda_max)
+
+    def _wrap_array(self, values):
+        """Wraps an array of float `values` like :meth:`do_wrap`."""
+        val = values - self._period_shift
+        positive = val > 0
+        wrapped = np.where(
+            positive,
+            values - np.trunc(val / self._period_len) * self._period_len,
+            values + np.trunc((self._period_len - val) / self._period_len)
+            * self._period_len
+        )
+        overflow = ~positive & (wrapped >= self._period_len)
+        wrapped[overflow] -= self._period_len
+        return wrapped
+
     def __str__(self):
         if self.wrap:
             fcn = 'x|({0}(x) - {2}) % {1} + {2}'.format(